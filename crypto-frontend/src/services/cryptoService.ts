@@ -1,5 +1,5 @@
 import api from './api';
-import { CoinListResponse, CoinDetailResponse } from '../types/crypto';
+import { CoinListResponse, CoinDetailResponse, CoinBatchResponse } from '../types/crypto';
 import { ApiError } from '../types/api';
 
 export const cryptoService = {
@@ -160,6 +160,42 @@ export const cryptoService = {
     }
   },
 
+  // 複数の仮想通貨詳細を一括取得（ブックマークや保有コインの表示用）
+  // リクエスト順で返り、存在しないIDはmissingに入る
+  getCoinsBatch: async (coinIds: string[]): Promise<CoinBatchResponse> => {
+    try {
+      const ids = coinIds.map((coinId) => coinId.trim()).filter((coinId) => coinId !== '');
+      if (ids.length === 0) {
+        return { data: [], count: 0, missing: [] };
+      }
+
+      const response = await api.getWithRetry('/coins/batch', { params: { ids: ids.join(',') } }, {
+        retries: 3,
+        retryCondition: (error) => !error.response || error.response.status >= 500
+      });
+
+      // レスポンスデータの検証
+      if (!response.data || !Array.isArray(response.data.data)) {
+        throw new ApiError('Invalid response format from server', 500);
+      }
+
+      return response.data;
+    } catch (error: unknown) {
+      // ApiErrorの場合はそのまま再スロー
+      if (error instanceof ApiError) {
+        throw error;
+      }
+
+      // ネットワークエラー
+      if (error && typeof error === 'object' && 'message' in error && typeof error.message === 'string' && error.message.includes('Network Error')) {
+        throw new ApiError('ネットワークエラーが発生しました。インターネット接続を確認してください。', 0);
+      }
+
+      // その他の予期しないエラー
+      throw new ApiError('仮想通貨の詳細データ取得中にエラーが発生しました。', 500, error);
+    }
+  },
+
   // 接続テスト用のヘルスチェック機能
   healthCheck: async (): Promise<boolean> => {
     try {
@@ -47,6 +47,12 @@ export interface CoinDetailResponse {
   message?: string;
 }
 
+export interface CoinBatchResponse {
+  data: Coin[];
+  count: number;
+  missing: string[];
+}
+
 export interface BookmarkResponse {
   data: Bookmark;
   message?: string;
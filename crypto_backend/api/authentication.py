@@ -0,0 +1,216 @@
+"""
+Token authentication with cached token lookups.
+
+DRF's TokenAuthentication joins the token and user tables on every
+authenticated request. CachedTokenAuthentication keeps a snapshot of the
+token and its user (every user field except the password hash) in a bounded
+per-process LRU for AUTH_TOKEN_CACHE_TIMEOUT seconds, so repeat requests
+with the same token do not query the database.
+
+With AUTH_TOKEN_CACHE_ALIAS naming a shared cache (e.g. Redis), snapshots
+are also kept there and workers only hold them locally for a few seconds,
+so a logout or deactivation reaches every worker almost at once. Without
+it, other workers may still accept a deleted token until their local entry
+expires, which is why the timeout defaults to a few seconds in that case.
+
+Entries are dropped when a token is deleted (logout, admin) and whenever
+the user is saved (deactivation, password or permission changes), once the
+change commits: dropping them earlier would let a concurrent request cache
+the old row again before the change is visible. Bulk `QuerySet.update()`
+calls bypass this; they take effect after the timeout.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+# Seconds workers keep a snapshot locally when a shared cache is configured
+SHARED_CACHE_LOCAL_TIMEOUT = 5
+
+# Never cached, so password hashes stay out of the shared cache
+_EXCLUDED_USER_FIELDS = ('password',)
+
+# Saves touching only these fields (every login) keep the cached snapshots
+_BOOKKEEPING_USER_FIELDS = frozenset({'last_login', 'last_login_at'})
+
+
+def _cache_key(key):
+    # Token keys are credentials; cache keys only ever see their digest
+    return 'auth_token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _user_attnames():
+    return tuple(
+        field.attname for field in User._meta.concrete_fields
+        if field.attname not in _EXCLUDED_USER_FIELDS
+    )
+
+
+class TokenCache:
+    """
+    Token snapshots in a per-process LRU with expiry, backed by the
+    AUTH_TOKEN_CACHE_ALIAS cache when one is configured
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _shared(self):
+        alias = settings.AUTH_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _local_timeout(self):
+        timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+        if self._shared is not None:
+            return min(timeout, SHARED_CACHE_LOCAL_TIMEOUT)
+        return timeout
+
+    def _get_local(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return snapshot
+
+    def _set_local(self, cache_key, snapshot):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+            self._entries[cache_key] = (time.monotonic() + self._local_timeout(), snapshot)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        cache_key = _cache_key(key)
+        snapshot = self._get_local(cache_key)
+        if snapshot is None and self._shared is not None:
+            snapshot = self._shared.get(cache_key)
+            if snapshot is not None:
+                self._set_local(cache_key, snapshot)
+        return snapshot
+
+    def set(self, key, snapshot):
+        cache_key = _cache_key(key)
+        self._set_local(cache_key, snapshot)
+        if self._shared is not None:
+            self._shared.set(cache_key, snapshot, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+    def delete(self, key):
+        cache_key = _cache_key(key)
+        with self._lock:
+            self._entries.pop(cache_key, None)
+        if self._shared is not None:
+            self._shared.delete(cache_key)
+
+    def clear(self):
+        """
+        Drop every local entry (the shared cache is left alone)
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def snapshot_token(token):
+    """
+    Picklable `(created, user values)` for a token loaded with its user
+    """
+    user = token.user
+    return token.created, tuple(getattr(user, name) for name in _user_attnames())
+
+
+def restore_token(key, snapshot):
+    """
+    `(user, token)` rebuilt from a snapshot without touching the database.
+    The password is deferred and loaded on first access.
+    """
+    created, values = snapshot
+    user = User.from_db(Token.objects.db, _user_attnames(), values)
+    token = Token(key=key, created=created)
+    # Sets token.user as well, so request.user.auth_token needs no query
+    user.auth_token = token
+    return user, token
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+
+
+def invalidate_user_tokens(user_id, using=None):
+    """
+    Drop the cached tokens of a user when the current transaction commits
+    """
+    keys = list(Token.objects.using(using).filter(user_id=user_id).values_list('key', flat=True))
+
+    def invalidate():
+        for key in keys:
+            invalidate_token(key)
+
+    if keys:
+        transaction.on_commit(invalidate, using=using)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that serves repeat lookups from `token_cache`.
+    Only valid tokens of active users are cached.
+    """
+
+    def authenticate_credentials(self, key):
+        if settings.AUTH_TOKEN_CACHE_TIMEOUT <= 0:
+            return super().authenticate_credentials(key)
+
+        snapshot = token_cache.get(key)
+        if snapshot is not None:
+            return restore_token(key, snapshot)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, snapshot_token(token))
+        return user, token
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='invalidate_deleted_token')
+def _token_deleted(sender, instance, using, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key), using=using)
+
+
+@receiver(post_save, sender=User, dispatch_uid='invalidate_saved_user_tokens')
+def _user_saved(sender, instance, created, using, update_fields=None, **kwargs):
+    if created or (update_fields and update_fields <= _BOOKKEEPING_USER_FIELDS):
+        return
+    invalidate_user_tokens(instance.pk, using)
+
+
+# Django's own receiver writes last_login in a separate UPDATE; record both
+# login timestamps in one instead
+user_logged_in.disconnect(dispatch_uid='update_last_login')
+
+
+@receiver(user_logged_in, dispatch_uid='update_login_timestamps')
+def _user_logged_in(sender, request, user, **kwargs):
+    user.last_login = user.last_login_at = timezone.now()
+    user.save(update_fields=['last_login', 'last_login_at'])
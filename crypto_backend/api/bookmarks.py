@@ -0,0 +1,51 @@
+"""
+Per-user set of bookmarked coin ids.
+
+List views only need to know *which* coins a user bookmarked, not the coin
+rows, so the ids are kept as a compact list in Django's cache framework and
+read with one cache lookup. `bookmark_create` / `bookmark_delete` drop the
+entry; on a miss it is rebuilt from the bookmarks table with one indexed
+query (no join with coins).
+
+Use a shared cache backend (see CACHES in settings) when running several
+worker processes; with the default per-process local memory cache other
+workers see a change after BOOKMARK_IDS_CACHE_TIMEOUT at the latest.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Bookmark
+
+
+def _cache_key(user_id):
+    return f'bookmark_ids:{user_id}'
+
+
+def get_bookmarked_ids(user):
+    """
+    Return the frozenset of coin ids `user` has bookmarked (empty for
+    anonymous users)
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    key = _cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(Bookmark.objects.filter(user_id=user.pk).values_list('coin_id', flat=True))
+        cache.set(key, ids, settings.BOOKMARK_IDS_CACHE_TIMEOUT)
+    return frozenset(ids)
+
+
+def invalidate_bookmarked_ids(user_id):
+    """
+    Drop the cached set after the user's bookmarks changed
+    """
+    cache.delete(_cache_key(user_id))
+
+
+def annotate_bookmarks(rows, bookmarked_ids):
+    """
+    Copy encoded coin rows adding `is_bookmarked`
+    """
+    return [dict(row, is_bookmarked=row['id'] in bookmarked_ids) for row in rows]
@@ -0,0 +1,92 @@
+"""
+Precompressed bodies for the cacheable coin payloads.
+
+Snapshot bodies (api/snapshots.py) are compressed at most once per data
+version and encoding, and the compressed bytes are kept on the snapshot, so
+a compressed coin list costs a dict lookup per request instead of a gzip
+pass. Brotli is offered when the optional `brotli` package is installed.
+
+Only shared snapshot bodies are compressed. Per-user responses (tokens,
+bookmark flags) stay uncompressed so secrets never share a compression
+context with attacker-influenced data (BREACH).
+"""
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Compression runs once per data version, but on the request that first
+# asks for it. gzip 9 and brotli 11 cost several times the CPU of these
+# levels (brotli 11 takes seconds on a multi-MB coin list) for a few percent
+# smaller output; see benchmarks/compression.py.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_QUALITY = re.compile(r';\s*q\s*=\s*([0-9.]+)')
+
+
+def available_encodings():
+    """
+    Supported content codings, most preferred first
+    """
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the bytes identical across workers
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f'Unsupported content coding: {encoding}')
+
+
+def accepted_encoding(request):
+    """
+    Best supported coding allowed by the request's Accept-Encoding, or None
+    for identity. Quality values are honoured; ties go to the smaller output.
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not header:
+        return None
+
+    qualities = {}
+    for part in header.split(','):
+        name = part.split(';', 1)[0].strip().lower()
+        if not name:
+            continue
+        match = _QUALITY.search(part)
+        try:
+            qualities[name] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            qualities[name] = 0.0
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encode_snapshot(request, snapshot):
+    """
+    `(body, encoding)` to send for a snapshot; encoding is None for identity
+    """
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return snapshot.body, None
+    return snapshot.encoded(encoding), encoding
+
+
+async def aencode_snapshot(request, snapshot):
+    """
+    `encode_snapshot` for async views; compressing never blocks the event loop
+    """
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return snapshot.body, None
+    return await snapshot.aencoded(encoding), encoding
@@ -0,0 +1,57 @@
+"""
+Conditional GET helpers (ETag / Last-Modified) for coin read endpoints.
+
+Validators are derived from the coin data version (or a coin's `updated_at`)
+so a matching `If-None-Match` / `If-Modified-Since` is answered with 304
+before any rows are fetched or serialized.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .compression import accepted_encoding
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the values that determine a response body
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Attach ETag and Last-Modified headers to a response. The ETag is made
+    weak for a compressed body, which is a different representation of the
+    same content (as GZipMiddleware does).
+    """
+    if response.has_header('Content-Encoding') and not etag.startswith('W/'):
+        etag = 'W/' + etag
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def check_not_modified(request, etag, last_modified=None, compressed=False, vary=()):
+    """
+    Return a 304 (or 412) response when the request's preconditions match
+    the given validators, otherwise None.
+
+    The 304 carries the headers of the 200 it stands in for: pass
+    `compressed` when that 200 is a precompressed snapshot (weak ETag when
+    the request accepts a coding, Vary: Accept-Encoding) and any other
+    request headers it varies on in `vary`.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        if compressed:
+            vary = ('Accept-Encoding', *vary)
+            if accepted_encoding(request) is not None and not etag.startswith('W/'):
+                etag = 'W/' + etag
+        if vary:
+            patch_vary_headers(response, vary)
+        set_validators(response, etag, last_modified)
+    return response
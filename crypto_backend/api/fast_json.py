@@ -0,0 +1,148 @@
+"""
+Fast-path serialization for flat ModelSerializers.
+
+DRF serializes each row by instantiating model objects and walking every
+field's `to_representation`. For read-only list payloads of flat columns we
+can instead fetch `.values_list()` tuples and run a row encoder compiled once
+per serializer class. The output is identical to
+`JSONRenderer().render(Serializer(queryset, many=True).data)`.
+
+orjson is used for the final dump when it is installed and the payload has
+no float values (float formatting differs slightly from the stdlib).
+"""
+import json
+from decimal import Decimal, getcontext
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# Serializer fields whose representation of a non-null DB value is the value itself
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+
+def _decimal_converter(field):
+    """
+    Precompiled equivalent of DecimalField.to_representation for Decimal input
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+
+    quantum = Decimal('.1') ** field.decimal_places
+    context = getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return '{:f}'.format(value.quantize(quantum, rounding=rounding, context=context))
+
+    return convert
+
+
+def _converter_for(field):
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, IDENTITY_FIELDS):
+        return None
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return None
+    return field.to_representation
+
+
+class RowEncoder:
+    """
+    Converts `values_list(*encoder.columns)` tuples into the dicts the
+    serializer would produce
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        model = serializer_class.Meta.model
+
+        self.names = []
+        self.columns = []
+        self.converters = []
+        self.has_floats = False
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ValueError(
+                    f'{serializer_class.__name__}.{name} is not a plain model column'
+                )
+            model_field = model._meta.get_field(field.source)
+            self.names.append(name)
+            self.columns.append(model_field.attname)
+            self.converters.append(_converter_for(field))
+            if isinstance(field, (serializers.JSONField, serializers.FloatField)):
+                self.has_floats = True
+
+        self._pairs = list(zip(self.names, self.converters))
+
+    def encode(self, row):
+        return {
+            name: value if convert is None or value is None else convert(value)
+            for (name, convert), value in zip(self._pairs, row)
+        }
+
+    def encode_queryset(self, queryset):
+        return [self.encode(row) for row in queryset.values_list(*self.columns)]
+
+    async def aencode_queryset(self, queryset):
+        return [self.encode(row) async for row in queryset.values_list(*self.columns)]
+
+
+_encoders = {}
+
+
+def get_row_encoder(serializer_class):
+    """
+    Return the cached RowEncoder for a serializer class
+    """
+    encoder = _encoders.get(serializer_class)
+    if encoder is None:
+        encoder = _encoders[serializer_class] = RowEncoder(serializer_class)
+    return encoder
+
+
+def dumps(data, has_floats=True):
+    """
+    Dump already-serialized data to the same bytes as DRF's JSONRenderer
+    """
+    if orjson is not None and not has_floats:
+        body = orjson.dumps(data)
+        return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return body.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+def render_list(serializer_class, queryset):
+    """
+    Render a queryset as the `{"data": [...], "count": n}` body used by the
+    list endpoints. Returns `(body, count)`.
+    """
+    encoder = get_row_encoder(serializer_class)
+    return render_rows(serializer_class, encoder.encode_queryset(queryset))
+
+
+def render_rows(serializer_class, rows):
+    """
+    Render rows already encoded for `serializer_class` (possibly with extra
+    keys) as the list body. Returns `(body, count)`.
+    """
+    encoder = get_row_encoder(serializer_class)
+    body = dumps({'data': rows, 'count': len(rows)}, has_floats=encoder.has_floats)
+    return body, len(rows)
@@ -0,0 +1,21 @@
+"""
+Password hasher with a configurable work factor.
+
+Hashing dominates the cost of a login. PASSWORD_HASH_ITERATIONS sets the
+PBKDF2 iteration count (Django's default when 0); stored hashes made with a
+different count are re-hashed with the current one on the user's next
+successful login, so the cost can be raised or lowered without a migration.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+
+
+class PBKDF2PasswordHasher(DjangoPBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with PASSWORD_HASH_ITERATIONS iterations. Uses the same
+    algorithm name, so existing pbkdf2_sha256 hashes keep verifying.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or DjangoPBKDF2PasswordHasher.iterations
@@ -0,0 +1,350 @@
+"""
+Bulk ingest of CoinGecko `/coins/markets` payloads into the coins table.
+
+The whole batch is written with a single multi-row
+`INSERT ... ON CONFLICT (id) DO UPDATE` instead of one round-trip per coin.
+Only coins whose market data changed since the last run are written: each
+coin's content hash is compared with the stored one in a single read, so
+unchanged rows keep their `updated_at` and downstream caches stay warm.
+
+This is the only writer of market data: the scheduled Lambda posts its
+payload to POST /api/internal/ingest/ (see views/ingest_views.py). Changed
+rows carry the CoinDataVersion bumped in the same transaction, so readers
+keyed on it never see half a batch.
+"""
+import hashlib
+import json
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import requests
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Coin, CoinDataVersion
+from .orders import match_orders
+from .portfolio import refresh_portfolio_values
+from .price_history import record_price_ticks
+from .price_stream import notify_prices_changed
+from .snapshots import snapshot_cache
+
+COINGECKO_MARKETS_URL = 'https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd'
+
+# Columns rewritten when a coin already exists (created_at is kept)
+UPDATE_FIELDS = [
+    'symbol', 'name', 'image', 'current_price', 'high_24h', 'low_24h',
+    'price_change_24h', 'price_change_percentage_24h', 'market_cap',
+    'market_cap_rank', 'market_cap_change_24h', 'market_cap_change_percentage_24h',
+    'fully_diluted_valuation', 'total_volume', 'circulating_supply',
+    'total_supply', 'max_supply', 'ath', 'ath_change_percentage', 'ath_date',
+    'atl', 'atl_change_percentage', 'atl_date', 'roi', 'last_updated',
+    'updated_at', 'content_hash', 'data_version',
+]
+
+# Columns covered by the content hash
+HASHED_FIELDS = [
+    field for field in UPDATE_FIELDS if field not in ('updated_at', 'content_hash', 'data_version')
+]
+
+DECIMAL_FIELDS = (
+    'current_price', 'high_24h', 'low_24h', 'price_change_24h',
+    'price_change_percentage_24h', 'market_cap_change_percentage_24h',
+    'circulating_supply', 'total_supply', 'max_supply', 'ath',
+    'ath_change_percentage', 'atl', 'atl_change_percentage',
+)
+
+# CoinGecko sends these as floats; the columns are bigint
+INTEGER_FIELDS = (
+    'market_cap', 'market_cap_change_24h', 'fully_diluted_valuation', 'total_volume',
+)
+
+DATETIME_FIELDS = ('ath_date', 'atl_date', 'last_updated')
+
+
+class IngestResult:
+    """
+    Counts and timings for one ingest run
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.skipped = 0
+        self.upserted = 0
+        self.unchanged = 0
+        self.ticks = 0
+        self.orders_filled = 0
+        self.orders_rejected = 0
+        self.portfolios = 0
+        self.statements = 0
+        self.timings = {}
+
+    def as_dict(self):
+        return {
+            'received': self.received,
+            'skipped': self.skipped,
+            'upserted': self.upserted,
+            'unchanged': self.unchanged,
+            'ticks': self.ticks,
+            'orders_filled': self.orders_filled,
+            'orders_rejected': self.orders_rejected,
+            'portfolios': self.portfolios,
+            'statements': self.statements,
+            'timings': dict(self.timings),
+        }
+
+
+def load_payload_from_file(path):
+    """
+    Read a saved `/coins/markets` response from disk
+    """
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def fetch_markets_payload(url=COINGECKO_MARKETS_URL, timeout=30):
+    """
+    Fetch the `/coins/markets` response from CoinGecko
+    """
+    response = requests.get(
+        url,
+        headers={
+            'Accept': 'application/json',
+            'User-Agent': 'Crypto-Tracker-Ingest/1.0',
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+# Errors raised by parse_coin for an entry that cannot be stored
+MALFORMED_ENTRY_ERRORS = (AttributeError, TypeError, ValueError, ArithmeticError)
+
+BIGINT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+INTEGER_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+
+def _check_range(name, value, bounds):
+    if not bounds[0] <= value <= bounds[1]:
+        raise ValueError(f'{name} out of range: {value}')
+    return value
+
+
+def _to_decimal(value, name):
+    if value is None:
+        return None
+    # str() keeps the shortest repr of the float instead of its binary expansion
+    number = Decimal(str(value))
+    # Extra decimal places are rounded by the column; extra whole digits fail
+    field = Coin._meta.get_field(name)
+    if not number.is_finite() or number.adjusted() >= field.max_digits - field.decimal_places:
+        raise ValueError(f'{name} out of range: {value!r}')
+    return number
+
+
+def _to_integer(value, name):
+    if not value:
+        return None
+    number = int(Decimal(str(value)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return _check_range(name, number, BIGINT_RANGE)
+
+
+def _to_rank(value):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f'market_cap_rank is not an integer: {value!r}')
+    return _check_range('market_cap_rank', value, INTEGER_RANGE)
+
+
+def _to_text(value, name):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise TypeError(f'{name} is not a string: {value!r}')
+    max_length = Coin._meta.get_field(name).max_length
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{name} longer than {max_length} characters')
+    return value
+
+
+def _to_datetime(value):
+    if not value:
+        return None
+    return parse_datetime(value)
+
+
+def parse_coin(entry, now):
+    """
+    Build an unsaved Coin from one payload entry, or None when the entry is
+    missing the fields the table requires. Raises one of
+    MALFORMED_ENTRY_ERRORS when a value cannot be stored (not a number, out
+    of range, too long).
+    """
+    coin_id = _to_text(entry.get('id'), 'id')
+    last_updated = _to_datetime(entry.get('last_updated'))
+    if not coin_id or last_updated is None:
+        return None
+
+    values = {
+        'id': coin_id,
+        'symbol': _to_text(entry.get('symbol'), 'symbol') or '',
+        'name': _to_text(entry.get('name'), 'name') or '',
+        'image': _to_text(entry.get('image'), 'image'),
+        'market_cap_rank': _to_rank(entry.get('market_cap_rank')),
+        'roi': entry.get('roi'),
+        'created_at': now,
+        'updated_at': now,
+    }
+    for field in DECIMAL_FIELDS:
+        values[field] = _to_decimal(entry.get(field), field)
+    for field in INTEGER_FIELDS:
+        values[field] = _to_integer(entry.get(field), field)
+    for field in DATETIME_FIELDS:
+        values[field] = _to_datetime(entry.get(field))
+    values['last_updated'] = last_updated
+
+    return Coin(**values)
+
+
+def _hash_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, separators=(',', ':'))
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def content_hash(coin):
+    """
+    Digest of the market data columns of a parsed Coin
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for field in HASHED_FIELDS:
+        digest.update(_hash_value(getattr(coin, field)).encode())
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def changed_coins(coins):
+    """
+    Split parsed coins into `(changed, unchanged_count)` by comparing their
+    content hash with the stored one, in one query. New coins count as
+    changed.
+    """
+    stored = dict(
+        Coin.objects.filter(id__in=[coin.id for coin in coins]).values_list('id', 'content_hash')
+    )
+    changed = []
+    for coin in coins:
+        coin.content_hash = content_hash(coin)
+        if stored.get(coin.id) != coin.content_hash:
+            changed.append(coin)
+    return changed, len(coins) - len(changed)
+
+
+def parse_markets_payload(payload, now=None):
+    """
+    Convert a `/coins/markets` payload into unsaved Coin instances.
+
+    Returns `(coins, skipped)`. Entries that are incomplete or malformed are
+    skipped and counted, so one bad entry doesn't fail the batch. Duplicate
+    ids keep the last entry so the upsert never touches the same row twice
+    in one statement.
+    """
+    now = now or timezone.now()
+    coins = {}
+    skipped = 0
+    for entry in payload:
+        try:
+            coin = parse_coin(entry, now)
+        except MALFORMED_ENTRY_ERRORS:
+            coin = None
+        if coin is None:
+            skipped += 1
+            continue
+        coins[coin.id] = coin
+    return list(coins.values()), skipped
+
+
+def upsert_coins(coins, batch_size=None):
+    """
+    Insert or update all coins in one statement (per batch)
+    """
+    Coin.objects.bulk_create(
+        coins,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def ingest_payload(payload, batch_size=None, force=False):
+    """
+    Parse and upsert a `/coins/markets` payload, returning an IngestResult.
+    Coins whose content hash matches the stored one are skipped unless
+    `force` is set.
+    """
+    result = IngestResult()
+    result.received = len(payload)
+
+    started = time.perf_counter()
+    coins, result.skipped = parse_markets_payload(payload)
+    result.timings['parse_ms'] = (time.perf_counter() - started) * 1000
+
+    def count_statements(execute, sql, params, many, context):
+        result.statements += 1
+        return execute(sql, params, many, context)
+
+    with transaction.atomic():
+        started = time.perf_counter()
+        if force:
+            for coin in coins:
+                coin.content_hash = content_hash(coin)
+        else:
+            coins, result.unchanged = changed_coins(coins)
+        result.timings['diff_ms'] = (time.perf_counter() - started) * 1000
+
+        if coins:
+            # Held until commit: concurrent ingests queue up here
+            version = CoinDataVersion.bump()
+            for coin in coins:
+                coin.data_version = version
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_statements):
+            if coins:
+                upsert_coins(coins, batch_size=batch_size)
+        result.timings['write_ms'] = (time.perf_counter() - started) * 1000
+        result.upserted = len(coins)
+
+        started = time.perf_counter()
+        result.ticks = record_price_ticks(coins)
+        result.timings['history_ms'] = (time.perf_counter() - started) * 1000
+
+        coin_ids = [coin.id for coin in coins]
+
+        # Fill resting limit/stop orders crossed by the new prices
+        started = time.perf_counter()
+        fills = match_orders(coin_ids)
+        result.orders_filled, result.orders_rejected = fills.filled, fills.rejected
+        result.timings['orders_ms'] = (time.perf_counter() - started) * 1000
+
+        # Re-value every portfolio holding one of the re-priced coins
+        started = time.perf_counter()
+        result.portfolios = refresh_portfolio_values(coin_ids=coin_ids)
+        result.timings['valuation_ms'] = (time.perf_counter() - started) * 1000
+
+        # Wake the live price streams once this transaction commits
+        if coins:
+            notify_prices_changed()
+
+    # Workers in this process pick up the new data immediately
+    if coins:
+        snapshot_cache.invalidate()
+
+    return result
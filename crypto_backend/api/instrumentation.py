@@ -0,0 +1,227 @@
+"""
+Opt-in per-request instrumentation for the API.
+
+`RequestTimingMiddleware` (enabled with `API_TIMING_ENABLED`) measures for
+each request:
+
+- the number of SQL statements and the time spent executing them
+- the time spent in DRF serializers (`.data`) and fast-path row encoders
+- the time spent rendering the response body
+
+and sends them as a `Server-Timing` header. Measurements are also
+aggregated per URL name into latency histograms kept in the worker process
+(`request_stats`), which admins can read at `GET /api/admin/stats/`.
+
+Serializer time includes queries run while serializing (lazy querysets), so
+it overlaps with the db figure.
+"""
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+from .fast_json import RowEncoder
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current = ContextVar('api_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Measurements for one request
+    """
+
+    __slots__ = ('queries', 'db_ms', 'serializer_ms', 'render_ms', 'total_ms',
+                 '_serializing', '_render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+        self._serializing = False
+        self._render_started = None
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serializer_ms:.1f}',
+            f'render;dur={self.render_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+class RequestStats:
+    """
+    Per-URL-name aggregates of RequestMetrics for this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, name, metrics):
+        with self._lock:
+            route = self._routes.get(name)
+            if route is None:
+                route = self._routes[name] = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'db_ms': 0.0,
+                    'serializer_ms': 0.0,
+                    'render_ms': 0.0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            route['count'] += 1
+            route['total_ms'] += metrics.total_ms
+            route['max_ms'] = max(route['max_ms'], metrics.total_ms)
+            route['db_ms'] += metrics.db_ms
+            route['serializer_ms'] += metrics.serializer_ms
+            route['render_ms'] += metrics.render_ms
+            route['queries'] += metrics.queries
+            route['max_queries'] = max(route['max_queries'], metrics.queries)
+            bucket = len(LATENCY_BUCKETS_MS)
+            for index, bound in enumerate(LATENCY_BUCKETS_MS):
+                if metrics.total_ms <= bound:
+                    bucket = index
+                    break
+            route['histogram'][bucket] += 1
+
+    def snapshot(self):
+        """
+        Averages and histogram per URL name, busiest first
+        """
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS]
+        labels.append(f'>{LATENCY_BUCKETS_MS[-1]}ms')
+        with self._lock:
+            routes = {name: dict(route) for name, route in self._routes.items()}
+
+        result = {}
+        for name, route in sorted(routes.items(), key=lambda item: -item[1]['count']):
+            count = route['count']
+            result[name] = {
+                'count': count,
+                'avg_ms': round(route['total_ms'] / count, 2),
+                'max_ms': round(route['max_ms'], 2),
+                'avg_db_ms': round(route['db_ms'] / count, 2),
+                'avg_serializer_ms': round(route['serializer_ms'] / count, 2),
+                'avg_render_ms': round(route['render_ms'] / count, 2),
+                'avg_queries': round(route['queries'] / count, 2),
+                'max_queries': route['max_queries'],
+                'histogram': dict(zip(labels, route['histogram'])),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+request_stats = RequestStats()
+
+
+def _timed_serialization(func):
+    """
+    Wrap a serialization entry point so its time is added to the current
+    request's serializer_ms (outermost call only)
+    """
+
+    def wrapper(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics._serializing:
+            return func(*args, **kwargs)
+        metrics._serializing = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.serializer_ms += (time.perf_counter() - started) * 1000
+            metrics._serializing = False
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+_installed = False
+
+
+def install_serializer_timing():
+    """
+    Patch DRF serializers and RowEncoder to report serialization time.
+    Outside an instrumented request the wrappers only add a ContextVar read.
+    """
+    global _installed
+    if _installed:
+        return
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = property(_timed_serialization(cls.data.fget))
+    RowEncoder.encode_queryset = _timed_serialization(RowEncoder.encode_queryset)
+    _installed = True
+
+
+class RequestTimingMiddleware:
+    """
+    Adds Server-Timing headers and records per-URL-name stats.
+    Removed from the stack unless `API_TIMING_ENABLED` is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                metrics.queries += 1
+                metrics.db_ms += (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(count_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+
+        response['Server-Timing'] = metrics.server_timing()
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.url_name:
+            request_stats.record(match.url_name, metrics)
+
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Time the DRF render step that follows this hook
+        """
+        metrics = _current.get()
+        if metrics is not None:
+            metrics._render_started = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_ms += (time.perf_counter() - metrics._render_started) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
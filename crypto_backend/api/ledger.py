@@ -0,0 +1,128 @@
+"""
+In-memory trade ledger over locked BankBalance and Wallet rows.
+
+Used where many fills are applied together (the order engine, batch
+trades): the rows are locked and read once, each fill is applied in memory
+with the same accounting as `trade_buy` / `trade_sell`, and `save()` writes
+everything back with bulk statements.
+"""
+from django.utils import timezone
+
+from .models import BankBalance, TradeHistory, Wallet, quantize_money
+from .portfolio import refresh_portfolio_values
+
+
+class TradeRejected(Exception):
+    """
+    A fill the locked balance or holdings cannot cover
+    """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Ledger:
+    """
+    Locks the balances of `user_ids` and their wallets for `coin_ids`.
+    Must be used inside a transaction.
+    """
+
+    def __init__(self, user_ids, coin_ids):
+        # Same lock order as the trade endpoints: BankBalance, then Wallet,
+        # each in primary key order
+        self.balances = {
+            balance.user_id: balance
+            for balance in BankBalance.objects.select_for_update()
+            .filter(user_id__in=user_ids).order_by('id')
+        }
+        self.wallets = {
+            (wallet.user_id, wallet.coin_id): wallet
+            for wallet in Wallet.objects.select_for_update()
+            .filter(user_id__in=user_ids, coin_id__in=coin_ids).order_by('id')
+        }
+        self.trades = []
+        self._touched_balances = {}
+        self._touched_wallets = {}
+
+    def balance_of(self, user_id):
+        balance = self.balances.get(user_id)
+        return balance.cash_balance if balance is not None else None
+
+    def fill(self, user_id, coin_id, side, quantity, price):
+        """
+        Apply one BUY/SELL at `price`, returning the unsaved TradeHistory.
+        Raises TradeRejected and leaves the ledger unchanged when the
+        balance or wallet does not cover it.
+        """
+        balance = self.balances.get(user_id)
+        if balance is None:
+            raise TradeRejected('銀行残高が見つかりません')
+
+        key = (user_id, coin_id)
+        wallet = self.wallets.get(key)
+        amount = quantize_money(quantity * price)
+        balance_before = balance.cash_balance
+
+        if side == 'BUY':
+            if balance.cash_balance < amount:
+                raise TradeRejected('残高が不足しています')
+            balance.cash_balance -= amount
+            if wallet is None:
+                wallet = self.wallets[key] = Wallet(user_id=user_id, coin_id=coin_id, quantity=0)
+            wallet.quantity += quantity
+        else:
+            if wallet is None or wallet.quantity == 0:
+                raise TradeRejected('このコインを保有していません')
+            if wallet.quantity < quantity:
+                raise TradeRejected('保有数量が不足しています')
+            balance.cash_balance += amount
+            wallet.quantity -= quantity
+
+        self._touched_balances[user_id] = balance
+        self._touched_wallets[key] = wallet
+        trade = TradeHistory(
+            user_id=user_id,
+            coin_id=coin_id,
+            trade_type=side,
+            trade_quantity=quantity,
+            trade_price_per_coin=price,
+            balance_before_trade=balance_before,
+            balance_after_trade=balance.cash_balance,
+        )
+        self.trades.append(trade)
+        return trade
+
+    def save(self):
+        """
+        Write all fills back and refresh the affected portfolio valuations.
+        Returns the saved TradeHistory rows in fill order.
+        """
+        if not self.trades:
+            return []
+
+        now = timezone.now()
+        trades = TradeHistory.objects.bulk_create(self.trades)
+
+        for balance in self._touched_balances.values():
+            balance.last_updated_at = now
+        BankBalance.objects.bulk_update(
+            self._touched_balances.values(), ['cash_balance', 'last_updated_at']
+        )
+
+        created, updated, emptied = [], [], []
+        for wallet in self._touched_wallets.values():
+            wallet.last_updated_at = now
+            if wallet.quantity == 0:
+                if wallet.pk is not None:
+                    emptied.append(wallet.pk)
+            elif wallet.pk is None:
+                created.append(wallet)
+            else:
+                updated.append(wallet)
+        Wallet.objects.bulk_create(created)
+        Wallet.objects.bulk_update(updated, ['quantity', 'last_updated_at'])
+        Wallet.objects.filter(pk__in=emptied).delete()
+
+        refresh_portfolio_values(user_ids=list(self._touched_balances))
+        return trades
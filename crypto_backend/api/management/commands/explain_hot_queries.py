@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...query_audit import explain_hot_queries
+
+
+class Command(BaseCommand):
+    """
+    EXPLAIN the API's hot queries and flag sequential scans
+
+    Usage:
+        python manage.py explain_hot_queries
+        python manage.py explain_hot_queries --analyze --verbose
+        python manage.py explain_hot_queries --fail-on-seq-scan  # for CI
+    """
+
+    help = 'Run EXPLAIN on the querysets behind hot endpoints and flag sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only; executes the queries)',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Do not flag seq scans of tables with fewer rows (default: 1000)',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Print every plan, not only flagged ones',
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan',
+            action='store_true',
+            help='Exit with an error when any query is flagged',
+        )
+
+    def handle(self, *args, **options):
+        if options['analyze'] and connection.vendor != 'postgresql':
+            self.stderr.write(f'--analyze is ignored on {connection.vendor}')
+
+        reports = explain_hot_queries(
+            analyze=options['analyze'], min_rows=options['min_rows']
+        )
+
+        flagged = 0
+        for report in reports:
+            if report.flagged:
+                flagged += 1
+                status = self.style.ERROR('SEQ SCAN')
+            elif report.full_scan:
+                status = 'full scan (expected)'
+            else:
+                status = self.style.SUCCESS('ok')
+
+            detail = ''
+            if report.seq_scans and not report.full_scan:
+                detail = f" (seq scan: {', '.join(report.seq_scans)}"
+                if report.small_tables:
+                    detail += f"; under {options['min_rows']} rows: {', '.join(report.small_tables)}"
+                detail += ')'
+            self.stdout.write(f'{report.name}: {status}{detail}')
+
+            if options['verbose'] or report.flagged:
+                for line in report.plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        summary = f'{len(reports)} queries checked on {connection.vendor}, {flagged} flagged'
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(summary)
+        self.stdout.write(summary)
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...ingest import (
+    COINGECKO_MARKETS_URL,
+    fetch_markets_payload,
+    ingest_payload,
+    load_payload_from_file,
+)
+
+
+class Command(BaseCommand):
+    """
+    Upsert CoinGecko market data into the coins table in bulk
+
+    Usage:
+        python manage.py ingest_coins
+        python manage.py ingest_coins --from-file ../lambda/api-response-sample.json
+        python manage.py ingest_coins --force  # rewrite unchanged coins too
+    """
+
+    help = 'Fetch CoinGecko /coins/markets data and upsert it into the coins table in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-file',
+            dest='from_file',
+            help='Read the markets payload from a JSON file instead of calling CoinGecko',
+        )
+        parser.add_argument(
+            '--url',
+            default=COINGECKO_MARKETS_URL,
+            help='CoinGecko markets URL to fetch when --from-file is not given',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per INSERT statement (default: whole batch in one statement)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rewrite every coin, even when its market data is unchanged',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['from_file']:
+                payload = load_payload_from_file(options['from_file'])
+            else:
+                payload = fetch_markets_payload(options['url'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not load markets payload: {e}')
+        except Exception as e:
+            raise CommandError(f'Could not fetch markets payload: {e}')
+
+        if not isinstance(payload, list):
+            raise CommandError('Markets payload must be a JSON array of coins')
+
+        result = ingest_payload(
+            payload, batch_size=options['batch_size'], force=options['force']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Upserted {result.upserted} changed coins ({result.unchanged} unchanged, '
+            f'{result.skipped} skipped, {result.statements} SQL statements), '
+            f'{result.ticks} new price ticks, {result.orders_filled} orders filled '
+            f'({result.orders_rejected} rejected), {result.portfolios} portfolios revalued'
+        ))
+        for name, value in result.timings.items():
+            self.stdout.write(f'  {name}: {value:.1f}')
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_user_managers_alter_user_date_joined_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('price', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_ticks', to='api.coin')),
+            ],
+            options={
+                'db_table': 'price_ticks',
+                'unique_together': {('coin', 'timestamp')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyPriceRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('high', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('low', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('close', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField()),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_rollups', to='api.coin')),
+            ],
+            options={
+                'db_table': 'price_rollups_1h',
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'unique_together': {('coin', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPriceRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('high', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('low', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('close', models.DecimalField(decimal_places=50, max_digits=1000)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField()),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='api.coin')),
+            ],
+            options={
+                'db_table': 'price_rollups_1d',
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'unique_together': {('coin', 'bucket_start')},
+            },
+        ),
+    ]
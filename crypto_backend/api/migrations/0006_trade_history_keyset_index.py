@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_price_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradehistory',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='trade_hist_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+# Prefix search on lower(name)/lower(symbol). text_pattern_ops lets LIKE 'abc%'
+# use the index regardless of the database collation; PostgreSQL only.
+SEARCH_INDEXES = {
+    'coins_name_prefix_idx': 'lower(name) text_pattern_ops',
+    'coins_symbol_prefix_idx': 'lower(symbol) text_pattern_ops',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, expression in SEARCH_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON coins ({expression})')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_trade_history_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['market_cap_rank', 'id'], name='coins_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['market_cap', 'id'], name='coins_market_cap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['current_price', 'id'], name='coins_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['price_change_percentage_24h', 'id'], name='coins_change_24h_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,172 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:31
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def check_values_fit(apps, schema_editor):
+    """
+    Refuse to migrate if any stored value would overflow its new precision.
+    Fractional digits beyond the new scale are rounded by the column cast.
+    """
+    overflows = []
+    for operation in Migration.operations:
+        if not isinstance(operation, migrations.AlterField):
+            continue
+        field = operation.field
+        limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+        model = apps.get_model('api', operation.model_name)
+        bounds = model.objects.aggregate(
+            max_value=Max(operation.name), min_value=Min(operation.name)
+        )
+        extremes = [abs(value) for value in bounds.values() if value is not None]
+        if extremes and max(extremes) >= limit:
+            overflows.append(f'{model._meta.db_table}.{operation.name} ({max(extremes)})')
+    if overflows:
+        raise ValueError(
+            'Values exceed the new numeric precision: ' + ', '.join(overflows)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_coin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bankbalance',
+            name='cash_balance',
+            field=models.DecimalField(blank=True, decimal_places=8, default=Decimal('500000'), max_digits=28),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='ath',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='ath_change_percentage',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=28, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='atl',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='atl_change_percentage',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=28, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='circulating_supply',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='high_24h',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='low_24h',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='market_cap_change_percentage_24h',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=28, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='max_supply',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='price_change_24h',
+            field=models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='price_change_percentage_24h',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=28, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='total_supply',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=38, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailypricerollup',
+            name='close',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='dailypricerollup',
+            name='high',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='dailypricerollup',
+            name='low',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='dailypricerollup',
+            name='open',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='hourlypricerollup',
+            name='close',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='hourlypricerollup',
+            name='high',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='hourlypricerollup',
+            name='low',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='hourlypricerollup',
+            name='open',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='pricetick',
+            name='price',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+        migrations.AlterField(
+            model_name='tradehistory',
+            name='balance_after_trade',
+            field=models.DecimalField(decimal_places=8, max_digits=28),
+        ),
+        migrations.AlterField(
+            model_name='tradehistory',
+            name='balance_before_trade',
+            field=models.DecimalField(decimal_places=8, max_digits=28),
+        ),
+        migrations.AlterField(
+            model_name='tradehistory',
+            name='trade_price_per_coin',
+            field=models.DecimalField(decimal_places=18, max_digits=38),
+        ),
+    ]
+
+    # Run the overflow check before any column is altered
+    operations.insert(0, migrations.RunPython(check_values_fit, migrations.RunPython.noop))
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:37
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_valuations(apps, schema_editor):
+    """
+    Create a valuation row for every existing user from their wallets
+    """
+    User = apps.get_model('api', 'User')
+    Wallet = apps.get_model('api', 'Wallet')
+    PortfolioValuation = apps.get_model('api', 'PortfolioValuation')
+
+    PortfolioValuation.objects.bulk_create(
+        [PortfolioValuation(user_id=user_id) for user_id in User.objects.values_list('id', flat=True)],
+        batch_size=1000,
+    )
+
+    holdings = Wallet.objects.filter(user_id=OuterRef('user_id')).order_by().values('user_id')
+    PortfolioValuation.objects.update(
+        total_value=Coalesce(
+            Subquery(holdings.annotate(value=Sum(F('quantity') * F('coin__current_price'))).values('value')),
+            Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=28, decimal_places=8),
+        ),
+        holdings_count=Coalesce(
+            Subquery(holdings.annotate(holdings=Count('id')).values('holdings')),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_numeric_precision_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioValuation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='portfolio_valuation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_value', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=28)),
+                ('holdings_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'portfolio_valuation',
+            },
+        ),
+        migrations.RunPython(backfill_valuations, migrations.RunPython.noop),
+    ]
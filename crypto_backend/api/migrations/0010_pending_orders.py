@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_portfolio_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingOrder',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('side', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell')], max_length=4)),
+                ('order_type', models.CharField(choices=[('LIMIT', 'Limit'), ('STOP', 'Stop')], max_length=5)),
+                ('trigger_price', models.DecimalField(decimal_places=18, max_digits=38)),
+                ('quantity', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('FILLED', 'Filled'), ('CANCELLED', 'Cancelled'), ('REJECTED', 'Rejected')], default='OPEN', max_length=9)),
+                ('reject_reason', models.CharField(blank=True, default='', max_length=100)),
+                ('fill_price', models.DecimalField(blank=True, decimal_places=18, max_digits=38, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_orders', to='api.coin')),
+                ('trade', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pending_order', to='api.tradehistory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'pending_orders',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'OPEN')), fields=['coin', 'side', 'order_type', 'trigger_price'], name='pending_orders_trigger_idx'), models.Index(fields=['user', '-created_at', '-id'], name='pending_orders_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_pending_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coin',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
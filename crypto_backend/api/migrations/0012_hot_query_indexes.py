@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_coin_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['user', '-created_at'], name='bookmarks_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['updated_at'], name='coins_updated_idx'),
+        ),
+    ]
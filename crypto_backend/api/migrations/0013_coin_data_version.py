@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:27
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    apps.get_model('api', 'CoinDataVersion').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinDataVersion',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'coin_data_version',
+            },
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='data_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['data_version'], name='coins_data_version_idx'),
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
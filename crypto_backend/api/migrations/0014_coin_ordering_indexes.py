@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_coin_data_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['price_change_24h', 'id'], name='coins_change_abs_24h_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['total_volume', 'id'], name='coins_volume_idx'),
+        ),
+    ]
@@ -1,5 +1,53 @@
+from decimal import Context, Decimal, ROUND_HALF_UP
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+
+# Numeric column policy: (max_digits, decimal_places) per kind of value.
+# Bounded precision keeps numeric values, index entries and serialized
+# strings small while covering CoinGecko's range (sub-satoshi prices,
+# supplies in the 10^18 range, percentages in the millions).
+PRICE_DIGITS = (38, 18)  # prices, price changes, ATH/ATL
+PERCENT_DIGITS = (28, 8)  # *_percentage fields
+SUPPLY_DIGITS = (38, 8)  # circulating/total/max supply
+MONEY_DIGITS = (28, 8)  # cash balances and trade amounts
+
+# Cash amounts are stored with MONEY_DIGITS scale; quantize before saving
+MONEY_QUANTUM = Decimal(1).scaleb(-MONEY_DIGITS[1])
+_MONEY_CONTEXT = Context(prec=MONEY_DIGITS[0] + PRICE_DIGITS[0])
+
+
+def quantize_money(value):
+    """
+    Round a cash amount (e.g. quantity * price) to the MONEY_DIGITS scale
+    """
+    return value.quantize(MONEY_QUANTUM, rounding=ROUND_HALF_UP, context=_MONEY_CONTEXT)
+
+
+def price_field(**kwargs):
+    return models.DecimalField(
+        max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1], **kwargs
+    )
+
+
+def percent_field(**kwargs):
+    return models.DecimalField(
+        max_digits=PERCENT_DIGITS[0], decimal_places=PERCENT_DIGITS[1], **kwargs
+    )
+
+
+def supply_field(**kwargs):
+    return models.DecimalField(
+        max_digits=SUPPLY_DIGITS[0], decimal_places=SUPPLY_DIGITS[1], **kwargs
+    )
+
+
+def money_field(**kwargs):
+    return models.DecimalField(
+        max_digits=MONEY_DIGITS[0], decimal_places=MONEY_DIGITS[1], **kwargs
+    )
 
 
 class UserManager(BaseUserManager):
@@ -83,15 +131,40 @@ class BankBalance(models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="bank_balance"
     )
-    cash_balance = models.DecimalField(
-        max_digits=1000, decimal_places=50, default=500000.0, blank=True
-    )
+    cash_balance = money_field(default=Decimal("500000"), blank=True)
     last_updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "bank_balance"
 
 
+class CoinDataVersion(models.Model):
+    """
+    Single-row counter bumped by every write to the coins table, inside the
+    writing transaction. The row lock it takes is held until commit, so
+    concurrent writers are serialized and versions become visible in
+    increasing order: readers can key caches and change feeds on it.
+    """
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "coin_data_version"
+
+    @classmethod
+    def bump(cls):
+        """
+        Return the next version. Call inside the transaction that writes
+        the coins.
+        """
+        if not cls.objects.filter(pk=1).update(version=F("version") + 1):
+            # First write on a database created without migrations
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(version=F("version") + 1)
+        return cls.objects.values_list("version", flat=True).get(pk=1)
+
+
 class Coin(models.Model):
     """
     Model representing cryptocurrency data with all market information
@@ -106,57 +179,35 @@ class Coin(models.Model):
     image = models.TextField(blank=True, null=True)  # URL to coin image/logo
 
     # Price information
-    current_price = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    high_24h = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    low_24h = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    price_change_24h = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    price_change_percentage_24h = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
+    current_price = price_field(null=True, blank=True)
+    high_24h = price_field(null=True, blank=True)
+    low_24h = price_field(null=True, blank=True)
+    price_change_24h = price_field(null=True, blank=True)
+    price_change_percentage_24h = percent_field(null=True, blank=True)
 
     # Market cap information
     market_cap = models.BigIntegerField(null=True, blank=True)
     market_cap_rank = models.IntegerField(null=True, blank=True)
     market_cap_change_24h = models.BigIntegerField(null=True, blank=True)
-    market_cap_change_percentage_24h = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
+    market_cap_change_percentage_24h = percent_field(null=True, blank=True)
 
     # Valuation and volume
     fully_diluted_valuation = models.BigIntegerField(null=True, blank=True)
     total_volume = models.BigIntegerField(null=True, blank=True)
 
     # Supply information
-    circulating_supply = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    total_supply = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
-    max_supply = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
+    circulating_supply = supply_field(null=True, blank=True)
+    total_supply = supply_field(null=True, blank=True)
+    max_supply = supply_field(null=True, blank=True)
 
     # All-time high information
-    ath = models.DecimalField(max_digits=1000, decimal_places=50, null=True, blank=True)
-    ath_change_percentage = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
+    ath = price_field(null=True, blank=True)
+    ath_change_percentage = percent_field(null=True, blank=True)
     ath_date = models.DateTimeField(null=True, blank=True)
 
     # All-time low information
-    atl = models.DecimalField(max_digits=1000, decimal_places=50, null=True, blank=True)
-    atl_change_percentage = models.DecimalField(
-        max_digits=1000, decimal_places=50, null=True, blank=True
-    )
+    atl = price_field(null=True, blank=True)
+    atl_change_percentage = percent_field(null=True, blank=True)
     atl_date = models.DateTimeField(null=True, blank=True)
 
     # ROI data (can be null or complex object)
@@ -167,13 +218,45 @@ class Coin(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Hash of the market data last written by the ingester; NULL forces a rewrite
+    content_hash = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
+    # CoinDataVersion.version of the write that last changed this row
+    data_version = models.BigIntegerField(default=0, editable=False)
+
     class Meta:
         db_table = "coins"
         ordering = ["market_cap_rank"]  # Default ordering by market cap rank
+        indexes = [
+            # Sort keys for paginated coin_list (id breaks ties)
+            models.Index(fields=["market_cap_rank", "id"], name="coins_rank_idx"),
+            models.Index(fields=["market_cap", "id"], name="coins_market_cap_idx"),
+            models.Index(fields=["current_price", "id"], name="coins_price_idx"),
+            models.Index(
+                fields=["price_change_percentage_24h", "id"], name="coins_change_24h_idx"
+            ),
+            models.Index(
+                fields=["price_change_24h", "id"], name="coins_change_abs_24h_idx"
+            ),
+            models.Index(fields=["total_volume", "id"], name="coins_volume_idx"),
+            # Last-Modified (Max(updated_at))
+            models.Index(fields=["updated_at"], name="coins_updated_idx"),
+            # Data version (Max(data_version)) and live stream change reads
+            models.Index(fields=["data_version"], name="coins_data_version_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.symbol.upper()})"
 
+    def save(self, *args, **kwargs):
+        # Bulk writers (api/ingest.py) bump the version themselves
+        with transaction.atomic(using=kwargs.get("using")):
+            self.data_version = CoinDataVersion.bump()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "data_version"}
+            super().save(*args, **kwargs)
+
 
 class Wallet(models.Model):
     id = models.AutoField(primary_key=True)
@@ -201,14 +284,21 @@ class TradeHistory(models.Model):
     ]
     trade_type = models.CharField(max_length=4, choices=TRADE_TYPE_CHOICES)
     trade_quantity = models.DecimalField(max_digits=20, decimal_places=8)
-    trade_price_per_coin = models.DecimalField(max_digits=1000, decimal_places=50)
-    balance_before_trade = models.DecimalField(max_digits=1000, decimal_places=50)
-    balance_after_trade = models.DecimalField(max_digits=1000, decimal_places=50)
+    trade_price_per_coin = price_field()
+    balance_before_trade = money_field()
+    balance_after_trade = money_field()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "trade_history"
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of a user's history, newest first
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="trade_hist_user_created_idx",
+            ),
+        ]
 
 
 class Bookmark(models.Model):
@@ -236,6 +326,162 @@ class Bookmark(models.Model):
         # Ensure a user can only bookmark a coin once
         unique_together = ("user", "coin")
         ordering = ["-created_at"]  # Most recent bookmarks first
+        indexes = [
+            # user_bookmarks: a user's bookmarks, newest first
+            models.Index(fields=["user", "-created_at"], name="bookmarks_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.email} bookmarked {self.coin.name}"
+
+
+class PriceTick(models.Model):
+    """
+    Append-only price observation written by the ingester.
+    One row per coin per CoinGecko `last_updated` timestamp.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    coin = models.ForeignKey(Coin, on_delete=models.CASCADE, related_name="price_ticks")
+    timestamp = models.DateTimeField()
+    price = price_field()
+    # CoinGecko's rolling 24h volume at the time of the tick
+    volume = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = "price_ticks"
+        unique_together = ("coin", "timestamp")
+
+
+class PriceRollup(models.Model):
+    """
+    OHLC candle for one coin over one time bucket.
+    Maintained incrementally from PriceTick rows.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    bucket_start = models.DateTimeField()
+    open = price_field()
+    high = price_field()
+    low = price_field()
+    close = price_field()
+    # Latest 24h volume seen in the bucket
+    volume = models.BigIntegerField(null=True, blank=True)
+    tick_count = models.IntegerField(default=0)
+    # Timestamps of the ticks that set open/close, so late ticks merge correctly
+    opened_at = models.DateTimeField()
+    closed_at = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+        ordering = ["bucket_start"]
+
+
+class HourlyPriceRollup(PriceRollup):
+    coin = models.ForeignKey(
+        Coin, on_delete=models.CASCADE, related_name="hourly_rollups"
+    )
+
+    class Meta(PriceRollup.Meta):
+        db_table = "price_rollups_1h"
+        unique_together = ("coin", "bucket_start")
+
+
+class DailyPriceRollup(PriceRollup):
+    coin = models.ForeignKey(
+        Coin, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+
+    class Meta(PriceRollup.Meta):
+        db_table = "price_rollups_1d"
+        unique_together = ("coin", "bucket_start")
+
+
+class PortfolioValuation(models.Model):
+    """
+    Materialized market value of a user's wallets.
+
+    Refreshed with set-based UPDATEs when a trade commits and when the
+    ingester moves prices, so the portfolio totals are a single-row read.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="portfolio_valuation",
+    )
+    # Sum of quantity * current_price over the user's wallets
+    total_value = money_field(default=Decimal("0"))
+    holdings_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "portfolio_valuation"
+
+
+class PendingOrder(models.Model):
+    """
+    Resting limit or stop order, executed by the order engine when an ingest
+    moves the coin's price across `trigger_price`.
+
+    - LIMIT BUY fills at or below the trigger, LIMIT SELL at or above it
+    - STOP BUY fills at or above the trigger, STOP SELL at or below it
+    """
+
+    SIDE_CHOICES = [
+        ("BUY", "Buy"),
+        ("SELL", "Sell"),
+    ]
+    ORDER_TYPE_CHOICES = [
+        ("LIMIT", "Limit"),
+        ("STOP", "Stop"),
+    ]
+    STATUS_CHOICES = [
+        ("OPEN", "Open"),
+        ("FILLED", "Filled"),
+        ("CANCELLED", "Cancelled"),
+        ("REJECTED", "Rejected"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="pending_orders"
+    )
+    coin = models.ForeignKey(
+        Coin, on_delete=models.CASCADE, related_name="pending_orders"
+    )
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    order_type = models.CharField(max_length=5, choices=ORDER_TYPE_CHOICES)
+    # Limit price for LIMIT orders, stop price for STOP orders
+    trigger_price = price_field()
+    quantity = models.DecimalField(max_digits=20, decimal_places=8)
+    status = models.CharField(max_length=9, choices=STATUS_CHOICES, default="OPEN")
+    # Why a triggered order could not be filled (e.g. insufficient balance)
+    reject_reason = models.CharField(max_length=100, blank=True, default="")
+    fill_price = price_field(null=True, blank=True)
+    trade = models.OneToOneField(
+        TradeHistory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="pending_order",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "pending_orders"
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Trigger lookup per ingest: only resting orders are indexed
+            models.Index(
+                fields=["coin", "side", "order_type", "trigger_price"],
+                condition=models.Q(status="OPEN"),
+                name="pending_orders_trigger_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="pending_orders_user_idx",
+            ),
+        ]
@@ -0,0 +1,95 @@
+"""
+Order engine for resting limit and stop orders.
+
+After each ingest the triggered orders of the re-priced coins are found with
+one query joining `pending_orders` to `coins` (served by the partial
+(coin, side, order_type, trigger_price) index on open orders), then filled
+together: every involved BankBalance and Wallet row is locked and read once,
+the fills are applied in placement order through a `Ledger`, which writes
+them back with bulk statements.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .ledger import Ledger, TradeRejected
+from .models import PendingOrder
+
+
+def _trigger_condition():
+    price = F('coin__current_price')
+    return (
+        Q(order_type='LIMIT', side='BUY', trigger_price__gte=price)
+        | Q(order_type='LIMIT', side='SELL', trigger_price__lte=price)
+        | Q(order_type='STOP', side='BUY', trigger_price__lte=price)
+        | Q(order_type='STOP', side='SELL', trigger_price__gte=price)
+    )
+
+
+def triggered_orders(coin_ids):
+    """
+    Open orders on the given coins whose trigger the current price has crossed
+    """
+    return (
+        PendingOrder.objects.filter(
+            status='OPEN', coin_id__in=coin_ids, coin__current_price__isnull=False
+        )
+        .filter(_trigger_condition())
+        .order_by('created_at', 'id')
+    )
+
+
+class OrderFillResult:
+    """
+    Counts for one matching run
+    """
+
+    def __init__(self):
+        self.filled = 0
+        self.rejected = 0
+
+
+def match_orders(coin_ids):
+    """
+    Fill every triggered order on the given coins. Must run inside a
+    transaction. Returns an OrderFillResult.
+    """
+    result = OrderFillResult()
+
+    orders = list(
+        triggered_orders(coin_ids).select_related('coin').select_for_update(of=('self',))
+    )
+    if not orders:
+        return result
+
+    ledger = Ledger(
+        {order.user_id for order in orders}, {order.coin_id for order in orders}
+    )
+
+    now = timezone.now()
+    filled = []
+    for order in orders:
+        order.closed_at = now
+        try:
+            trade = ledger.fill(
+                order.user_id, order.coin_id, order.side, order.quantity,
+                order.coin.current_price,
+            )
+        except TradeRejected as e:
+            order.status = 'REJECTED'
+            order.reject_reason = e.message
+            continue
+        order.status = 'FILLED'
+        order.fill_price = order.coin.current_price
+        filled.append((order, trade))
+
+    for (order, _), trade in zip(filled, ledger.save()):
+        if trade.pk is not None:
+            order.trade = trade
+
+    PendingOrder.objects.bulk_update(
+        orders, ['status', 'reject_reason', 'fill_price', 'trade', 'closed_at']
+    )
+
+    result.filled = len(filled)
+    result.rejected = len(orders) - len(filled)
+    return result
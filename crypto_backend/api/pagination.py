@@ -0,0 +1,77 @@
+"""
+Opaque cursor helpers for keyset pagination.
+
+A cursor holds the sort key of the last row on a page; the next page is
+fetched with a range condition on that key instead of OFFSET, so every page
+costs the same regardless of depth.
+"""
+import base64
+import json
+
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a client sends a cursor that cannot be decoded
+    """
+
+
+def encode_cursor(values):
+    """
+    Encode a list of JSON-serializable sort key values as an opaque token
+    """
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by `encode_cursor` back into its list of values
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
+    if not isinstance(values, list):
+        raise InvalidCursor('cursor must encode a list')
+    return values
+
+
+def encode_datetime_cursor(created_at, pk):
+    """
+    Cursor for `(created_at, id)` keyed pages
+    """
+    return encode_cursor([created_at.isoformat(), pk])
+
+
+def decode_datetime_cursor(token):
+    """
+    Decode a `(created_at, id)` cursor, validating both parts
+    """
+    values = decode_cursor(token)
+    if len(values) != 2 or not isinstance(values[1], int):
+        raise InvalidCursor('unexpected cursor shape')
+    try:
+        created_at = parse_datetime(values[0]) if isinstance(values[0], str) else None
+    except ValueError as e:
+        # Well-formed but impossible dates, e.g. 2025-02-30
+        raise InvalidCursor(str(e))
+    if created_at is None or created_at.tzinfo is None:
+        raise InvalidCursor('invalid cursor timestamp')
+    return created_at, values[1]
+
+
+def before_datetime_cursor(queryset, created_at, pk):
+    """
+    Rows after a `(created_at, id)` cursor in descending order.
+
+    Written as `created_at <= c` minus the rows at `c` with `id >= pk`
+    rather than `created_at < c OR (created_at = c AND id < pk)`: the OR
+    form only seeks on the index prefix and walks every newer row, while
+    this one is a range on `created_at`.
+    """
+    return queryset.filter(created_at__lte=created_at).exclude(
+        created_at=created_at, id__gte=pk
+    )
@@ -0,0 +1,72 @@
+"""
+Materialized portfolio valuations.
+
+`PortfolioValuation.total_value` holds the sum of `quantity * current_price`
+over a user's wallets. It is recomputed inside the database with one UPDATE
+per refresh: for the trading user when a trade commits, and for every holder
+of the re-priced coins when the ingester runs.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import MONEY_DIGITS, PortfolioValuation, Wallet
+
+
+def _valuation_fields():
+    """
+    UPDATE expressions deriving a valuation row from its user's wallets
+    """
+    holdings = Wallet.objects.filter(user_id=OuterRef('user_id')).order_by().values('user_id')
+    return {
+        'total_value': Coalesce(
+            Subquery(
+                holdings.annotate(value=Sum(F('quantity') * F('coin__current_price')))
+                .values('value')
+            ),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=MONEY_DIGITS[0], decimal_places=MONEY_DIGITS[1]),
+        ),
+        'holdings_count': Coalesce(
+            Subquery(holdings.annotate(holdings=Count('id')).values('holdings')),
+            Value(0),
+        ),
+        # .update() bypasses auto_now
+        'updated_at': timezone.now(),
+    }
+
+
+def refresh_portfolio_values(user_ids=None, coin_ids=None):
+    """
+    Recompute the valuations of the given users and/or of every user holding
+    one of the given coins. Returns the number of rows updated.
+    """
+    valuations = PortfolioValuation.objects.none()
+    if user_ids is not None:
+        valuations |= PortfolioValuation.objects.filter(user_id__in=user_ids)
+    if coin_ids is not None:
+        holders = Wallet.objects.filter(coin_id__in=coin_ids).values('user_id')
+        valuations |= PortfolioValuation.objects.filter(user_id__in=Subquery(holders))
+    return valuations.update(**_valuation_fields())
+
+
+def refresh_user_portfolio(user):
+    """
+    Recompute one user's valuation, creating the row if it is missing
+    """
+    if not refresh_portfolio_values(user_ids=[user.pk]):
+        PortfolioValuation.objects.get_or_create(user=user)
+        refresh_portfolio_values(user_ids=[user.pk])
+
+
+def get_portfolio_valuation(user):
+    """
+    Return the user's valuation row, building it on first access
+    """
+    try:
+        return PortfolioValuation.objects.get(user=user)
+    except PortfolioValuation.DoesNotExist:
+        refresh_user_portfolio(user)
+        return PortfolioValuation.objects.get(user=user)
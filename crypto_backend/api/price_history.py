@@ -0,0 +1,155 @@
+"""
+Price history: append-only ticks and incrementally maintained OHLC rollups.
+
+Each ingest appends one PriceTick per coin whose `last_updated` moved, then
+folds only those new ticks into the hourly and daily rollup tables. Chart
+queries read the rollups, so their cost grows with the number of candles
+returned rather than the number of raw ticks stored.
+"""
+from datetime import timezone as dt_timezone
+
+from .models import PriceTick, HourlyPriceRollup, DailyPriceRollup
+
+
+def _truncate_hour(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _truncate_day(value):
+    return value.astimezone(dt_timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+# interval name -> (rollup model, bucket truncation)
+ROLLUP_INTERVALS = {
+    '1h': (HourlyPriceRollup, _truncate_hour),
+    '1d': (DailyPriceRollup, _truncate_day),
+}
+
+ROLLUP_UPDATE_FIELDS = [
+    'open', 'high', 'low', 'close', 'volume', 'tick_count', 'opened_at', 'closed_at',
+]
+
+
+def _new_ticks(coins):
+    """
+    Build PriceTick rows for coins with a price, dropping the ones already
+    stored for the same (coin, timestamp)
+    """
+    candidates = {
+        (coin.id, coin.last_updated): PriceTick(
+            coin_id=coin.id,
+            timestamp=coin.last_updated,
+            price=coin.current_price,
+            volume=coin.total_volume,
+        )
+        for coin in coins
+        if coin.current_price is not None and coin.last_updated is not None
+    }
+    if not candidates:
+        return []
+
+    existing = set(
+        PriceTick.objects.filter(
+            coin_id__in={coin_id for coin_id, _ in candidates},
+            timestamp__in={timestamp for _, timestamp in candidates},
+        ).values_list('coin_id', 'timestamp')
+    )
+    return [tick for key, tick in candidates.items() if key not in existing]
+
+
+def _merge_tick(rollup, tick):
+    """
+    Fold one tick into an existing rollup row in place
+    """
+    if tick.timestamp < rollup.opened_at:
+        rollup.open = tick.price
+        rollup.opened_at = tick.timestamp
+    if tick.timestamp >= rollup.closed_at:
+        rollup.close = tick.price
+        rollup.closed_at = tick.timestamp
+        rollup.volume = tick.volume
+    rollup.high = max(rollup.high, tick.price)
+    rollup.low = min(rollup.low, tick.price)
+    rollup.tick_count += 1
+
+
+def update_rollups(ticks):
+    """
+    Merge new ticks into every rollup interval.
+
+    Reads the affected buckets in one query per interval and writes them
+    back with one upsert per interval.
+    """
+    for model, truncate in ROLLUP_INTERVALS.values():
+        ticks_by_bucket = {}
+        for tick in ticks:
+            key = (tick.coin_id, truncate(tick.timestamp))
+            ticks_by_bucket.setdefault(key, []).append(tick)
+        if not ticks_by_bucket:
+            continue
+
+        # Ingests share a handful of buckets, so filter on both columns and
+        # drop the cross-product pairs in Python
+        candidates = model.objects.filter(
+            coin_id__in={coin_id for coin_id, _ in ticks_by_bucket},
+            bucket_start__in={bucket_start for _, bucket_start in ticks_by_bucket},
+        )
+        rollups = {
+            (rollup.coin_id, rollup.bucket_start): rollup
+            for rollup in candidates
+            if (rollup.coin_id, rollup.bucket_start) in ticks_by_bucket
+        }
+
+        for key, bucket_ticks in ticks_by_bucket.items():
+            rollup = rollups.get(key)
+            for tick in sorted(bucket_ticks, key=lambda t: t.timestamp):
+                if rollup is None:
+                    rollup = model(
+                        coin_id=key[0],
+                        bucket_start=key[1],
+                        open=tick.price,
+                        high=tick.price,
+                        low=tick.price,
+                        close=tick.price,
+                        volume=tick.volume,
+                        tick_count=1,
+                        opened_at=tick.timestamp,
+                        closed_at=tick.timestamp,
+                    )
+                    rollups[key] = rollup
+                else:
+                    _merge_tick(rollup, tick)
+
+        model.objects.bulk_create(
+            [rollups[key] for key in ticks_by_bucket],
+            update_conflicts=True,
+            unique_fields=['coin', 'bucket_start'],
+            update_fields=ROLLUP_UPDATE_FIELDS,
+        )
+
+
+def record_price_ticks(coins):
+    """
+    Append ticks for the given (saved or unsaved) Coin instances and update
+    the rollups. Returns the number of new ticks.
+    """
+    ticks = _new_ticks(coins)
+    if not ticks:
+        return 0
+    PriceTick.objects.bulk_create(ticks)
+    update_rollups(ticks)
+    return len(ticks)
+
+
+def get_price_history(coin_id, interval, limit):
+    """
+    Return the latest `limit` candles for a coin in ascending time order
+    """
+    model, _ = ROLLUP_INTERVALS[interval]
+    candles = list(
+        model.objects.filter(coin_id=coin_id).order_by('-bucket_start')[:limit]
+    )
+    candles.reverse()
+    return candles
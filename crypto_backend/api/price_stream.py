@@ -0,0 +1,317 @@
+"""
+Live coin price push over Server-Sent Events.
+
+Each ASGI worker process runs one `PriceHub`. The hub sleeps until the
+ingester commits (PostgreSQL `NOTIFY coin_prices`, or a poll every
+`PRICE_STREAM_POLL_SECONDS` as a fallback and on other backends), reads the
+changed coin rows once, and fans the price deltas out to every connected
+client as one pre-encoded event. Thousands of clients therefore cost one
+listener connection and one query per ingest instead of one poll each.
+
+Changes are read by `Coin.data_version`, the CoinDataVersion counter every
+coin write bumps in its transaction. Writers are serialized on that counter,
+so versions commit in order and a row can never appear later with a version
+at or below the hub's watermark (unlike `updated_at`, which one ingest
+shares across rows). Event ids are the data version of the newest write
+they include, so they agree across workers. The last `PRICE_STREAM_REPLAY_SIZE` events
+are kept so a reconnecting client (`Last-Event-ID`) resumes without a gap;
+a client too far behind gets a `reset` event and should re-fetch
+`/api/coins/list`.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+from .fast_json import dumps, get_row_encoder
+from .models import Coin
+from .serializers import CoinPriceSerializer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'coin_prices'
+
+# Yielded by PriceHub.subscribe when no event arrived within the heartbeat
+HEARTBEAT = None
+
+
+def notify_prices_changed():
+    """
+    Tell the price hubs that coin rows changed. Call inside the ingest
+    transaction: the PostgreSQL NOTIFY is only delivered on commit, and hubs
+    in this process are woken on commit too.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, ''])
+    transaction.on_commit(price_hub.wake)
+
+
+class PriceEvent:
+    """
+    One SSE message, encoded once and shared by all subscribers
+    """
+
+    __slots__ = ('id', 'payload')
+
+    def __init__(self, event_id, name, body):
+        self.id = event_id
+        self.payload = b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, name.encode(), body)
+
+
+def reset_event(event_id):
+    return PriceEvent(event_id, 'reset', b'{}')
+
+
+class PriceHub:
+    """
+    Per-process fan-out of coin price changes to SSE subscribers
+    """
+
+    def __init__(self):
+        self._encoder = get_row_encoder(CoinPriceSerializer)
+        self._subscribers = set()
+        self._events = deque()
+        # Id of the last event no longer (or never) in the replay buffer
+        self._base_id = 0
+        self._watermark = None
+        self._prices = {}
+        self._primed = False
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        Forget the buffered events and known prices (the next check re-primes)
+        """
+        with self._lock:
+            self._events.clear()
+            self._base_id = 0
+            self._watermark = None
+            self._prices = {}
+            self._primed = False
+
+    @property
+    def last_event_id(self):
+        return self._events[-1].id if self._events else self._base_id
+
+    # Reading changes
+
+    def _read_changes(self):
+        """
+        Rows written since the last check whose pushed fields changed.
+        Returns `(rows, watermark)`.
+        """
+        columns = self._encoder.columns + ['data_version']
+        # No ordering, so the data_version index can serve the range
+        queryset = Coin.objects.order_by()
+        if self._watermark is not None:
+            queryset = queryset.filter(data_version__gt=self._watermark)
+
+        watermark = self._watermark
+        changed = []
+        for values in queryset.values_list(*columns):
+            row = self._encoder.encode(values[:-1])
+            if watermark is None or values[-1] > watermark:
+                watermark = values[-1]
+            if self._prices.get(row['id']) != row:
+                self._prices[row['id']] = row
+                changed.append(row)
+        return changed, watermark
+
+    def prime(self):
+        """
+        Load the current prices without publishing them
+        """
+        with self._lock:
+            _, self._watermark = self._read_changes()
+            if self._watermark is not None:
+                self._base_id = self._watermark
+            self._primed = True
+
+    def check(self):
+        """
+        Publish the rows changed since the last check. Returns the event or
+        None when nothing changed.
+        """
+        if not self._primed:
+            self.prime()
+            return None
+        with self._lock:
+            rows, watermark = self._read_changes()
+            if watermark is None or watermark == self._watermark:
+                return None
+            self._watermark = watermark
+        if not rows:
+            return None
+        return self.publish(watermark, rows)
+
+    # Fan-out
+
+    def publish(self, event_id, rows):
+        """
+        Buffer and fan out an event. Called from the sync_to_async worker
+        thread, so delivery is handed to the hub's event loop when it runs
+        (asyncio queues are not thread-safe).
+        """
+        event = PriceEvent(event_id, 'prices', dumps(
+            {'coins': rows}, has_floats=self._encoder.has_floats
+        ))
+        loop = self._loop
+        if loop is not None and loop.is_running() and not self._on_loop(loop):
+            loop.call_soon_threadsafe(self._deliver, event)
+        else:
+            self._deliver(event)
+        return event
+
+    @staticmethod
+    def _on_loop(loop):
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _deliver(self, event):
+        # Buffer and queue together, so subscribe() sees an event either in
+        # its replay or in its queue, never both
+        self._events.append(event)
+        while len(self._events) > settings.PRICE_STREAM_REPLAY_SIZE:
+            self._base_id = self._events.popleft().id
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client this far behind re-syncs from the list endpoint
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(reset_event(event.id))
+
+    def replay(self, last_event_id):
+        """
+        Buffered events after `last_event_id`, or a single reset event when
+        some of the events it missed are no longer buffered
+        """
+        if last_event_id is None or last_event_id >= self.last_event_id:
+            return []
+        if last_event_id < self._base_id:
+            return [reset_event(self.last_event_id)]
+        return [event for event in self._events if event.id > last_event_id]
+
+    async def subscribe(self, last_event_id=None):
+        """
+        Async iterator of PriceEvents: the replay for `last_event_id`, then
+        live events. Yields HEARTBEAT after `PRICE_STREAM_HEARTBEAT_SECONDS`
+        without an event.
+        """
+        if not self._primed:
+            await sync_to_async(self.prime)()
+
+        queue = asyncio.Queue(maxsize=settings.PRICE_STREAM_QUEUE_SIZE)
+        # Register and snapshot the buffer without yielding to the loop in
+        # between, so no event is both replayed and queued (or neither)
+        self._subscribers.add(queue)
+        backlog = self.replay(last_event_id)
+        self.start()
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        queue.get(), settings.PRICE_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    # Background task
+
+    def start(self):
+        """
+        Start the watcher task on the running event loop if it is not running
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def wake(self):
+        """
+        Make the watcher check now. Safe to call from any thread.
+        """
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def stop(self):
+        for task in (self._listener, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listener = None
+
+    async def _run(self):
+        if connection.vendor == 'postgresql':
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        try:
+            while self._subscribers:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), settings.PRICE_STREAM_POLL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    await sync_to_async(self.check)()
+                except Exception:
+                    logger.exception('Price stream check failed')
+        finally:
+            if self._listener is not None:
+                self._listener.cancel()
+                self._listener = None
+
+    async def _listen(self):
+        """
+        LISTEN on a dedicated connection and wake the watcher per NOTIFY.
+        Falls back to polling alone if the connection fails.
+        """
+        import psycopg
+        from psycopg.conninfo import make_conninfo
+
+        db = connection.settings_dict
+        params = {
+            'dbname': db['NAME'], 'user': db['USER'], 'password': db['PASSWORD'],
+            'host': db['HOST'], 'port': db['PORT'],
+        }
+        conninfo = make_conninfo(**{key: value for key, value in params.items() if value})
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                await conn.execute(f'LISTEN {CHANNEL}')
+                async for _ in conn.notifies():
+                    self._wakeup.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception('Price stream LISTEN failed; polling only')
+
+
+price_hub = PriceHub()
@@ -0,0 +1,71 @@
+"""
+Sparse field selection (`?fields=`) for coin payloads.
+
+`?fields=current_price,price_change_percentage_24h` narrows a coin endpoint
+to the named CoinSerializer fields, so only those columns are selected and
+encoded. `id` is always included: it identifies the rows (bookmark flags,
+pagination cursors).
+
+A projection compiles a ModelSerializer subclass and its RowEncoder once;
+the most recently used ones are kept per process, keyed by the normalized
+field tuple, so the number of cached projections stays bounded whatever
+clients ask for.
+"""
+from functools import lru_cache
+
+from .fast_json import RowEncoder, get_row_encoder
+from .serializers import CoinSerializer
+
+FIELDS_PARAM = 'fields'
+
+# Distinct projections kept compiled per process
+PROJECTION_CACHE_SIZE = 128
+
+
+class InvalidFields(Exception):
+    """
+    `?fields=` named an unknown field; the message is the API error
+    """
+
+
+class Projection:
+    """
+    A serializer restricted to some fields, with its row encoder
+    """
+
+    def __init__(self, serializer_class, fields):
+        self.fields = fields
+        meta = type('Meta', (serializer_class.Meta,), {'fields': fields})
+        self.serializer_class = type(
+            serializer_class.__name__, (serializer_class,), {'Meta': meta}
+        )
+        self.encoder = RowEncoder(self.serializer_class)
+
+    @property
+    def columns(self):
+        return self.encoder.columns
+
+
+@lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def get_projection(serializer_class, fields):
+    return Projection(serializer_class, fields)
+
+
+def parse_fields(params, serializer_class=CoinSerializer):
+    """
+    Projection for the request's `fields` parameter, or None when it is
+    absent or empty. Raises InvalidFields for unknown names.
+    """
+    value = params.get(FIELDS_PARAM, '')
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if not requested:
+        return None
+
+    available = get_row_encoder(serializer_class).names
+    unknown = requested.difference(available)
+    if unknown:
+        raise InvalidFields(f"fieldsに無効な項目があります: {', '.join(sorted(unknown))}")
+
+    # Serializer order, so equivalent requests share one projection
+    fields = tuple(name for name in available if name in requested or name == 'id')
+    return get_projection(serializer_class, fields)
@@ -0,0 +1,191 @@
+"""
+Query plan audit for the API's hot lookups.
+
+Each HotQuery rebuilds the queryset a view (or the ingester) runs, with ids
+sampled from the current database. `explain_hot_queries` runs EXPLAIN on
+each one and reports the tables read with a sequential scan, so index
+coverage can be checked against real plans rather than assumed.
+
+PostgreSQL plans seq scans for tiny tables even when an index exists, so
+scans of tables under `min_rows` rows are reported but not flagged.
+"""
+import re
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .models import (
+    Bookmark, Coin, HourlyPriceRollup, PendingOrder, TradeHistory, User, Wallet,
+)
+from .orders import triggered_orders
+from .pagination import before_datetime_cursor, encode_cursor
+
+# PostgreSQL: "Seq Scan on coins"; SQLite: "SCAN coins" / "SCAN TABLE coins".
+# SQLite also reports a full walk of an index as "SCAN coins USING INDEX ...",
+# which is only cheap when a LIMIT stops it early.
+_PG_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+_SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(.*)')
+
+
+class HotQuery:
+    """
+    One audited query. `build(sample)` returns the queryset; `full_scan`
+    marks queries that read the whole table by design.
+    """
+
+    def __init__(self, name, build, full_scan=False):
+        self.name = name
+        self.build = build
+        self.full_scan = full_scan
+
+
+class PlanReport:
+    """
+    EXPLAIN output for one HotQuery and the tables it scans sequentially
+    """
+
+    def __init__(self, query, plan, seq_scans, small_tables):
+        self.name = query.name
+        self.full_scan = query.full_scan
+        self.plan = plan
+        self.seq_scans = seq_scans
+        # Scanned tables below the row threshold
+        self.small_tables = small_tables
+
+    @property
+    def flagged(self):
+        if self.full_scan:
+            return False
+        return any(table not in self.small_tables for table in self.seq_scans)
+
+
+def seq_scanned_tables(plan, vendor=None, limited=False):
+    """
+    Tables read with a sequential scan according to an EXPLAIN output.
+    `limited` queries (with a LIMIT) may walk an index in order.
+    """
+    vendor = vendor or connection.vendor
+    if vendor == 'postgresql':
+        return sorted(set(_PG_SEQ_SCAN.findall(plan)))
+    tables = set()
+    for line in plan.splitlines():
+        match = _SQLITE_SCAN.search(line)
+        if match and not (limited and 'USING' in match.group(2)):
+            tables.add(match.group(1))
+    return sorted(tables)
+
+
+def sample_values():
+    """
+    Ids to plug into the audited queries, taken from the current data
+    (placeholders when a table is empty)
+    """
+    def first(queryset, default):
+        value = queryset.first()
+        return default if value is None else value
+
+    return {
+        'user_id': first(User.objects.order_by('id').values_list('id', flat=True), 0),
+        'email': first(User.objects.order_by('id').values_list('email', flat=True), ''),
+        'coin_id': first(Coin.objects.order_by('id').values_list('id', flat=True), ''),
+        'token': first(Token.objects.values_list('key', flat=True), ''),
+        'now': timezone.now(),
+        'data_version': first(
+            Coin.objects.order_by('-data_version').values_list('data_version', flat=True), 0
+        ),
+    }
+
+
+def coin_list_page_query(params):
+    """
+    First phase of a paginated coin_list read, as the view runs it
+    """
+    from .views.crypto_views import coin_list_query
+
+    phases, _, limit = coin_list_query(params)
+    return phases[0][:limit + 1]
+
+
+def hot_queries():
+    """
+    The querysets behind the API's frequent requests
+    """
+    return [
+        HotQuery('coin_top10_list', lambda s: Coin.objects.filter(
+            market_cap_rank__gte=1, market_cap_rank__lte=10
+        ).order_by('market_cap_rank')),
+        HotQuery('coin_list (snapshot)', lambda s: Coin.objects.all(), full_scan=True),
+        HotQuery('coin_list page by market_cap_rank',
+                 lambda s: coin_list_page_query({'ordering': 'market_cap_rank'})),
+        HotQuery('coin_list page by -market_cap',
+                 lambda s: coin_list_page_query({'ordering': '-market_cap'})),
+        HotQuery('coin_list cursor page by -total_volume', lambda s: coin_list_page_query({
+            'ordering': '-total_volume',
+            'cursor': encode_cursor(['-total_volume', '1000', s['coin_id']]),
+        })),
+        HotQuery('coin_list search',
+                 lambda s: coin_list_page_query({'search': 'bit'})),
+        HotQuery('coin_detail', lambda s: Coin.objects.filter(id=s['coin_id'])),
+        HotQuery('coin_batch', lambda s: Coin.objects.order_by().filter(
+            id__in=[s['coin_id'], 'ethereum', 'solana']
+        )),
+        HotQuery('coin changes since (live stream)', lambda s: Coin.objects.order_by().filter(
+            data_version__gt=s['data_version']
+        )),
+        HotQuery('coin_price_history', lambda s: HourlyPriceRollup.objects.filter(
+            coin_id=s['coin_id']
+        ).order_by('-bucket_start')[:168]),
+        HotQuery('token authentication', lambda s: Token.objects.select_related('user').filter(
+            key=s['token']
+        )),
+        HotQuery('login', lambda s: User.objects.filter(email=s['email'])),
+        HotQuery('user_bookmarks', lambda s: Bookmark.objects.filter(
+            user_id=s['user_id']
+        ).select_related('coin')),
+        HotQuery('bookmarked coin ids', lambda s: Bookmark.objects.filter(
+            user_id=s['user_id']
+        ).values_list('coin_id', flat=True)),
+        HotQuery('user_portfolio wallets', lambda s: Wallet.objects.filter(
+            user_id=s['user_id']
+        ).select_related('coin')),
+        HotQuery('user_trade_history', lambda s: TradeHistory.objects.filter(
+            user_id=s['user_id']
+        ).select_related('coin').order_by('-created_at', '-id')[:21]),
+        HotQuery('user_trade_history cursor page', lambda s: before_datetime_cursor(
+            TradeHistory.objects.filter(user_id=s['user_id']).select_related('coin'),
+            s['now'], 0,
+        ).order_by('-created_at', '-id')[:21]),
+        HotQuery('user_orders', lambda s: PendingOrder.objects.filter(
+            user_id=s['user_id']
+        ).select_related('coin').order_by('-created_at', '-id')),
+        HotQuery('order engine trigger lookup', lambda s: triggered_orders([s['coin_id']])),
+    ]
+
+
+def _row_counts(tables):
+    counts = {}
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def explain_hot_queries(analyze=False, min_rows=1000, queries=None):
+    """
+    EXPLAIN every hot query against the current database and return a list
+    of PlanReport. `analyze` runs EXPLAIN ANALYZE (PostgreSQL only).
+    """
+    sample = sample_values()
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+
+    reports = []
+    for query in queries or hot_queries():
+        queryset = query.build(sample)
+        plan = queryset.explain(**options)
+        scans = seq_scanned_tables(plan, limited=queryset.query.high_mark is not None)
+        counts = _row_counts(scans)
+        small = [table for table in scans if counts[table] < min_rows]
+        reports.append(PlanReport(query, plan, scans, small))
+    return reports
@@ -1,8 +1,10 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from .models import User, Coin, Bookmark, BankBalance, Wallet, TradeHistory
+from .models import (
+    User, Coin, Bookmark, BankBalance, Wallet, TradeHistory, PendingOrder,
+    PRICE_DIGITS, MONEY_DIGITS,
+)
 from decimal import Decimal
 import re
 
@@ -73,15 +75,14 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if email and password:
-            # Check if user exists
+            # One query for the user plus the rows login_view needs
             try:
-                user = User.objects.get(email=email)
+                user = User.objects.select_related('bank_balance', 'auth_token').get(email=email)
             except User.DoesNotExist:
                 raise serializers.ValidationError("存在しないemailです")
             
-            # Authenticate user
-            user = authenticate(username=email, password=password)
-            if not user:
+            # Re-hashes the password when the hasher settings changed
+            if not (user.check_password(password) and user.is_active):
                 raise serializers.ValidationError("パスワードが正しくありません")
             
             attrs['user'] = user
@@ -108,13 +109,63 @@ class CoinListSerializer(serializers.ModelSerializer):
         ]
 
 
+class CoinPriceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Coin model - price fields pushed by the live stream
+    """
+    class Meta:
+        model = Coin
+        fields = [
+            'id',
+            'market_cap_rank',
+            'current_price',
+            'high_24h',
+            'low_24h',
+            'price_change_24h',
+            'price_change_percentage_24h',
+            'market_cap',
+            'total_volume',
+            'last_updated'
+        ]
+
+
 class CoinSerializer(serializers.ModelSerializer):
     """
     Serializer for Coin model - full detail view
+    (everything except the ingester's bookkeeping columns)
     """
     class Meta:
         model = Coin
-        fields = '__all__'
+        fields = [
+            'id',
+            'symbol',
+            'name',
+            'image',
+            'current_price',
+            'high_24h',
+            'low_24h',
+            'price_change_24h',
+            'price_change_percentage_24h',
+            'market_cap',
+            'market_cap_rank',
+            'market_cap_change_24h',
+            'market_cap_change_percentage_24h',
+            'fully_diluted_valuation',
+            'total_volume',
+            'circulating_supply',
+            'total_supply',
+            'max_supply',
+            'ath',
+            'ath_change_percentage',
+            'ath_date',
+            'atl',
+            'atl_change_percentage',
+            'atl_date',
+            'roi',
+            'last_updated',
+            'created_at',
+            'updated_at',
+        ]
 
 
 class BookmarkSerializer(serializers.ModelSerializer):
@@ -171,21 +222,14 @@ class BookmarkCreateSerializer(serializers.Serializer):
 
 class TradeBuySerializer(serializers.Serializer):
     """
-    Serializer for buy trade requests with validation
+    Serializer for buy trade requests.
+
+    Only the request shape is checked here; coin existence and balance are
+    validated by trade_buy against the rows it locks.
     """
     coin_id = serializers.CharField(max_length=50)
     quantity = serializers.DecimalField(max_digits=20, decimal_places=8)
     
-    def validate_coin_id(self, value):
-        """
-        Validate that the coin exists
-        """
-        try:
-            Coin.objects.get(id=value)
-        except Coin.DoesNotExist:
-            raise serializers.ValidationError("指定されたコインが見つかりません")
-        return value
-    
     def validate_quantity(self, value):
         """
         Validate that quantity is positive and has max 8 decimal places
@@ -198,87 +242,84 @@ class TradeBuySerializer(serializers.Serializer):
             raise serializers.ValidationError("数量は小数点以下8桁までです")
         
         return value
-    
-    def validate(self, attrs):
-        """
-        Validate that user has sufficient balance
-        """
-        user = self.context['request'].user
-        coin_id = attrs['coin_id']
-        quantity = attrs['quantity']
-        
-        # Get coin and calculate total cost
-        try:
-            coin = Coin.objects.get(id=coin_id)
-        except Coin.DoesNotExist:
-            raise serializers.ValidationError("指定されたコインが見つかりません")
-        
-        if coin.current_price is None:
-            raise serializers.ValidationError("コインの価格情報が利用できません")
-        
-        total_cost = quantity * coin.current_price
-        
-        # Check user's bank balance
-        try:
-            bank_balance = BankBalance.objects.get(user=user)
-        except BankBalance.DoesNotExist:
-            raise serializers.ValidationError("銀行残高が見つかりません")
-        
-        if bank_balance.cash_balance < total_cost:
-            raise serializers.ValidationError("残高が不足しています")
-        
-        return attrs
 
 
-class TradeSellSerializer(serializers.Serializer):
+class TradeSellSerializer(TradeBuySerializer):
     """
-    Serializer for sell trade requests with validation
+    Serializer for sell trade requests.
+
+    Ownership and quantity are validated by trade_sell against the locked
+    wallet row.
     """
-    coin_id = serializers.CharField(max_length=50)
-    quantity = serializers.DecimalField(max_digits=20, decimal_places=8)
+
+
+class TradeLegSerializer(TradeBuySerializer):
+    """
+    One buy or sell leg of a batch trade
+    """
+    side = serializers.ChoiceField(choices=TradeHistory.TRADE_TYPE_CHOICES)
+
+
+class TradeBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch trade requests (max 100 legs)
+    """
+    legs = TradeLegSerializer(many=True, allow_empty=False)
     
-    def validate_coin_id(self, value):
+    def validate_legs(self, value):
         """
-        Validate that the coin exists
+        Validate the number of legs
         """
-        try:
-            Coin.objects.get(id=value)
-        except Coin.DoesNotExist:
-            raise serializers.ValidationError("指定されたコインが見つかりません")
+        if len(value) > 100:
+            raise serializers.ValidationError("一度に実行できる取引は100件までです")
         return value
+
+
+class OrderCreateSerializer(TradeBuySerializer):
+    """
+    Serializer for placing a limit or stop order
+    """
+    side = serializers.ChoiceField(choices=PendingOrder.SIDE_CHOICES)
+    order_type = serializers.ChoiceField(choices=PendingOrder.ORDER_TYPE_CHOICES)
+    trigger_price = serializers.DecimalField(
+        max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1]
+    )
     
-    def validate_quantity(self, value):
+    def validate_trigger_price(self, value):
         """
-        Validate that quantity is positive and has max 8 decimal places
+        Validate that the trigger price is positive
         """
         if value <= 0:
-            raise serializers.ValidationError("数量は正の数である必要があります")
-        
-        # Check decimal places (max 8)
-        if value.as_tuple().exponent < -8:
-            raise serializers.ValidationError("数量は小数点以下8桁までです")
-        
+            raise serializers.ValidationError("価格は正の数である必要があります")
         return value
+
+
+class PendingOrderSerializer(serializers.ModelSerializer):
+    """
+    Serializer for limit/stop orders with coin details
+    """
+    coin_id = serializers.CharField(source='coin.id', read_only=True)
+    coin_name = serializers.CharField(source='coin.name', read_only=True)
+    coin_symbol = serializers.CharField(source='coin.symbol', read_only=True)
     
-    def validate(self, attrs):
-        """
-        Validate that user owns the coin and has sufficient quantity
-        """
-        user = self.context['request'].user
-        coin_id = attrs['coin_id']
-        quantity = attrs['quantity']
-        
-        # Check if user owns the coin
-        try:
-            wallet = Wallet.objects.get(user=user, coin_id=coin_id)
-        except Wallet.DoesNotExist:
-            raise serializers.ValidationError("このコインを保有していません")
-        
-        # Check if user has sufficient quantity
-        if wallet.quantity < quantity:
-            raise serializers.ValidationError("保有数量が不足しています")
-        
-        return attrs
+    class Meta:
+        model = PendingOrder
+        fields = [
+            'id',
+            'coin_id',
+            'coin_name',
+            'coin_symbol',
+            'side',
+            'order_type',
+            'trigger_price',
+            'quantity',
+            'status',
+            'reject_reason',
+            'fill_price',
+            'trade',
+            'created_at',
+            'closed_at'
+        ]
 
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -291,8 +332,8 @@ class WalletSerializer(serializers.ModelSerializer):
     coin_image = serializers.CharField(source='coin.image', read_only=True)
     current_price = serializers.DecimalField(
         source='coin.current_price',
-        max_digits=1000,
-        decimal_places=50,
+        max_digits=PRICE_DIGITS[0],
+        decimal_places=PRICE_DIGITS[1],
         read_only=True
     )
     current_value = serializers.SerializerMethodField()
@@ -347,7 +388,20 @@ class PortfolioSerializer(serializers.Serializer):
     """
     Serializer for complete portfolio with computed totals
     """
-    bank_balance = serializers.DecimalField(max_digits=1000, decimal_places=50)
-    wallets = WalletSerializer(many=True)
-    total_portfolio_value = serializers.DecimalField(max_digits=1000, decimal_places=50)
-    total_assets = serializers.DecimalField(max_digits=1000, decimal_places=50)
+    bank_balance = serializers.DecimalField(max_digits=MONEY_DIGITS[0], decimal_places=MONEY_DIGITS[1])
+    # Omitted for ?summary=1 requests
+    wallets = WalletSerializer(many=True, required=False)
+    total_portfolio_value = serializers.DecimalField(max_digits=MONEY_DIGITS[0], decimal_places=MONEY_DIGITS[1])
+    total_assets = serializers.DecimalField(max_digits=MONEY_DIGITS[0], decimal_places=MONEY_DIGITS[1])
+
+
+class PriceCandleSerializer(serializers.Serializer):
+    """
+    Serializer for OHLC rollup rows (hourly or daily)
+    """
+    timestamp = serializers.DateTimeField(source='bucket_start')
+    open = serializers.DecimalField(max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1])
+    high = serializers.DecimalField(max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1])
+    low = serializers.DecimalField(max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1])
+    close = serializers.DecimalField(max_digits=PRICE_DIGITS[0], decimal_places=PRICE_DIGITS[1])
+    volume = serializers.IntegerField(allow_null=True)
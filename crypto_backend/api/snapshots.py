@@ -0,0 +1,307 @@
+"""
+Versioned in-process snapshot cache for coin list endpoints.
+
+Coin data only changes when the ingester runs, so the JSON body of the list
+endpoints is rendered once per data version and kept in the worker process.
+Requests are served from the stored bytes until the version moves.
+"""
+import json
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+
+from .compression import compress, encode_snapshot
+from .fast_json import dumps, get_row_encoder, render_list, render_rows
+from .models import Coin
+from .serializers import CoinListSerializer
+
+
+class Snapshot:
+    """
+    Pre-rendered JSON body for one endpoint at one data version, plus the
+    encoded rows when the endpoint also serves per-user variants
+    """
+
+    __slots__ = ('version', 'body', 'count', 'rows', '_compressed', '_compress_lock')
+
+    def __init__(self, version, body, count, rows=None):
+        self.version = version
+        self.body = body
+        self.count = count
+        self.rows = rows
+        self._compressed = {}
+        self._compress_lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """
+        The body compressed with `encoding` ('gzip' or 'br'), compressed on
+        first use and then kept with the snapshot
+        """
+        body = self._compressed.get(encoding)
+        if body is None:
+            with self._compress_lock:
+                # Requests that arrived while another thread was compressing
+                # wait for its result instead of compressing again
+                body = self._compressed.get(encoding)
+                if body is None:
+                    body = self._compressed[encoding] = compress(self.body, encoding)
+        return body
+
+    async def aencoded(self, encoding):
+        """
+        `encoded` for async views. A stored body is returned without leaving
+        the event loop; compression runs in a worker thread.
+        """
+        body = self._compressed.get(encoding)
+        if body is None:
+            body = await sync_to_async(self.encoded, thread_sensitive=False)(encoding)
+        return body
+
+
+class SnapshotResponse(Response):
+    """
+    Response that sends already rendered JSON bytes as-is.
+
+    `data` is decoded lazily from the body so callers inspecting the
+    response (e.g. tests) still see the usual structure.
+    """
+
+    def __init__(self, body, status=None, headers=None):
+        self._snapshot_body = body
+        self._wire_body = body
+        self._data = None
+        super().__init__(data=None, status=status, headers=headers)
+
+    @classmethod
+    def for_snapshot(cls, request, snapshot):
+        """
+        200 response for a snapshot, precompressed per Accept-Encoding
+        """
+        response = cls(snapshot.body, status=200)
+        response._wire_body, encoding = encode_snapshot(request, snapshot)
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @property
+    def data(self):
+        if self._data is None and self._snapshot_body is not None:
+            self._data = json.loads(self._snapshot_body)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        self['Content-Type'] = 'application/json'
+        return self._wire_body
+
+
+class DataVersion(namedtuple('DataVersion', ['version', 'latest', 'count'])):
+    """
+    Coin data version: newest CoinDataVersion written to a coin row, newest
+    `updated_at` and the row count
+    """
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        stamp = self.latest.timestamp() if self.latest is not None else 0
+        return f'{self.version or 0}-{stamp:.6f}-{self.count}'
+
+    @property
+    def last_modified(self):
+        """
+        Unix timestamp for the Last-Modified header, or None for an empty table
+        """
+        return int(self.latest.timestamp()) if self.latest is not None else None
+
+
+_VERSION_AGGREGATES = {
+    'version': Max('data_version'),
+    'latest': Max('updated_at'),
+    'total': Count('id'),
+}
+
+
+def _query_version():
+    """
+    Compute the coin data version from the database.
+
+    Every coin write stores a CoinDataVersion bumped in its own transaction,
+    and writers are serialized on that counter, so the newest `data_version`
+    moves exactly when a write commits, however many rows it touched. The
+    row count catches deletions.
+    """
+    stats = Coin.objects.aggregate(**_VERSION_AGGREGATES)
+    return DataVersion(stats['version'], stats['latest'], stats['total'])
+
+
+async def _aquery_version():
+    stats = await Coin.objects.aaggregate(**_VERSION_AGGREGATES)
+    return DataVersion(stats['version'], stats['latest'], stats['total'])
+
+
+class SnapshotCache:
+    """
+    Per-process store of rendered snapshots keyed by endpoint name.
+    With `max_entries` the oldest built snapshot is dropped beyond that.
+    """
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def current_version(self):
+        """
+        Return the coin data version, re-reading it from the database at
+        most once per `COIN_SNAPSHOT_VERSION_TTL` seconds.
+        """
+        ttl = getattr(settings, 'COIN_SNAPSHOT_VERSION_TTL', 0)
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= ttl:
+            self._version = _query_version()
+            self._version_checked_at = now
+        return self._version
+
+    async def acurrent_version(self):
+        """
+        `current_version` for async views
+        """
+        ttl = getattr(settings, 'COIN_SNAPSHOT_VERSION_TTL', 0)
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= ttl:
+            self._version = await _aquery_version()
+            self._version_checked_at = now
+        return self._version
+
+    def get(self, name, builder, version=None):
+        """
+        Return the snapshot for `name`, rebuilding it with `builder` when the
+        data version has moved. `builder` returns a `(body, count)` or
+        `(body, count, rows)` tuple.
+        Pass `version` when the caller has already read it.
+        """
+        if version is None:
+            version = self.current_version()
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have rebuilt it while we waited for the lock
+            snapshot = self._snapshots.get(name)
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            snapshot = Snapshot(version, *builder())
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = snapshot
+            if self._max_entries is not None and len(self._snapshots) > self._max_entries:
+                del self._snapshots[next(iter(self._snapshots))]
+            return snapshot
+
+    async def aget(self, name, builder, version):
+        """
+        `get` for async views. A current snapshot is returned without leaving
+        the event loop; a rebuild runs in the sync thread.
+        """
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        return await sync_to_async(self.get)(name, builder, version)
+
+    def invalidate(self):
+        """
+        Drop all snapshots and force the next request to re-read the version
+        """
+        with self._lock:
+            self._snapshots.clear()
+            self._version = None
+
+
+snapshot_cache = SnapshotCache()
+
+# Full coin list per ?fields= projection; versions come from snapshot_cache
+projected_snapshots = SnapshotCache(max_entries=32)
+
+
+def render_coin_list(queryset):
+    """
+    Render a coin queryset into the `{"data": [...], "count": n}` body used
+    by the list endpoints
+    """
+    return render_list(CoinListSerializer, queryset)
+
+
+def _top10_list():
+    return render_coin_list(
+        Coin.objects.filter(
+            market_cap_rank__gte=1, market_cap_rank__lte=10
+        ).order_by('market_cap_rank')
+    )
+
+
+def top10_snapshot(version=None):
+    """
+    Snapshot of coins ranked 1-10, ordered by rank
+    """
+    return snapshot_cache.get('coin_top10_list', _top10_list, version)
+
+
+async def atop10_snapshot(version):
+    return await snapshot_cache.aget('coin_top10_list', _top10_list, version)
+
+
+def _coin_list_with_rows():
+    rows = get_row_encoder(CoinListSerializer).encode_queryset(Coin.objects.all())
+    body, count = render_rows(CoinListSerializer, rows)
+    return body, count, rows
+
+
+def coin_list_snapshot(version=None):
+    """
+    Snapshot of the whole coin table in default ordering. Keeps the encoded
+    rows for `?with_bookmarks=1`.
+    """
+    return snapshot_cache.get('coin_list', _coin_list_with_rows, version)
+
+
+async def acoin_list_snapshot(version):
+    return await snapshot_cache.aget('coin_list', _coin_list_with_rows, version)
+
+
+def projected_list_snapshot(projection, version):
+    """
+    Snapshot of the whole coin table restricted to a ?fields= projection,
+    with the encoded rows
+    """
+    return projected_snapshots.get(
+        ','.join(projection.fields), lambda: _projected_list(projection), version
+    )
+
+
+async def aprojected_list_snapshot(projection, version):
+    return await projected_snapshots.aget(
+        ','.join(projection.fields), lambda: _projected_list(projection), version
+    )
+
+
+def _projected_list(projection):
+    encoder = projection.encoder
+    rows = encoder.encode_queryset(Coin.objects.all())
+    body = dumps({'data': rows, 'count': len(rows)}, has_floats=encoder.has_floats)
+    return body, len(rows), rows
@@ -0,0 +1,114 @@
+"""
+Tests for the async coin read views served under ASGI
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.models import User, Bookmark, Coin
+from api.snapshots import snapshot_cache
+from api.views import async_crypto_views
+
+
+class AsyncCoinViewsTest(TestCase):
+    """Test cases comparing the async views with the DRF views"""
+
+    def setUp(self):
+        """Create three coins and a user who bookmarked one of them"""
+        cache.clear()
+        snapshot_cache.invalidate()
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+        for rank, coin_id in enumerate(['bitcoin', 'ethereum', 'solana'], start=1):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(), market_cap_rank=rank,
+                current_price=1000 * rank, last_updated=timezone.now()
+            )
+        self.user = User.objects.create_user(
+            email='user@example.com', name='User', password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user).key
+        Bookmark.objects.create(user=self.user, coin_id='ethereum')
+
+    def sync_get(self, url, params=None):
+        """Status and decoded body from the DRF view"""
+        response = self.client.get(url, params or {})
+        return response.status_code, json.loads(response.content)
+
+    async def sync_get_async(self, url, params=None):
+        return await sync_to_async(self.sync_get)(url, params)
+
+    async def test_top10_matches_sync_view(self):
+        """Test that the async top10 list serves the same body and validators"""
+        url = reverse('coin_top10_list')
+        response = await async_crypto_views.coin_top10_list(self.factory.get(url))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        expected = await self.sync_get_async(url)
+        self.assertEqual(json.loads(response.content), expected[1])
+
+        request = self.factory.get(url, headers={'If-None-Match': response['ETag']})
+        response = await async_crypto_views.coin_top10_list(request)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_coin_list_full_and_paginated(self):
+        """Test the snapshot list, a keyset page and an invalid ordering"""
+        url = reverse('coin_list')
+        for params in ({}, {'limit': 2}, {'limit': 1, 'ordering': '-current_price'}):
+            response = await async_crypto_views.coin_list(self.factory.get(url, params))
+            self.assertEqual(
+                (response.status_code, json.loads(response.content)),
+                await self.sync_get_async(url, params),
+            )
+
+        response = await async_crypto_views.coin_list(
+            self.factory.get(url, {'ordering': 'name'})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content), {'error': '並び替え項目が無効です'})
+
+    async def test_coin_list_with_bookmarks(self):
+        """Test token authentication for the bookmark flags"""
+        url = reverse('coin_list')
+        request = self.factory.get(
+            url, {'with_bookmarks': '1'}, headers={'Authorization': f'Token {self.token}'}
+        )
+        response = await async_crypto_views.coin_list(request)
+
+        flags = {coin['id']: coin['is_bookmarked'] for coin in json.loads(response.content)['data']}
+        self.assertEqual(flags, {'bitcoin': False, 'ethereum': True, 'solana': False})
+        self.assertIn('Authorization', response['Vary'])
+
+        request = self.factory.get(
+            url, {'with_bookmarks': '1'}, headers={'Authorization': 'Token invalid'}
+        )
+        response = await async_crypto_views.coin_list(request)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_coin_detail(self):
+        """Test the detail body, unknown coins and other methods"""
+        url = reverse('coin_detail', args=['bitcoin'])
+        response = await async_crypto_views.coin_detail(self.factory.get(url), 'bitcoin')
+
+        self.assertEqual(
+            (response.status_code, json.loads(response.content)),
+            await self.sync_get_async(url),
+        )
+        self.assertIn('ETag', response)
+
+        response = await async_crypto_views.coin_detail(
+            self.factory.get(reverse('coin_detail', args=['unknown'])), 'unknown'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(json.loads(response.content), {'error': 'コインが見つかりません'})
+
+        response = await async_crypto_views.coin_detail(self.factory.post(url), 'bitcoin')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,106 @@
+"""
+Tests for the cached bookmarked-id set and coin_list ?with_bookmarks=1
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.bookmarks import get_bookmarked_ids
+from api.models import User, Bookmark, Coin
+from api.snapshots import snapshot_cache
+
+
+class BookmarkedIdsTest(TestCase):
+    """Test cases for bookmark flags on the coin list"""
+
+    def setUp(self):
+        """Create three coins and a user who bookmarked one of them"""
+        cache.clear()
+        snapshot_cache.invalidate()
+        self.client = APIClient()
+        self.url = reverse('coin_list')
+        self.user = User.objects.create_user(
+            email='user@example.com', name='User', password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user).key
+        for rank, coin_id in enumerate(['bitcoin', 'ethereum', 'solana'], start=1):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(), market_cap_rank=rank,
+                current_price=1000 * rank, last_updated=timezone.now()
+            )
+        Bookmark.objects.create(user=self.user, coin_id='ethereum')
+
+    def login(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def flags(self, response):
+        return {coin['id']: coin['is_bookmarked'] for coin in response.data['data']}
+
+    def test_with_bookmarks_flags_each_coin(self):
+        """Test that the full list is annotated for the logged-in user"""
+        self.login()
+        response = self.client.get(self.url, {'with_bookmarks': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.flags(response), {'bitcoin': False, 'ethereum': True, 'solana': False}
+        )
+        self.assertEqual(response.data['count'], 3)
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_plain_list_and_anonymous(self):
+        """Test that the flag is opt-in and always false when anonymous"""
+        response = self.client.get(self.url)
+        self.assertNotIn('is_bookmarked', response.data['data'][0])
+
+        response = self.client.get(self.url, {'with_bookmarks': '1'})
+        self.assertEqual(set(self.flags(response).values()), {False})
+
+    def test_paginated_list(self):
+        """Test that paginated pages are annotated too"""
+        self.login()
+        response = self.client.get(self.url, {'with_bookmarks': '1', 'limit': 2})
+
+        self.assertEqual(self.flags(response), {'bitcoin': False, 'ethereum': True})
+        self.assertIsNotNone(response.data['next'])
+
+    def test_cached_set_avoids_bookmark_queries(self):
+        """Test that warm requests do not read the bookmarks table"""
+        self.login()
+        self.client.get(self.url, {'with_bookmarks': '1'})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'with_bookmarks': '1'})
+
+        table = Bookmark._meta.db_table
+        self.assertFalse([q for q in queries if table in q['sql']])
+
+    def test_create_and_delete_invalidate(self):
+        """Test that bookmark_create / bookmark_delete refresh the flags"""
+        self.login()
+        first = self.client.get(self.url, {'with_bookmarks': '1'})
+
+        self.client.post(reverse('bookmark_create'), {'coin_id': 'solana'}, format='json')
+        response = self.client.get(self.url, {'with_bookmarks': '1'})
+        self.assertTrue(self.flags(response)['solana'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+        self.client.delete(reverse('bookmark_delete', args=['ethereum']))
+        self.assertEqual(get_bookmarked_ids(self.user), frozenset({'solana'}))
+
+    def test_etag_revalidation(self):
+        """Test that an unchanged bookmark set revalidates to 304"""
+        self.login()
+        response = self.client.get(self.url, {'with_bookmarks': '1'})
+
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(
+            self.url, {'with_bookmarks': '1'}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,74 @@
+"""
+Tests for the bulk coin lookup endpoint
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.models import Coin
+from api.snapshots import snapshot_cache
+from api.views.crypto_views import COIN_BATCH_MAX_IDS
+
+
+class CoinBatchTest(TestCase):
+    """Test cases for GET /api/coins/batch"""
+
+    def setUp(self):
+        """Create three coins"""
+        snapshot_cache.invalidate()
+        self.client = APIClient()
+        self.url = reverse('coin_batch')
+        for rank, coin_id in enumerate(['bitcoin', 'ethereum', 'solana'], start=1):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(), market_cap_rank=rank,
+                current_price=1000 * rank, last_updated=timezone.now()
+            )
+
+    def test_request_order_and_missing(self):
+        """Test that coins come back in request order with unknown ids reported"""
+        response = self.client.get(self.url, {'ids': 'solana, unknown,bitcoin,solana'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([coin['id'] for coin in response.data['data']], ['solana', 'bitcoin'])
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['missing'], ['unknown'])
+
+    def test_same_rows_as_coin_detail(self):
+        """Test that each coin matches its coin_detail payload"""
+        response = self.client.get(self.url, {'ids': 'ethereum'})
+        detail = self.client.get(reverse('coin_detail', args=['ethereum']))
+
+        self.assertEqual(response.data['data'][0], detail.data['data'])
+
+    def test_one_coin_query(self):
+        """Test that all coins are read with a single query"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'ids': 'bitcoin,ethereum,solana'})
+
+        table = Coin._meta.db_table
+        coin_reads = [q for q in queries if f'FROM "{table}"' in q['sql'] and 'IN' in q['sql']]
+        self.assertEqual(len(coin_reads), 1)
+
+    def test_fields_and_etag(self):
+        """Test the fields projection and 304 revalidation"""
+        response = self.client.get(self.url, {'ids': 'bitcoin', 'fields': 'current_price'})
+        self.assertEqual(set(response.data['data'][0]), {'id', 'current_price'})
+
+        response = self.client.get(
+            self.url, {'ids': 'bitcoin', 'fields': 'current_price'},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_ids(self):
+        """Test that missing or too many ids are rejected"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        ids = ','.join(f'coin{n}' for n in range(COIN_BATCH_MAX_IDS + 1))
+        response = self.client.get(self.url, {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,179 @@
+"""
+Tests for paginated, sorted and filtered coin_list requests
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import Coin
+from api.pagination import encode_cursor
+from api.views.crypto_views import COIN_ORDERING_FIELDS, coin_list_query
+
+
+class CoinListQueryAPITest(TestCase):
+    """Test cases for coin_list limit/cursor/ordering/search"""
+
+    def setUp(self):
+        """Create 30 coins, one without a rank and one without a price"""
+        self.client = APIClient()
+        self.url = reverse('coin_list')
+
+        for i in range(1, 31):
+            Coin.objects.create(
+                id=f'coin-{i:02d}',
+                symbol=f'c{i}',
+                name=f'Coin {i:02d}',
+                market_cap_rank=i if i != 30 else None,
+                current_price=(i * 7) % 31 if i != 29 else None,
+                market_cap=1000000 - i,
+                price_change_percentage_24h=i % 5,
+                last_updated=timezone.now()
+            )
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin',
+            market_cap_rank=None, current_price=50000, last_updated=timezone.now()
+        )
+
+    def walk(self, params):
+        """Follow next cursors and return all ids"""
+        ids = []
+        cursor = None
+        while True:
+            query = dict(params)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(coin['id'] for coin in response.data['data'])
+            cursor = response.data['next']
+            if cursor is None:
+                return ids
+
+    def test_no_params_returns_everything(self):
+        """Test that plain requests keep returning the whole table"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['count'], 31)
+        self.assertNotIn('next', response.data)
+
+    def test_limit_first_page(self):
+        """Test limit returns a page ordered by rank with a next cursor"""
+        response = self.client.get(self.url, {'limit': 10})
+
+        ranks = [coin['market_cap_rank'] for coin in response.data['data']]
+        self.assertEqual(ranks, list(range(1, 11)))
+        self.assertIsNotNone(response.data['next'])
+
+    def test_cursor_walk_matches_full_ordering(self):
+        """Test that cursor pages cover every coin once, nulls last"""
+        ids = self.walk({'limit': 7})
+
+        expected = [f'coin-{i:02d}' for i in range(1, 30)] + ['bitcoin', 'coin-30']
+        self.assertEqual(ids, expected)
+
+    def test_descending_ordering_with_nulls(self):
+        """Test -current_price ordering including null prices and ties"""
+        ids = self.walk({'limit': 4, 'ordering': '-current_price'})
+
+        expected = list(
+            Coin.objects.exclude(current_price=None)
+            .order_by('-current_price', 'id').values_list('id', flat=True)
+        ) + ['coin-29']
+        self.assertEqual(ids, expected)
+
+    def test_ordering_on_tied_values(self):
+        """Test that ties on the sort key are broken by id across pages"""
+        ids = self.walk({'limit': 3, 'ordering': 'price_change_percentage_24h'})
+
+        self.assertEqual(len(ids), 31)
+        self.assertEqual(len(set(ids)), 31)
+
+    def test_descending_ties_broken_by_descending_id(self):
+        """Test that the id tie-break follows the sort direction"""
+        ids = self.walk({'limit': 4, 'ordering': '-price_change_percentage_24h'})
+
+        expected = list(
+            Coin.objects.exclude(price_change_percentage_24h=None)
+            .order_by('-price_change_percentage_24h', '-id').values_list('id', flat=True)
+        ) + ['bitcoin']
+        self.assertEqual(ids, expected)
+
+    def test_search_by_name_and_symbol(self):
+        """Test case-insensitive prefix search"""
+        response = self.client.get(self.url, {'search': 'BIT'})
+        self.assertEqual([coin['id'] for coin in response.data['data']], ['bitcoin'])
+
+        response = self.client.get(self.url, {'search': 'btc'})
+        self.assertEqual([coin['id'] for coin in response.data['data']], ['bitcoin'])
+
+    def test_invalid_ordering(self):
+        """Test that unknown ordering fields are rejected"""
+        response = self.client.get(self.url, {'ordering': 'name; drop'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_from_other_ordering_rejected(self):
+        """Test that a cursor cannot be reused with a different ordering"""
+        first = self.client.get(self.url, {'limit': 5})
+
+        response = self.client.get(
+            self.url, {'cursor': first.data['next'], 'ordering': '-market_cap'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(self.url, {'cursor': '!!!'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_with_wrong_value_types_rejected(self):
+        """Test that decodable cursors with unusable keys are a 400, not a 500"""
+        keys = [
+            ({'a': 1}, 'coin-01'),
+            ([1], 'coin-01'),
+            (True, 'coin-01'),
+            ('not-a-number', 'coin-01'),
+            (5, 7),
+            (5, None),
+        ]
+        for value, last_id in keys:
+            cursor = encode_cursor(['market_cap_rank', value, last_id])
+
+            response = self.client.get(self.url, {'cursor': cursor})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (value, last_id))
+
+    def test_decimal_and_null_cursor_values_accepted(self):
+        """Test that string-encoded decimals and the null tail still page"""
+        for ordering, value in (('current_price', '7.5'), ('market_cap_rank', None)):
+            cursor = encode_cursor([ordering, value, 'coin-01'])
+
+            response = self.client.get(self.url, {'cursor': cursor, 'ordering': ordering})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK, ordering)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'checks the SQLite plan text')
+class CoinListQueryPlanTest(TestCase):
+    """Test that every coin_list page is an index range read"""
+
+    def test_pages_seek_without_sorting(self):
+        """Test first, cursor and null-phase pages for every ordering"""
+        for field in COIN_ORDERING_FIELDS:
+            for ordering in (field, f'-{field}'):
+                for cursor in (None, ['5', 'coin-01'], [None, 'coin-01']):
+                    params = {'ordering': ordering}
+                    if cursor is not None:
+                        params['cursor'] = encode_cursor([ordering, *cursor])
+                    phases, _, limit = coin_list_query(params)
+
+                    for queryset in phases:
+                        plan = queryset[:limit + 1].explain()
+                        self.assertIn('SEARCH coins USING INDEX', plan, (ordering, cursor))
+                        self.assertNotIn('TEMP B-TREE', plan, (ordering, cursor))
@@ -0,0 +1,189 @@
+"""
+Tests for precompressed snapshot responses
+"""
+import gzip
+import json
+import threading
+import time
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api import compression
+from api.compression import accepted_encoding
+from api.models import User, Coin
+from api.snapshots import Snapshot, coin_list_snapshot, snapshot_cache
+from api.views import async_crypto_views
+
+
+class AcceptEncodingTest(TestCase):
+    """Test cases for Accept-Encoding negotiation"""
+
+    def negotiate(self, header):
+        return accepted_encoding(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header))
+
+    def test_negotiation(self):
+        """Test quality values, wildcards and refusals"""
+        self.assertEqual(self.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(self.negotiate('*'), compression.available_encodings()[0])
+        self.assertIsNone(self.negotiate(''))
+        self.assertIsNone(self.negotiate('identity'))
+        self.assertIsNone(self.negotiate('gzip;q=0, deflate'))
+        self.assertIsNone(self.negotiate('*;q=0'))
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli wins unless the client ranks gzip higher"""
+        self.assertEqual(self.negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(self.negotiate('gzip, br;q=0.5'), 'gzip')
+
+
+class SnapshotEncodedTest(TestCase):
+    """Test cases for compressing a snapshot body"""
+
+    def slow_compress(self, calls):
+        def compress(body, encoding):
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return gzip.compress(body)
+        return compress
+
+    def test_concurrent_requests_compress_once(self):
+        """Test that threads asking for the same encoding share one compression"""
+        snapshot = Snapshot(1, b'{"data": [], "count": 0}' * 100, 0)
+        calls, results = [], []
+
+        with mock.patch('api.snapshots.compress', self.slow_compress(calls)):
+            threads = [
+                threading.Thread(target=lambda: results.append(snapshot.encoded('gzip')))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    async def test_async_compresses_off_the_event_loop(self):
+        """Test that the async path compresses in another thread, then reuses the bytes"""
+        snapshot = Snapshot(1, b'{"data": [], "count": 0}' * 100, 0)
+        calls = []
+
+        with mock.patch('api.snapshots.compress', self.slow_compress(calls)):
+            body = await snapshot.aencoded('gzip')
+            self.assertIs(await snapshot.aencoded('gzip'), body)
+
+        self.assertEqual(len(calls), 1)
+        self.assertNotEqual(calls[0], threading.get_ident())
+        self.assertEqual(gzip.decompress(body), snapshot.body)
+
+
+class CompressedSnapshotTest(TestCase):
+    """Test cases for compressed coin list responses"""
+
+    def setUp(self):
+        """Create a few coins"""
+        cache.clear()
+        snapshot_cache.invalidate()
+        self.client = APIClient()
+        for rank in range(1, 21):
+            Coin.objects.create(
+                id=f'coin{rank}', symbol=f'c{rank}', name=f'Coin {rank}', market_cap_rank=rank,
+                current_price=rank, last_updated=timezone.now()
+            )
+
+    def test_gzip_coin_list(self):
+        """Test that the compressed body decodes to the identity body"""
+        url = reverse('coin_list')
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_not_modified_matches_compressed_headers(self):
+        """Test that a 304 carries the same ETag and Vary as the 200"""
+        for url in (reverse('coin_list'), reverse('coin_top10_list')):
+            for accept in ('gzip', ''):
+                full = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                response = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING=accept, HTTP_IF_NONE_MATCH=full['ETag']
+                )
+
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], full['ETag'])
+                self.assertEqual(response['Vary'], full['Vary'])
+
+    def test_compressed_etag_revalidates_identity(self):
+        """Test that the weak ETag of a gzip body also matches the identity body"""
+        url = reverse('coin_list')
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=compressed['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], compressed['ETag'][2:])
+
+    def test_compressed_once_per_version(self):
+        """Test that later requests reuse the stored compressed bytes"""
+        self.client.get(reverse('coin_top10_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.client.get(reverse('coin_list'), HTTP_ACCEPT_ENCODING='gzip')
+        snapshot = coin_list_snapshot()
+        stored = snapshot.encoded('gzip')
+
+        response = self.client.get(reverse('coin_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIs(snapshot.encoded('gzip'), stored)
+        self.assertEqual(response.content, stored)
+
+    def test_per_user_body_not_compressed(self):
+        """Test that bookmark-flagged lists are sent uncompressed"""
+        user = User.objects.create_user(email='user@example.com', name='User', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+        response = self.client.get(
+            reverse('coin_list'), {'with_bookmarks': '1'}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    async def test_async_not_modified_matches_compressed_headers(self):
+        """Test that the async 304 carries the compressed ETag and Vary"""
+        factory = AsyncRequestFactory()
+        url = reverse('coin_list')
+        full = await async_crypto_views.coin_list(
+            factory.get(url, headers={'Accept-Encoding': 'gzip'})
+        )
+        response = await async_crypto_views.coin_list(factory.get(
+            url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': full['ETag']}
+        ))
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], full['ETag'])
+        self.assertEqual(response['Vary'], full['Vary'])
+
+    async def test_async_view(self):
+        """Test that the async list view serves the same compressed bytes"""
+        request = AsyncRequestFactory().get(
+            reverse('coin_list'), headers={'Accept-Encoding': 'gzip'}
+        )
+        response = await async_crypto_views.coin_list(request)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 20)
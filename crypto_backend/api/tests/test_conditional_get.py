@@ -0,0 +1,163 @@
+"""
+Tests for ETag / Last-Modified handling on coin read endpoints
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from api.models import Coin, User
+from api.snapshots import snapshot_cache
+
+
+class ConditionalGetTest(TestCase):
+    """Test cases for 304 responses on coin endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        snapshot_cache.invalidate()
+
+        for rank in range(1, 4):
+            Coin.objects.create(
+                id=f'coin-{rank}',
+                symbol=f'c{rank}',
+                name=f'Coin {rank}',
+                market_cap_rank=rank,
+                current_price=rank * 10,
+                last_updated=timezone.now()
+            )
+        self.detail_url = reverse('coin_detail', args=['coin-1'])
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_read_endpoints_send_validators(self):
+        """Test that every coin read endpoint sends ETag and Last-Modified"""
+        urls = [
+            reverse('coin_top10_list'),
+            reverse('coin_list'),
+            self.detail_url,
+            reverse('coin_price_history', args=['coin-1']),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertTrue(response['ETag'].startswith('"'), url)
+            self.assertIn('Last-Modified', response, url)
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag is answered with an empty 304"""
+        for url in (reverse('coin_top10_list'), reverse('coin_list'), self.detail_url):
+            first = self.client.get(url)
+
+            response = self.revalidate(url, first)
+
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_not_modified_skips_serialization(self):
+        """Test that a 304 costs only the version query"""
+        url = reverse('coin_list')
+        first = self.client.get(url)
+        snapshot_cache.invalidate()
+
+        with self.assertNumQueries(1):
+            response = self.revalidate(url, first)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_when_data_changes(self):
+        """Test that a write invalidates list and detail ETags"""
+        list_url = reverse('coin_list')
+        list_first = self.client.get(list_url)
+        detail_first = self.client.get(self.detail_url)
+
+        coin = Coin.objects.get(id='coin-1')
+        coin.current_price = 99
+        coin.save()
+
+        for url, first in ((list_url, list_first), (self.detail_url, detail_first)):
+            response = self.revalidate(url, first)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_etag_changes_for_write_with_same_updated_at(self):
+        """Test that the list ETag follows the data version, not updated_at"""
+        list_url = reverse('coin_list')
+        first = self.client.get(list_url)
+        latest = Coin.objects.order_by('-updated_at').values_list('updated_at', flat=True)[0]
+
+        coin = Coin.objects.get(id='coin-1')
+        coin.current_price = 99
+        coin.save()
+        Coin.objects.filter(id='coin-1').update(updated_at=latest)
+
+        response = self.revalidate(list_url, first)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+
+    def test_bookmark_list_304_varies_on_credentials(self):
+        """Test that a per-user 304 keeps the 200's Vary headers"""
+        user = User.objects.create_user(email='user@example.com', name='User', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        url = reverse('coin_list')
+        first = self.client.get(url, {'with_bookmarks': '1'})
+
+        response = self.revalidate(url, first, with_bookmarks='1')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['Vary'], first['Vary'])
+
+    def test_detail_etag_is_per_coin(self):
+        """Test that writing another coin keeps the detail ETag valid"""
+        first = self.client.get(self.detail_url)
+
+        Coin.objects.filter(id='coin-2').update(updated_at=timezone.now() + timedelta(hours=1))
+
+        response = self.revalidate(self.detail_url, first)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_paginated_list_etag_depends_on_query(self):
+        """Test that paginated pages do not share an ETag"""
+        url = reverse('coin_list')
+        first = self.client.get(url, {'limit': 1})
+        other = self.client.get(url, {'limit': 2})
+
+        self.assertNotEqual(first['ETag'], other['ETag'])
+        self.assertEqual(
+            self.revalidate(url, first, limit=1).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(self.revalidate(url, first, limit=2).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since against the data version timestamp"""
+        url = reverse('coin_top10_list')
+        later = http_date((timezone.now() + timedelta(hours=1)).timestamp())
+        earlier = http_date((timezone.now() - timedelta(hours=1)).timestamp())
+
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=later).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_unknown_coin_still_404(self):
+        """Test that validators do not hide missing coins"""
+        response = self.client.get(
+            reverse('coin_detail', args=['nope']), HTTP_IF_NONE_MATCH='*'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,81 @@
+"""
+Tests for the pooled PostgreSQL backend configuration
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+def pooled_database(**overrides):
+    """
+    A DatabaseWrapper for the pooled backend; nothing connects until used
+    """
+    settings_dict = {
+        'ENGINE': 'crypto_backend.postgresql_pool',
+        'NAME': 'crypto_db',
+        'USER': 'postgres',
+        'HOST': 'localhost',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'connect_timeout': 10, 'pool': {'min_size': 1, 'max_size': 4}},
+        **overrides,
+    }
+    return ConnectionHandler({'default': settings_dict})['default']
+
+
+class PooledBackendTest(SimpleTestCase):
+    """Test cases for crypto_backend.postgresql_pool"""
+
+    def test_pool_option_is_not_a_connection_parameter(self):
+        """Test that OPTIONS['pool'] is not passed to psycopg.connect"""
+        params = pooled_database().get_connection_params()
+
+        self.assertNotIn('pool', params)
+        self.assertEqual(params['connect_timeout'], 10)
+        self.assertEqual(params['dbname'], 'crypto_db')
+
+    def test_without_pool_option(self):
+        """Test that the backend behaves like the stock one without a pool"""
+        database = pooled_database(OPTIONS={})
+
+        self.assertIsNone(database.pool)
+
+    def test_persistent_connections_rejected(self):
+        """Test that pooling and CONN_MAX_AGE cannot be combined"""
+        database = pooled_database(CONN_MAX_AGE=60)
+
+        with self.assertRaises(ImproperlyConfigured):
+            database.pool
+
+
+class ConnectionDefaultsTest(SimpleTestCase):
+    """Test cases for the CONN_MAX_AGE default per server interface"""
+
+    def conn_max_age(self, **env):
+        """
+        CONN_MAX_AGE of the production settings loaded in a fresh interpreter
+        """
+        env = {**os.environ, 'SECRET_KEY': 'x', 'DB_ENGINE': 'sqlite3', **env}
+        env.pop('DB_CONN_MAX_AGE', None)
+        env.pop('DB_POOL', None)
+        env.pop('RDS_HOSTNAME', None)
+        output = subprocess.run(
+            [sys.executable, '-c', (
+                'from crypto_backend import settings; '
+                'print(settings.DATABASES["default"]["CONN_MAX_AGE"])'
+            )],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return int(output)
+
+    def test_persistent_under_wsgi(self):
+        """Test that WSGI workers keep their connections by default"""
+        self.assertEqual(self.conn_max_age(SERVED_OVER_ASGI='False'), 60)
+
+    def test_per_request_under_asgi(self):
+        """Test that ASGI workers don't keep per-thread connections by default"""
+        self.assertEqual(self.conn_max_age(SERVED_OVER_ASGI='True'), 0)
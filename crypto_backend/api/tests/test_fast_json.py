@@ -0,0 +1,103 @@
+"""
+Tests for the fast-path coin serializer
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import fast_json
+from api.fast_json import get_row_encoder, render_list
+from api.models import Coin
+from api.serializers import CoinListSerializer, CoinSerializer
+
+
+def drf_render(serializer_class, queryset):
+    data = serializer_class(queryset, many=True).data
+    return JSONRenderer().render({'data': data, 'count': len(data)})
+
+
+class FastJsonOutputTest(TestCase):
+    """Test that the fast path produces the same bytes as DRF"""
+
+    def setUp(self):
+        """Create coins covering nulls, tiny prices, unicode and JSON"""
+        now = timezone.now()
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin', market_cap_rank=1,
+            current_price=Decimal('114654'), high_24h=Decimal('115858.5'),
+            price_change_percentage_24h=Decimal('-0.88981'), market_cap=2284156495076,
+            circulating_supply=Decimal('19923296.0'), ath_date=now,
+            roi={'times': 49.2541913900068, 'currency': 'btc', 'percentage': 1e-05},
+            last_updated=now
+        )
+        Coin.objects.create(
+            id='tiny', symbol='tny', name='Tiny   コイン', market_cap_rank=2,
+            current_price=Decimal('0.000000001234567891'), last_updated=now
+        )
+        Coin.objects.create(
+            id='empty', symbol='e', name='Empty', last_updated=now
+        )
+
+    def test_list_output_identical(self):
+        """Test CoinListSerializer payloads match byte for byte"""
+        queryset = Coin.objects.all()
+
+        body, count = render_list(CoinListSerializer, queryset)
+
+        self.assertEqual(body, drf_render(CoinListSerializer, queryset))
+        self.assertEqual(count, 3)
+
+    def test_detail_output_identical(self):
+        """Test CoinSerializer (dates, JSON floats) matches byte for byte"""
+        queryset = Coin.objects.all()
+
+        body, _ = render_list(CoinSerializer, queryset)
+
+        self.assertEqual(body, drf_render(CoinSerializer, queryset))
+
+    def test_output_identical_without_orjson(self):
+        """Test the stdlib fallback when orjson is not installed"""
+        queryset = Coin.objects.all()
+        original = fast_json.orjson
+        fast_json.orjson = None
+        try:
+            body, _ = render_list(CoinListSerializer, queryset)
+        finally:
+            fast_json.orjson = original
+
+        self.assertEqual(body, drf_render(CoinListSerializer, queryset))
+
+    def test_encoder_is_cached(self):
+        """Test that encoders are compiled once per serializer class"""
+        self.assertIs(get_row_encoder(CoinListSerializer), get_row_encoder(CoinListSerializer))
+
+
+class FastJsonLargeListTest(TestCase):
+    """Test the fast path against DRF on 5,000 coins"""
+
+    COINS = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Coin.objects.bulk_create([
+            Coin(
+                id=f'coin-{i}', symbol=f'c{i}', name=f'Coin {i}', image=f'https://example.com/{i}.png',
+                market_cap_rank=i, current_price=Decimal(i) / 7, high_24h=Decimal(i) / 3,
+                price_change_percentage_24h=Decimal(i % 200 - 100) / 9,
+                market_cap=i * 1000003, last_updated=now, created_at=now, updated_at=now,
+            )
+            for i in range(1, cls.COINS + 1)
+        ])
+
+    def test_fast_path_matches_drf(self):
+        """Test the fast path produces the same payload as DRF"""
+        queryset = Coin.objects.all()
+
+        drf_body = drf_render(CoinListSerializer, queryset)
+        fast_body, count = render_list(CoinListSerializer, queryset)
+
+        self.assertEqual(count, self.COINS)
+        self.assertEqual(fast_body, drf_body)
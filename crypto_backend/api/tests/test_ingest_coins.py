@@ -0,0 +1,244 @@
+"""
+Tests for the bulk coin ingest command
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.ingest import ingest_payload, load_payload_from_file
+from api.models import Coin, CoinDataVersion
+
+SAMPLE_FILE = settings.BASE_DIR.parent / 'lambda' / 'api-response-sample.json'
+
+
+class IngestCoinsCommandTest(TestCase):
+    """Test cases for ingest_coins against the saved CoinGecko sample"""
+
+    def setUp(self):
+        """Load the sample payload"""
+        self.payload = load_payload_from_file(SAMPLE_FILE)
+
+    def test_ingest_from_file(self):
+        """Test that every coin in the sample is stored"""
+        out = StringIO()
+        call_command('ingest_coins', '--from-file', str(SAMPLE_FILE), stdout=out)
+
+        self.assertEqual(Coin.objects.count(), len(self.payload))
+        self.assertIn(f'Upserted {len(self.payload)} changed coins', out.getvalue())
+
+    def test_field_conversion(self):
+        """Test decimal, integer, datetime and JSON conversions"""
+        ingest_payload(self.payload)
+
+        bitcoin = Coin.objects.get(id='bitcoin')
+        self.assertEqual(bitcoin.current_price, Decimal('114654'))
+        self.assertEqual(bitcoin.market_cap_change_24h, -20823760089)
+        self.assertEqual(bitcoin.atl, Decimal('67.81'))
+        self.assertEqual(bitcoin.last_updated.year, 2025)
+        self.assertIsNone(bitcoin.roi)
+
+        ethereum = Coin.objects.get(id='ethereum')
+        self.assertEqual(ethereum.roi['currency'], 'btc')
+        self.assertIsNone(ethereum.max_supply)
+
+    def test_upsert_updates_existing_rows(self):
+        """Test that a second run updates rows and keeps created_at"""
+        ingest_payload(self.payload)
+        created_at = Coin.objects.get(id='bitcoin').created_at
+
+        self.payload[0]['current_price'] = 1
+        ingest_payload(self.payload)
+
+        bitcoin = Coin.objects.get(id='bitcoin')
+        self.assertEqual(Coin.objects.count(), len(self.payload))
+        self.assertEqual(bitcoin.current_price, Decimal('1'))
+        self.assertEqual(bitcoin.created_at, created_at)
+
+    def test_single_statement_for_whole_batch(self):
+        """Test that the batch is written with one statement"""
+        result = ingest_payload(self.payload[:10])
+
+        self.assertEqual(result.upserted, 10)
+        self.assertEqual(result.statements, 1)
+
+    def test_invalid_entries_are_skipped(self):
+        """Test that entries without id or last_updated are skipped"""
+        payload = [{'id': 'broken'}, {'name': 'no id'}] + self.payload[:2]
+
+        result = ingest_payload(payload)
+
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(Coin.objects.count(), 2)
+
+    def test_malformed_entries_are_skipped(self):
+        """Test that unstorable values skip their entry instead of failing the batch"""
+        valid = self.payload[:2]
+        template = self.payload[2]
+        payload = valid + [
+            {**template, 'id': 'bad-price', 'current_price': 'n/a'},
+            {**template, 'id': 'bad-volume', 'total_volume': {'usd': 1}},
+            {**template, 'id': 'huge-price', 'current_price': 1e40},
+            {**template, 'id': 'bad-rank', 'market_cap_rank': 'first'},
+            {**template, 'id': 'x' * 51},
+            {**template, 'id': 7},
+            {**template, 'id': 'bad-date', 'last_updated': '2025-13-45T00:00:00Z'},
+            'not an object',
+        ]
+
+        result = ingest_payload(payload)
+
+        self.assertEqual(result.received, len(payload))
+        self.assertEqual(result.skipped, 8)
+        self.assertEqual(result.upserted, 2)
+        self.assertEqual(
+            set(Coin.objects.values_list('id', flat=True)), {coin['id'] for coin in valid}
+        )
+
+
+class DeltaIngestTest(TestCase):
+    """Test cases for skipping coins whose market data is unchanged"""
+
+    def setUp(self):
+        """Ingest the sample once"""
+        self.payload = load_payload_from_file(SAMPLE_FILE)
+        ingest_payload(self.payload)
+        self.updated_at = dict(Coin.objects.values_list('id', 'updated_at'))
+
+    def test_unchanged_payload_writes_nothing(self):
+        """Test that a repeated payload skips the upsert and keeps updated_at"""
+        result = ingest_payload(self.payload)
+
+        self.assertEqual(result.upserted, 0)
+        self.assertEqual(result.unchanged, len(self.payload))
+        self.assertEqual(result.statements, 0)
+        self.assertEqual(dict(Coin.objects.values_list('id', 'updated_at')), self.updated_at)
+
+    def test_only_changed_coins_are_written(self):
+        """Test that one moved price rewrites one row"""
+        self.payload[1]['current_price'] = 1
+
+        result = ingest_payload(self.payload)
+
+        self.assertEqual(result.upserted, 1)
+        self.assertEqual(result.unchanged, len(self.payload) - 1)
+        changed = [
+            coin_id for coin_id, updated_at in Coin.objects.values_list('id', 'updated_at')
+            if updated_at != self.updated_at[coin_id]
+        ]
+        self.assertEqual(changed, [self.payload[1]['id']])
+
+    def test_cleared_hash_and_force_rewrite(self):
+        """Test that a NULL hash (external writer) or --force rewrites rows"""
+        Coin.objects.filter(id='bitcoin').update(content_hash=None)
+        self.assertEqual(ingest_payload(self.payload).upserted, 1)
+
+        out = StringIO()
+        call_command('ingest_coins', '--from-file', str(SAMPLE_FILE), '--force', stdout=out)
+        self.assertIn(f'Upserted {len(self.payload)} changed coins (0 unchanged', out.getvalue())
+
+
+class DataVersionTest(TestCase):
+    """Test cases for the version bumped by every coin write"""
+
+    def setUp(self):
+        """Load the sample payload"""
+        self.payload = load_payload_from_file(SAMPLE_FILE)
+
+    def test_batch_shares_one_new_version(self):
+        """Test that every row of an ingest gets the same, newer version"""
+        ingest_payload(self.payload[:5])
+        first = CoinDataVersion.objects.get().version
+
+        self.payload[0]['current_price'] = 1
+        self.payload[1]['current_price'] = 1
+        ingest_payload(self.payload[:5])
+
+        versions = dict(Coin.objects.values_list('id', 'data_version'))
+        self.assertEqual(CoinDataVersion.objects.get().version, first + 1)
+        self.assertEqual(versions[self.payload[0]['id']], first + 1)
+        self.assertEqual(versions[self.payload[1]['id']], first + 1)
+        self.assertEqual(versions[self.payload[2]['id']], first)
+
+    def test_unchanged_payload_keeps_version(self):
+        """Test that a no-op ingest does not move the version"""
+        ingest_payload(self.payload)
+        version = CoinDataVersion.objects.get().version
+
+        ingest_payload(self.payload)
+
+        self.assertEqual(CoinDataVersion.objects.get().version, version)
+
+    def test_model_save_bumps_version(self):
+        """Test that ORM saves outside the ingester also move the version"""
+        ingest_payload(self.payload[:1])
+        coin = Coin.objects.get(id=self.payload[0]['id'])
+        version = coin.data_version
+
+        coin.current_price = 1
+        coin.save(update_fields=['current_price'])
+
+        coin.refresh_from_db()
+        self.assertEqual(coin.data_version, version + 1)
+
+
+@override_settings(INGEST_TOKEN='ingest-secret')
+class IngestEndpointTest(TestCase):
+    """Test cases for POST /api/internal/ingest/ (the Lambda's entry point)"""
+
+    def setUp(self):
+        """Load the sample payload"""
+        self.client = APIClient()
+        self.url = reverse('ingest_markets')
+        self.payload = load_payload_from_file(SAMPLE_FILE)[:10]
+
+    def post(self, token='ingest-secret', data=None):
+        if token:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.post(
+            self.url, self.payload if data is None else data, format='json'
+        )
+
+    def test_ingest_with_token(self):
+        """Test that the payload is ingested and the counts returned"""
+        response = self.post()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['upserted'], 10)
+        self.assertEqual(Coin.objects.count(), 10)
+
+    def test_malformed_entry_does_not_fail_the_batch(self):
+        """Test that a bad entry is counted as skipped and the rest ingested"""
+        data = self.payload + [{**self.payload[0], 'id': 'broken', 'current_price': 'abc'}]
+
+        response = self.post(data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(response.data['upserted'], 10)
+        self.assertFalse(Coin.objects.filter(id='broken').exists())
+
+    def test_missing_or_wrong_token_is_rejected(self):
+        """Test that requests without the shared secret write nothing"""
+        self.assertEqual(self.post(token=None).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.post(token='wrong').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Coin.objects.count(), 0)
+
+    @override_settings(INGEST_TOKEN='')
+    def test_disabled_without_token_setting(self):
+        """Test that the endpoint is closed while INGEST_TOKEN is unset"""
+        response = self.post(token='')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_list_body_is_rejected(self):
+        """Test that a body other than a JSON array is a 400"""
+        response = self.post(data={'id': 'bitcoin'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
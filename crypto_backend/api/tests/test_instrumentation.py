@@ -0,0 +1,97 @@
+"""
+Tests for the request timing middleware and the admin stats endpoint
+"""
+import re
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.instrumentation import request_stats
+from api.models import User, BankBalance, Coin
+
+
+@override_settings(API_TIMING_ENABLED=True)
+class RequestTimingTest(TestCase):
+    """Test cases for Server-Timing headers and per-URL stats"""
+
+    def setUp(self):
+        """Create an admin, a regular user and a coin"""
+        request_stats.reset()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', name='Admin', password='testpass123', is_staff=True
+        )
+        self.user = User.objects.create_user(
+            email='user@example.com', name='User', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        self.user_token = Token.objects.create(user=self.user).key
+        self.admin_token = Token.objects.create(user=self.admin).key
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin',
+            current_price=50000, last_updated=timezone.now()
+        )
+
+    def timing(self, response):
+        return dict(
+            (name, float(duration))
+            for name, duration in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])
+        )
+
+    def test_server_timing_header(self):
+        """Test that responses report db, serialize, render and total time"""
+        response = self.client.get(reverse('coin_detail', args=['bitcoin']))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = self.timing(response)
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'total'})
+        # ETag lookup + row fetch
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        self.assertGreaterEqual(timing['total'], timing['db'])
+
+    def test_stats_aggregate_per_url_name(self):
+        """Test that the admin endpoint reports per-URL-name aggregates"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token}')
+        for _ in range(3):
+            self.client.get(reverse('user_portfolio'))
+        self.client.get(reverse('coin_list'))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token}')
+        response = self.client.get(reverse('request_stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        portfolio = response.data['data']['user_portfolio']
+        self.assertEqual(portfolio['count'], 3)
+        self.assertGreater(portfolio['avg_queries'], 0)
+        self.assertEqual(sum(portfolio['histogram'].values()), 3)
+        self.assertGreater(portfolio['avg_serializer_ms'], 0)
+        self.assertEqual(response.data['data']['coin_list']['count'], 1)
+
+    def test_stats_admin_only_and_reset(self):
+        """Test that non-staff users are refused and DELETE resets"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token}')
+        self.assertEqual(
+            self.client.get(reverse('request_stats')).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token}')
+        self.client.delete(reverse('request_stats'))
+        response = self.client.get(reverse('request_stats'))
+
+        # Only the DELETE itself has been recorded since the reset
+        self.assertEqual(list(response.data['data']), ['request_stats'])
+        self.assertEqual(response.data['data']['request_stats']['count'], 1)
+
+
+class RequestTimingDisabledTest(TestCase):
+    """Test that the middleware is a no-op unless enabled"""
+
+    def test_no_header_by_default(self):
+        """Test that no Server-Timing header is sent"""
+        response = self.client.get(reverse('coin_list'))
+
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,111 @@
+"""
+Query-count and re-hash tests for the login path
+"""
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.models import User, BankBalance
+
+PBKDF2_HASHERS = [
+    'api.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+class LoginQueryCountTest(TestCase):
+    """Test that a login reads the user once with its balance and token"""
+
+    # user + bank balance + token, session key check, SAVEPOINT, session INSERT,
+    # RELEASE SAVEPOINT, one UPDATE of last_login and last_login_at,
+    # SAVEPOINT, session UPDATE, RELEASE SAVEPOINT
+    LOGIN_QUERIES = 9
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('login')
+        self.user = User.objects.create_user(
+            email='login@example.com', name='Login User', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    def login(self, password='testpass123'):
+        return self.client.post(
+            self.url, {'email': 'login@example.com', 'password': password}, format='json'
+        )
+
+    def test_login_query_count(self):
+        """Test the number of statements for a returning user"""
+        with self.assertNumQueries(self.LOGIN_QUERIES):
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['token'], self.token.key)
+
+    def test_login_timestamps_recorded(self):
+        """Test last_login and last_login_at are written together"""
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(self.user.last_login_at, self.user.last_login)
+
+    def test_missing_balance_and_token_are_created(self):
+        """Test users without a balance or token still get both"""
+        BankBalance.objects.filter(user=self.user).delete()
+        Token.objects.filter(user=self.user).delete()
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(BankBalance.objects.filter(user=self.user).exists())
+        self.assertEqual(response.data['token'], Token.objects.get(user=self.user).key)
+
+    def test_inactive_user_is_rejected(self):
+        """Test inactive users cannot log in with a correct password"""
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('パスワードが正しくありません', str(response.data['errors']))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS, PASSWORD_HASH_ITERATIONS=1000)
+    def test_login_rehashes_with_configured_cost(self):
+        """Test a hash with another iteration count is replaced on login"""
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            User.objects.filter(pk=self.user.pk).update(password=make_password('testpass123'))
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS, PASSWORD_HASH_ITERATIONS=1000)
+    def test_login_upgrades_old_algorithm(self):
+        """Test hashes from a non-preferred hasher are upgraded on login"""
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS, PASSWORD_HASH_ITERATIONS=1000)
+    def test_wrong_password_keeps_hash(self):
+        """Test a failed login neither logs in nor rewrites the hash"""
+        password = self.user.password
+
+        response = self.login('wrongpassword')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, password)
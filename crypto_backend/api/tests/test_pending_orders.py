@@ -0,0 +1,209 @@
+"""
+Tests for limit/stop orders and the ingest-driven order engine
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.ingest import ingest_payload
+from api.models import (
+    User, BankBalance, PendingOrder, PortfolioValuation, TradeHistory, Wallet,
+)
+
+
+def market_entry(coin_id, price):
+    return {
+        'id': coin_id,
+        'symbol': coin_id[:3],
+        'name': coin_id.title(),
+        'current_price': price,
+        'last_updated': timezone.now().isoformat(),
+    }
+
+
+class PendingOrderTest(TestCase):
+    """Test cases for placing, cancelling and filling orders"""
+
+    def setUp(self):
+        """Create a funded user holding 2 BTC"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='trader@example.com', name='Trader', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        PortfolioValuation.objects.create(user=self.user)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        ingest_payload([market_entry('bitcoin', 50000)])
+        Wallet.objects.create(user=self.user, coin_id='bitcoin', quantity=Decimal('2'))
+
+    def place(self, side, order_type, trigger_price, quantity='1'):
+        response = self.client.post(reverse('order_create'), {
+            'coin_id': 'bitcoin',
+            'side': side,
+            'order_type': order_type,
+            'trigger_price': trigger_price,
+            'quantity': quantity,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['order']['id']
+
+    def status_of(self, order_id):
+        return PendingOrder.objects.get(id=order_id).status
+
+    def test_orders_fill_only_when_triggered(self):
+        """Test each limit/stop direction against a price move"""
+        limit_buy = self.place('BUY', 'LIMIT', '45000')
+        limit_sell = self.place('SELL', 'LIMIT', '55000')
+        stop_buy = self.place('BUY', 'STOP', '55000')
+        stop_sell = self.place('SELL', 'STOP', '45000')
+
+        result = ingest_payload([market_entry('bitcoin', 44000)])
+
+        self.assertEqual(result.orders_filled, 2)
+        self.assertEqual(self.status_of(limit_buy), 'FILLED')
+        self.assertEqual(self.status_of(stop_sell), 'FILLED')
+        self.assertEqual(self.status_of(limit_sell), 'OPEN')
+        self.assertEqual(self.status_of(stop_buy), 'OPEN')
+
+        ingest_payload([market_entry('bitcoin', 56000)])
+
+        self.assertEqual(self.status_of(limit_sell), 'FILLED')
+        self.assertEqual(self.status_of(stop_buy), 'FILLED')
+
+    @override_settings(INGEST_TOKEN='ingest-secret')
+    def test_lambda_ingest_fills_orders(self):
+        """Test that prices posted by the Lambda trigger order matching"""
+        order_id = self.place('BUY', 'LIMIT', '45000')
+
+        response = APIClient().post(
+            reverse('ingest_markets'), [market_entry('bitcoin', 44000)], format='json',
+            HTTP_AUTHORIZATION='Bearer ingest-secret'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['orders_filled'], 1)
+        self.assertEqual(self.status_of(order_id), 'FILLED')
+
+    def test_fill_accounting(self):
+        """Test that a fill moves cash, wallet, history and valuation"""
+        order_id = self.place('BUY', 'LIMIT', '45000', quantity='0.5')
+
+        ingest_payload([market_entry('bitcoin', 40000)])
+
+        order = PendingOrder.objects.get(id=order_id)
+        self.assertEqual(order.fill_price, Decimal('40000'))
+        self.assertEqual(order.trade.trade_type, 'BUY')
+        self.assertEqual(order.trade.balance_after_trade, Decimal('480000'))
+        self.assertEqual(
+            BankBalance.objects.get(user=self.user).cash_balance, Decimal('480000')
+        )
+        self.assertEqual(Wallet.objects.get(user=self.user).quantity, Decimal('2.5'))
+        self.assertEqual(
+            PortfolioValuation.objects.get(user=self.user).total_value, Decimal('100000')
+        )
+
+    def test_fills_apply_in_placement_order(self):
+        """Test that earlier fills in the same batch affect later checks"""
+        first = self.place('SELL', 'STOP', '45000', quantity='1.5')
+        second = self.place('SELL', 'STOP', '45000', quantity='1')
+
+        result = ingest_payload([market_entry('bitcoin', 40000)])
+
+        self.assertEqual((result.orders_filled, result.orders_rejected), (1, 1))
+        self.assertEqual(self.status_of(first), 'FILLED')
+        rejected = PendingOrder.objects.get(id=second)
+        self.assertEqual(rejected.status, 'REJECTED')
+        self.assertEqual(rejected.reject_reason, '保有数量が不足しています')
+
+    def test_selling_whole_wallet_removes_it(self):
+        """Test that a sell fill emptying the wallet deletes it"""
+        self.place('SELL', 'LIMIT', '50000', quantity='2')
+
+        ingest_payload([market_entry('bitcoin', 50000)])
+
+        self.assertFalse(Wallet.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            PortfolioValuation.objects.get(user=self.user).total_value, Decimal('0')
+        )
+
+    def test_cancel(self):
+        """Test that cancelled orders never fill and cannot be cancelled twice"""
+        order_id = self.place('BUY', 'LIMIT', '45000')
+        url = reverse('order_cancel', args=[order_id])
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        ingest_payload([market_entry('bitcoin', 40000)])
+        self.assertEqual(self.status_of(order_id), 'CANCELLED')
+
+    def test_user_orders_filter(self):
+        """Test listing the user's orders by status"""
+        self.place('BUY', 'LIMIT', '45000')
+        self.place('BUY', 'LIMIT', '30000')
+        ingest_payload([market_entry('bitcoin', 40000)])
+
+        response = self.client.get(reverse('user_orders'), {'status': 'open'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['data'][0]['trigger_price'], '30000.000000000000000000')
+
+    def test_invalid_order(self):
+        """Test that bad order types and prices are rejected"""
+        response = self.client.post(reverse('order_create'), {
+            'coin_id': 'bitcoin', 'side': 'BUY', 'order_type': 'MARKET',
+            'trigger_price': '-1', 'quantity': '1',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('order_type', response.data['errors'])
+        self.assertIn('trigger_price', response.data['errors'])
+
+
+class OrderEngineBulkTest(TestCase):
+    """Test that thousands of resting orders are matched in bulk"""
+
+    USERS = 50
+    ORDERS_PER_USER = 40
+
+    def setUp(self):
+        ingest_payload([market_entry('bitcoin', 50000), market_entry('ethereum', 2000)])
+        users = User.objects.bulk_create([
+            User(email=f'u{i}@example.com', username=f'u{i}@example.com', name=f'u{i}')
+            for i in range(self.USERS)
+        ])
+        BankBalance.objects.bulk_create([BankBalance(user=user) for user in users])
+        orders = []
+        for user in users:
+            for i in range(self.ORDERS_PER_USER):
+                # Half of the limit buys sit above the next price
+                orders.append(PendingOrder(
+                    user=user, coin_id='ethereum', side='BUY', order_type='LIMIT',
+                    trigger_price=1900 + i * 5, quantity=Decimal('0.1'),
+                ))
+        PendingOrder.objects.bulk_create(orders)
+
+    def test_bulk_fill_is_not_per_order(self):
+        """Test that 1,000 fills cost a bounded number of statements"""
+        with CaptureQueriesContext(connection) as queries:
+            result = ingest_payload([market_entry('ethereum', '1997.5')])
+
+        expected = self.USERS * self.ORDERS_PER_USER // 2
+        self.assertEqual(result.orders_filled, expected)
+        self.assertEqual(TradeHistory.objects.count(), expected)
+        self.assertEqual(Wallet.objects.count(), self.USERS)
+        self.assertEqual(
+            Wallet.objects.first().quantity, Decimal('0.1') * (self.ORDERS_PER_USER // 2)
+        )
+        # One read per table plus bulk writes (split only by the backend's
+        # parameter limit), never a statement per order
+        self.assertLess(len(queries), 50)
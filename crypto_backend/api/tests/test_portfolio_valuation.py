@@ -0,0 +1,132 @@
+"""
+Tests for the materialized portfolio valuation
+"""
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.ingest import ingest_payload
+from api.models import User, BankBalance, Coin, PortfolioValuation, Wallet
+
+
+def market_entry(coin_id, price):
+    return {
+        'id': coin_id,
+        'symbol': coin_id[:3],
+        'name': coin_id.title(),
+        'current_price': price,
+        'last_updated': timezone.now().isoformat(),
+    }
+
+
+class PortfolioValuationTest(TestCase):
+    """Test cases for valuation upkeep on trades and ingest"""
+
+    def setUp(self):
+        """Create a funded user and two coins"""
+        self.client = APIClient()
+        self.url = reverse('user_portfolio')
+        self.user = User.objects.create_user(
+            email='holder@example.com', name='Holder', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        for coin_id, price in (('bitcoin', 50000), ('ethereum', 2000)):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(),
+                current_price=price, last_updated=timezone.now()
+            )
+
+    def buy(self, coin_id, quantity):
+        response = self.client.post(
+            reverse('trade_buy'), {'coin_id': coin_id, 'quantity': quantity}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def valuation(self):
+        return PortfolioValuation.objects.get(user=self.user)
+
+    def test_trades_update_valuation(self):
+        """Test that buy and sell keep total_value equal to the wallets"""
+        self.buy('bitcoin', '0.5')
+        self.buy('ethereum', '3')
+        self.assertEqual(self.valuation().total_value, Decimal('31000'))
+        self.assertEqual(self.valuation().holdings_count, 2)
+
+        response = self.client.post(
+            reverse('trade_sell'), {'coin_id': 'ethereum', 'quantity': '3'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.valuation().total_value, Decimal('25000'))
+        self.assertEqual(self.valuation().holdings_count, 1)
+
+    def test_ingest_revalues_all_holders(self):
+        """Test that new prices revalue every holder in one pass"""
+        other = User.objects.create_user(
+            email='other@example.com', name='Other', password='testpass123'
+        )
+        PortfolioValuation.objects.create(user=other)
+        Wallet.objects.create(user=other, coin_id='bitcoin', quantity=Decimal('2'))
+        self.buy('bitcoin', '1')
+
+        result = ingest_payload([market_entry('bitcoin', 60000)])
+
+        self.assertEqual(result.portfolios, 2)
+        self.assertEqual(self.valuation().total_value, Decimal('60000'))
+        self.assertEqual(
+            PortfolioValuation.objects.get(user=other).total_value, Decimal('120000')
+        )
+
+    @override_settings(INGEST_TOKEN='ingest-secret')
+    def test_lambda_ingest_revalues_holders(self):
+        """Test that prices posted by the Lambda revalue portfolios too"""
+        self.buy('bitcoin', '1')
+
+        response = APIClient().post(
+            reverse('ingest_markets'), [market_entry('bitcoin', 70000)], format='json',
+            HTTP_AUTHORIZATION='Bearer ingest-secret'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['portfolios'], 1)
+        self.assertEqual(self.valuation().total_value, Decimal('70000'))
+
+    def test_portfolio_reads_materialized_totals(self):
+        """Test that the endpoint reports the stored totals"""
+        self.buy('bitcoin', '2')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_portfolio_value'], '100000.00000000')
+        self.assertEqual(response.data['total_assets'], '500000.00000000')
+        self.assertEqual(len(response.data['wallets']), 1)
+
+    def test_summary_is_single_row_read(self):
+        """Test ?summary=1 returns totals without loading wallets"""
+        for coin_id in ('bitcoin', 'ethereum'):
+            self.buy(coin_id, '1')
+
+        with self.assertNumQueries(1):
+            # Bank balance joined with the valuation (the token lookup is cached)
+            response = self.client.get(self.url, {'summary': '1'})
+
+        self.assertEqual(response.data['total_portfolio_value'], '52000.00000000')
+        self.assertNotIn('wallets', response.data)
+
+    def test_missing_valuation_is_built(self):
+        """Test that users without a valuation row get one on first read"""
+        Wallet.objects.create(user=self.user, coin_id='ethereum', quantity=Decimal('5'))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['total_portfolio_value'], '10000.00000000')
+        self.assertEqual(self.valuation().holdings_count, 1)
@@ -0,0 +1,141 @@
+"""
+Tests for price ticks, OHLC rollups and the history endpoint
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.ingest import ingest_payload
+from api.models import PriceTick, HourlyPriceRollup, DailyPriceRollup
+
+
+def make_entry(price, last_updated, volume=1000):
+    return {
+        'id': 'bitcoin',
+        'symbol': 'btc',
+        'name': 'Bitcoin',
+        'current_price': price,
+        'total_volume': volume,
+        'market_cap_rank': 1,
+        'last_updated': last_updated,
+    }
+
+
+class PriceRollupTest(TestCase):
+    """Test cases for incremental rollup maintenance"""
+
+    def test_ingest_appends_tick(self):
+        """Test that each new last_updated produces one tick"""
+        result = ingest_payload([make_entry(100, '2025-09-22T04:10:00Z')])
+
+        self.assertEqual(result.ticks, 1)
+        self.assertEqual(PriceTick.objects.count(), 1)
+
+    def test_same_timestamp_not_duplicated(self):
+        """Test that re-ingesting unchanged data adds no ticks"""
+        ingest_payload([make_entry(100, '2025-09-22T04:10:00Z')])
+        result = ingest_payload([make_entry(100, '2025-09-22T04:10:00Z')])
+
+        self.assertEqual(result.ticks, 0)
+        self.assertEqual(PriceTick.objects.count(), 1)
+        self.assertEqual(HourlyPriceRollup.objects.get().tick_count, 1)
+
+    def test_hourly_ohlc(self):
+        """Test open/high/low/close across ticks in one hour"""
+        for price, minute in [(100, 10), (130, 20), (90, 40), (110, 50)]:
+            ingest_payload([make_entry(price, f'2025-09-22T04:{minute}:00Z', volume=minute)])
+
+        rollup = HourlyPriceRollup.objects.get()
+        self.assertEqual(rollup.bucket_start, datetime(2025, 9, 22, 4, tzinfo=dt_timezone.utc))
+        self.assertEqual(rollup.open, Decimal('100'))
+        self.assertEqual(rollup.high, Decimal('130'))
+        self.assertEqual(rollup.low, Decimal('90'))
+        self.assertEqual(rollup.close, Decimal('110'))
+        self.assertEqual(rollup.volume, 50)
+        self.assertEqual(rollup.tick_count, 4)
+
+    def test_late_tick_does_not_replace_close(self):
+        """Test that an out-of-order tick only moves open"""
+        ingest_payload([make_entry(100, '2025-09-22T04:30:00Z')])
+        ingest_payload([make_entry(80, '2025-09-22T04:05:00Z')])
+
+        rollup = HourlyPriceRollup.objects.get()
+        self.assertEqual(rollup.open, Decimal('80'))
+        self.assertEqual(rollup.close, Decimal('100'))
+
+    def test_daily_rollup_spans_hours(self):
+        """Test that ticks in different hours share one daily candle"""
+        ingest_payload([make_entry(100, '2025-09-22T04:10:00Z')])
+        ingest_payload([make_entry(120, '2025-09-22T09:10:00Z')])
+
+        self.assertEqual(HourlyPriceRollup.objects.count(), 2)
+        daily = DailyPriceRollup.objects.get()
+        self.assertEqual(daily.open, Decimal('100'))
+        self.assertEqual(daily.close, Decimal('120'))
+        self.assertEqual(daily.tick_count, 2)
+
+
+class PriceHistoryAPITest(TestCase):
+    """Test cases for the coin price history endpoint"""
+
+    def setUp(self):
+        """Set up three hourly candles"""
+        self.client = APIClient()
+        self.url = reverse('coin_price_history', kwargs={'coin_id': 'bitcoin'})
+        for price, hour in [(100, 1), (110, 2), (120, 3)]:
+            ingest_payload([make_entry(price, f'2025-09-22T{hour:02d}:00:00Z')])
+
+    def test_history_hourly(self):
+        """Test candles are returned in ascending order"""
+        response = self.client.get(self.url, {'interval': '1h'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        closes = [Decimal(candle['close']) for candle in response.data['data']]
+        self.assertEqual(closes, [Decimal('100'), Decimal('110'), Decimal('120')])
+
+    def test_history_limit_returns_latest(self):
+        """Test that limit keeps the newest candles"""
+        response = self.client.get(self.url, {'interval': '1h', 'limit': 2})
+
+        closes = [Decimal(candle['close']) for candle in response.data['data']]
+        self.assertEqual(closes, [Decimal('110'), Decimal('120')])
+
+    def test_history_daily(self):
+        """Test the daily interval"""
+        response = self.client.get(self.url, {'interval': '1d'})
+
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(Decimal(response.data['data'][0]['high']), Decimal('120'))
+
+    @override_settings(INGEST_TOKEN='ingest-secret')
+    def test_lambda_ingest_extends_history(self):
+        """Test that prices posted by the Lambda show up in the history"""
+        response = self.client.post(
+            reverse('ingest_markets'), [make_entry(130, '2025-09-22T04:00:00Z')], format='json',
+            HTTP_AUTHORIZATION='Bearer ingest-secret'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['ticks'], 1)
+
+        response = self.client.get(self.url, {'interval': '1h'})
+
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(Decimal(response.data['data'][-1]['close']), Decimal('130'))
+
+    def test_history_invalid_interval(self):
+        """Test that unknown intervals are rejected"""
+        response = self.client.get(self.url, {'interval': '5m'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_history_coin_not_found(self):
+        """Test 404 for unknown coins"""
+        url = reverse('coin_price_history', kwargs={'coin_id': 'nonexistent-coin'})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
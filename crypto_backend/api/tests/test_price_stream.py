@@ -0,0 +1,252 @@
+"""
+Tests for the live price stream hub and its SSE endpoint
+"""
+import asyncio
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.ingest import ingest_payload
+from api.models import Coin
+from api.price_stream import HEARTBEAT, PriceHub, price_hub
+
+
+def parse_event(payload):
+    """Split an SSE message into its fields"""
+    fields = dict(line.split(': ', 1) for line in payload.decode().strip().split('\n'))
+    fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+def reprice(coin_id, price):
+    coin = Coin.objects.get(id=coin_id)
+    coin.current_price = price
+    coin.save()
+
+
+class PriceHubTest(TestCase):
+    """Test cases for change detection, fan-out and replay"""
+
+    def setUp(self):
+        """Create three coins and a primed hub"""
+        for rank, coin_id in enumerate(['bitcoin', 'ethereum', 'solana'], start=1):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(), market_cap_rank=rank,
+                current_price=1000 * rank, last_updated=timezone.now()
+            )
+        self.hub = PriceHub()
+        self.hub.prime()
+
+    def test_check_publishes_only_changed_coins(self):
+        """Test that an event carries just the coins whose price moved"""
+        self.assertIsNone(self.hub.check())
+
+        reprice('ethereum', 2500)
+        event = parse_event(self.hub.check().payload)
+
+        self.assertEqual(event['event'], 'prices')
+        self.assertEqual([coin['id'] for coin in event['data']['coins']], ['ethereum'])
+        self.assertEqual(Decimal(event['data']['coins'][0]['current_price']), 2500)
+        self.assertEqual(int(event['id']), self.hub.last_event_id)
+
+    def test_rewrite_without_price_change_is_silent(self):
+        """Test that re-saving identical prices publishes nothing"""
+        Coin.objects.get(id='bitcoin').save()
+
+        self.assertIsNone(self.hub.check())
+
+    def test_late_commit_with_same_updated_at_is_seen(self):
+        """Test that a row written with an already-seen updated_at still publishes"""
+        reprice('bitcoin', 1100)
+        first = self.hub.check()
+        seen = Coin.objects.get(id='bitcoin').updated_at
+
+        reprice('solana', 3300)
+        Coin.objects.filter(id='solana').update(updated_at=seen)
+        event = parse_event(self.hub.check().payload)
+
+        self.assertEqual([coin['id'] for coin in event['data']['coins']], ['solana'])
+        self.assertGreater(int(event['id']), first.id)
+
+    def test_event_id_is_data_version(self):
+        """Test that event ids are the coin data version, shared by all workers"""
+        reprice('ethereum', 2500)
+        event = self.hub.check()
+
+        self.assertEqual(event.id, Coin.objects.get(id='ethereum').data_version)
+
+    def test_replay_after_last_event_id(self):
+        """Test that a reconnecting client gets exactly the events it missed"""
+        reprice('bitcoin', 1100)
+        first = self.hub.check()
+        reprice('solana', 3300)
+        second = self.hub.check()
+
+        self.assertEqual(self.hub.replay(first.id), [second])
+        self.assertEqual(self.hub.replay(second.id), [])
+        self.assertEqual(self.hub.replay(None), [])
+
+    @override_settings(PRICE_STREAM_REPLAY_SIZE=1)
+    def test_replay_beyond_buffer_sends_reset(self):
+        """Test that a client older than the buffer is told to re-fetch"""
+        reprice('bitcoin', 1100)
+        first = self.hub.check()
+        reprice('bitcoin', 1200)
+        self.hub.check()
+        reprice('bitcoin', 1300)
+        third = self.hub.check()
+
+        replay = self.hub.replay(first.id)
+        self.assertEqual(len(replay), 1)
+        self.assertEqual(parse_event(replay[0].payload)['event'], 'reset')
+        self.assertEqual(replay[0].id, third.id)
+
+    def test_ingest_wakes_hub_on_commit(self):
+        """Test that ingest schedules a wake-up and the hub sees its rows"""
+        payload = [{
+            'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'market_cap_rank': 1,
+            'current_price': 999, 'last_updated': '2024-01-01T00:00:00.000Z',
+        }]
+        with self.captureOnCommitCallbacks() as callbacks:
+            ingest_payload(payload)
+
+        self.assertIn(price_hub.wake, callbacks)
+        event = parse_event(self.hub.check().payload)
+        self.assertEqual([coin['id'] for coin in event['data']['coins']], ['bitcoin'])
+
+    async def test_fan_out_to_subscribers(self):
+        """Test that every subscriber receives the same event object"""
+        streams = [self.hub.subscribe(), self.hub.subscribe()]
+        pending = [asyncio.ensure_future(anext(stream)) for stream in streams]
+        await asyncio.sleep(0)
+        self.assertEqual(self.hub.subscriber_count, 2)
+
+        await sync_to_async(reprice)('solana', 3100)
+        event = await sync_to_async(self.hub.check)()
+
+        received = await asyncio.wait_for(asyncio.gather(*pending), 5)
+        self.assertEqual(received, [event, event])
+        for stream in streams:
+            await stream.aclose()
+        await self.hub.stop()
+        self.assertEqual(self.hub.subscriber_count, 0)
+
+    async def test_publish_delivers_on_event_loop(self):
+        """Test that events published from the check thread are queued on the loop"""
+        stream = self.hub.subscribe()
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        loop_thread = threading.get_ident()
+        deliveries = []
+        deliver = self.hub._deliver
+
+        def record(event):
+            deliveries.append(threading.get_ident())
+            deliver(event)
+
+        with mock.patch.object(self.hub, '_deliver', record):
+            await sync_to_async(reprice)('ethereum', 2100)
+            event = await sync_to_async(self.hub.check)()
+            self.assertEqual(await asyncio.wait_for(pending, 5), event)
+
+        self.assertEqual(deliveries, [loop_thread])
+        await stream.aclose()
+        await self.hub.stop()
+
+    @override_settings(PRICE_STREAM_QUEUE_SIZE=1)
+    async def test_slow_subscriber_gets_reset(self):
+        """Test that a full subscriber queue is replaced by a reset event"""
+        stream = self.hub.subscribe()
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        # Keep the subscriber busy so the next events queue up
+        for price in (1100, 1200, 1300):
+            await sync_to_async(reprice)('bitcoin', price)
+            await sync_to_async(self.hub.check)()
+
+        first = await asyncio.wait_for(pending, 5)
+        second = await asyncio.wait_for(anext(stream), 5)
+        self.assertEqual(parse_event(first.payload)['event'], 'prices')
+        self.assertEqual(parse_event(second.payload)['event'], 'reset')
+        await stream.aclose()
+        await self.hub.stop()
+
+    @override_settings(PRICE_STREAM_HEARTBEAT_SECONDS=0.01)
+    async def test_heartbeat_when_idle(self):
+        """Test that an idle subscription yields heartbeats"""
+        stream = self.hub.subscribe()
+
+        self.assertIs(await asyncio.wait_for(anext(stream), 5), HEARTBEAT)
+        await stream.aclose()
+        await self.hub.stop()
+
+
+@override_settings(PRICE_STREAM_POLL_SECONDS=0.01)
+class PriceStreamAPITest(TestCase):
+    """Test cases for GET /api/coins/stream"""
+
+    def setUp(self):
+        """Create a coin and reset the process hub"""
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin', market_cap_rank=1,
+            current_price=50000, last_updated=timezone.now()
+        )
+        price_hub.reset()
+        self.url = reverse('coin_price_stream')
+
+    async def test_streams_price_changes(self):
+        """Test that the watcher pushes a change to a connected client"""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        body = response.streaming_content
+        self.assertEqual(await anext(body), b'retry: 1000\n\n')
+        # Wait until the subscription exists before writing
+        pending = asyncio.ensure_future(anext(body))
+        while price_hub.subscriber_count == 0:
+            await asyncio.sleep(0.01)
+
+        await sync_to_async(reprice)('bitcoin', 51000)
+        event = parse_event(await asyncio.wait_for(pending, 5))
+
+        self.assertEqual(event['event'], 'prices')
+        self.assertEqual(event['data']['coins'][0]['id'], 'bitcoin')
+        await body.aclose()
+        await price_hub.stop()
+
+    async def test_resume_from_last_event_id(self):
+        """Test that Last-Event-ID replays the missed event first"""
+        await sync_to_async(price_hub.prime)()
+        start = price_hub.last_event_id
+        await sync_to_async(reprice)('bitcoin', 52000)
+        missed = await sync_to_async(price_hub.check)()
+
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': str(start)})
+        body = response.streaming_content
+        await anext(body)
+
+        self.assertEqual(await asyncio.wait_for(anext(body), 5), missed.payload)
+        await body.aclose()
+        await price_hub.stop()
+
+    async def test_invalid_last_event_id(self):
+        """Test that a non-numeric Last-Event-ID is rejected"""
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_wsgi_not_supported(self):
+        """Test that the endpoint refuses to stream over WSGI"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertIn('error', response.json())
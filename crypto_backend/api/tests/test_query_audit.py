@@ -0,0 +1,73 @@
+"""
+Tests for the hot query plan audit and the explain_hot_queries command
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Coin, User
+from api.query_audit import HotQuery, explain_hot_queries, seq_scanned_tables
+
+
+class SeqScanDetectionTest(TestCase):
+    """Test cases for reading sequential scans out of EXPLAIN output"""
+
+    def test_postgresql_plan(self):
+        """Test that Seq Scan nodes are reported per table"""
+        plan = (
+            'Nested Loop  (cost=0.29..16.34 rows=1 width=8)\n'
+            '  ->  Seq Scan on bookmarks  (cost=0.00..8.00 rows=1 width=8)\n'
+            '  ->  Index Scan using coins_pkey on coins  (cost=0.29..8.30 rows=1 width=8)'
+        )
+        self.assertEqual(seq_scanned_tables(plan, 'postgresql'), ['bookmarks'])
+
+    def test_sqlite_plan(self):
+        """Test SCAN vs SEARCH and index walks with and without LIMIT"""
+        plan = (
+            '3 0 0 SCAN coins USING INDEX coins_rank_idx\n'
+            '9 0 0 SEARCH wallet USING INDEX wallet_user_id (user_id=?)\n'
+            '12 0 0 SCAN TABLE bookmarks'
+        )
+        self.assertEqual(seq_scanned_tables(plan, 'sqlite'), ['bookmarks', 'coins'])
+        self.assertEqual(seq_scanned_tables(plan, 'sqlite', limited=True), ['bookmarks'])
+
+
+class ExplainHotQueriesTest(TestCase):
+    """Test cases for the audit against the test database"""
+
+    def setUp(self):
+        """Create a user and a coin to sample ids from"""
+        User.objects.create_user(email='user@example.com', name='User', password='testpass123')
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin', market_cap_rank=1,
+            current_price=50000, last_updated=timezone.now()
+        )
+
+    def test_hot_queries_use_indexes(self):
+        """Test that no hot query needs a sequential scan"""
+        reports = explain_hot_queries(min_rows=0)
+
+        self.assertEqual([report.name for report in reports if report.flagged], [])
+        self.assertTrue(any(report.full_scan for report in reports))
+
+    def test_unindexed_filter_is_flagged(self):
+        """Test that a filter on an unindexed column is flagged"""
+        query = HotQuery('by name', lambda s: Coin.objects.order_by().filter(name='Bitcoin'))
+
+        report, = explain_hot_queries(min_rows=0, queries=[query])
+        self.assertTrue(report.flagged)
+        self.assertEqual(report.seq_scans, ['coins'])
+
+        report, = explain_hot_queries(min_rows=10, queries=[query])
+        self.assertFalse(report.flagged)
+        self.assertEqual(report.small_tables, ['coins'])
+
+    def test_command_output(self):
+        """Test that the command lists every query and a summary"""
+        out = StringIO()
+        call_command('explain_hot_queries', '--min-rows', '0', '--fail-on-seq-scan', stdout=out)
+
+        self.assertIn('coin_top10_list: ok', out.getvalue())
+        self.assertIn('0 flagged', out.getvalue())
@@ -0,0 +1,93 @@
+"""
+Tests for the versioned coin list snapshot cache
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import Coin
+from api.snapshots import snapshot_cache
+
+
+class CoinSnapshotCacheTest(TestCase):
+    """Test cases for snapshot-backed coin list endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        self.list_url = reverse('coin_list')
+        self.top10_url = reverse('coin_top10_list')
+        snapshot_cache.invalidate()
+
+        for rank in range(1, 13):
+            Coin.objects.create(
+                id=f'coin-{rank}',
+                symbol=f'c{rank}',
+                name=f'Coin {rank}',
+                market_cap_rank=rank,
+                current_price=rank * 10,
+                market_cap=1000000 - rank,
+                last_updated=timezone.now()
+            )
+
+    def test_coin_list_returns_all_coins(self):
+        """Test that the snapshot body contains the whole table"""
+        response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['data']), 12)
+
+    def test_top10_returns_ranks_one_to_ten(self):
+        """Test that the top10 snapshot keeps filtering and ordering"""
+        response = self.client.get(self.top10_url)
+
+        ranks = [coin['market_cap_rank'] for coin in response.data['data']]
+        self.assertEqual(ranks, list(range(1, 11)))
+
+    def test_unchanged_data_skips_serialization(self):
+        """Test that a warm snapshot costs only the version query"""
+        self.client.get(self.list_url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.data['count'], 12)
+
+    def test_snapshot_rebuilt_when_data_changes(self):
+        """Test that writing a coin moves the version and refreshes the body"""
+        first = self.client.get(self.list_url).content
+
+        coin = Coin.objects.get(id='coin-1')
+        coin.name = 'Renamed Coin'
+        coin.save()
+
+        response = self.client.get(self.list_url)
+
+        self.assertNotEqual(response.content, first)
+        self.assertEqual(response.data['data'][0]['name'], 'Renamed Coin')
+
+    def test_write_with_same_updated_at_moves_version(self):
+        """Test that a commit moves the version even if updated_at does not"""
+        latest = Coin.objects.get(id='coin-12').updated_at
+        before = snapshot_cache.current_version()
+
+        coin = Coin.objects.get(id='coin-1')
+        coin.current_price = 1
+        coin.save()
+        Coin.objects.filter(id='coin-1').update(updated_at=latest)
+
+        after = snapshot_cache.current_version()
+        self.assertEqual(after.latest, before.latest)
+        self.assertNotEqual(after.key, before.key)
+
+    def test_snapshot_rebuilt_when_coin_deleted(self):
+        """Test that deleting a coin invalidates the snapshot"""
+        self.client.get(self.list_url)
+
+        Coin.objects.filter(id='coin-12').delete()
+        response = self.client.get(self.list_url)
+
+        self.assertEqual(response.data['count'], 11)
@@ -0,0 +1,155 @@
+"""
+Tests for sparse field selection (?fields=) on coin endpoints
+"""
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.models import User, Bookmark, Coin
+from api.projections import parse_fields
+from api.snapshots import snapshot_cache
+from api.views import async_crypto_views
+
+FIELDS = 'current_price,price_change_24h'
+
+
+class SparseFieldsTest(TestCase):
+    """Test cases for the fields query parameter"""
+
+    def setUp(self):
+        """Create three coins and a user who bookmarked two of them"""
+        cache.clear()
+        snapshot_cache.invalidate()
+        self.client = APIClient()
+        for rank, coin_id in enumerate(['bitcoin', 'ethereum', 'solana'], start=1):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(), market_cap_rank=rank,
+                current_price=1000 * rank, price_change_24h=rank,
+                roi={'times': rank}, last_updated=timezone.now()
+            )
+        self.user = User.objects.create_user(
+            email='user@example.com', name='User', password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user).key
+        Bookmark.objects.create(user=self.user, coin_id='ethereum')
+        Bookmark.objects.create(user=self.user, coin_id='solana')
+
+    def test_projection_is_normalized_and_cached(self):
+        """Test that field order does not matter and id is always present"""
+        projection = parse_fields({'fields': 'price_change_24h, current_price'})
+
+        self.assertEqual(projection.fields, ('id', 'current_price', 'price_change_24h'))
+        self.assertIs(parse_fields({'fields': FIELDS}), projection)
+        self.assertIsNone(parse_fields({'fields': ''}))
+
+    def test_coin_detail_fields(self):
+        """Test that only the requested columns are selected and returned"""
+        url = reverse('coin_detail', args=['bitcoin'])
+        full = self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': FIELDS})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['data']), {'id', 'current_price', 'price_change_24h'})
+        self.assertEqual(response.data['data']['current_price'], full.data['data']['current_price'])
+        self.assertFalse([q for q in queries if '"roi"' in q['sql']])
+        self.assertNotEqual(response['ETag'], full['ETag'])
+
+    def test_invalid_field(self):
+        """Test that unknown fields are rejected on every endpoint"""
+        for url in (reverse('coin_detail', args=['bitcoin']), reverse('coin_list')):
+            response = self.client.get(url, {'fields': 'current_price,password'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('password', response.data['error'])
+
+    def test_internal_columns_not_exposed(self):
+        """Test that content_hash and data_version never reach a payload"""
+        internal = {'content_hash', 'data_version'}
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        coins = [
+            self.client.get(reverse('coin_detail', args=['bitcoin'])).data['data'],
+            *self.client.get(reverse('coin_batch'), {'ids': 'bitcoin'}).data['data'],
+            *self.client.get(reverse('user_bookmarks')).data['data'],
+        ]
+
+        self.assertEqual(len(coins), 4)
+        for coin in coins:
+            self.assertIn('current_price', coin)
+            self.assertFalse(internal & set(coin))
+
+        for name in internal:
+            response = self.client.get(
+                reverse('coin_detail', args=['bitcoin']), {'fields': name}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, name)
+
+    def test_coin_list_fields(self):
+        """Test the full list, a page and bookmark flags with a projection"""
+        url = reverse('coin_list')
+        response = self.client.get(url, {'fields': FIELDS})
+        self.assertEqual(
+            [sorted(coin) for coin in response.data['data']],
+            [['current_price', 'id', 'price_change_24h']] * 3,
+        )
+        etag = response['ETag']
+
+        response = self.client.get(url, {'fields': 'current_price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, {'fields': FIELDS, 'limit': 2, 'ordering': '-market_cap_rank'})
+        self.assertEqual([coin['id'] for coin in response.data['data']], ['solana', 'ethereum'])
+        self.assertEqual(set(response.data['data'][0]), {'id', 'current_price', 'price_change_24h'})
+        next_page = self.client.get(url, {
+            'fields': FIELDS, 'limit': 2, 'ordering': '-market_cap_rank',
+            'cursor': response.data['next'],
+        })
+        self.assertEqual([coin['id'] for coin in next_page.data['data']], ['bitcoin'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        response = self.client.get(url, {'fields': 'current_price', 'with_bookmarks': '1'})
+        self.assertEqual(
+            {coin['id']: coin['is_bookmarked'] for coin in response.data['data']},
+            {'bitcoin': False, 'ethereum': True, 'solana': True},
+        )
+
+    def test_user_bookmarks_fields(self):
+        """Test that bookmarked coins are projected in bookmark order"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        response = self.client.get(reverse('user_bookmarks'), {'fields': 'price_change_24h'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [coin['id'] for coin in response.data['data']],
+            [coin['id'] for coin in self.client.get(reverse('user_bookmarks')).data['data']],
+        )
+        self.assertEqual(set(response.data['data'][0]), {'id', 'price_change_24h'})
+
+    async def test_async_views_match(self):
+        """Test that the async views project the same way"""
+        factory = AsyncRequestFactory()
+        url = reverse('coin_detail', args=['bitcoin'])
+        response = await async_crypto_views.coin_detail(
+            factory.get(url, {'fields': FIELDS}), 'bitcoin'
+        )
+        self.assertEqual(set(json.loads(response.content)['data']),
+                         {'id', 'current_price', 'price_change_24h'})
+
+        response = await async_crypto_views.coin_list(
+            factory.get(reverse('coin_list'), {'fields': FIELDS})
+        )
+        self.assertEqual(json.loads(response.content)['count'], 3)
+
+        response = await async_crypto_views.coin_list(
+            factory.get(reverse('coin_list'), {'fields': 'nope'})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,144 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..authentication import CachedTokenAuthentication, token_cache
+from ..models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Test cases for the cached token lookups"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            email='token@example.com', name='Token User', password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_repeat_lookup_uses_no_query(self):
+        """Test only the first lookup of a token queries the database"""
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(cached_user.pk, user.pk)
+        self.assertEqual(cached_user.email, 'token@example.com')
+        self.assertTrue(cached_user.is_authenticated)
+        self.assertEqual(cached_token.key, token.key)
+        self.assertEqual(cached_token.user_id, user.pk)
+
+    def test_cached_user_password_is_deferred(self):
+        """Test the password hash is not kept in the cache but still loads"""
+        self.auth.authenticate_credentials(self.token.key)
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_invalid_token_is_rejected(self):
+        """Test unknown tokens still fail and are not cached"""
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials('0' * 40)
+        self.assertEqual(len(token_cache), 0)
+
+    def test_logout_invalidates_cached_token(self):
+        """Test a token cannot be reused from the cache after logout"""
+        response = self.client.get(reverse('user_bookmarks'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('user_bookmarks'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates_cached_token(self):
+        """Test a deactivated user is rejected even with a cached token"""
+        response = self.client.get(reverse('user_bookmarks'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        response = self.client.get(reverse('user_bookmarks'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidation_waits_for_commit(self):
+        """Test cached tokens are dropped only once the change commits"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token.delete()
+            # Not committed yet: other requests still see the token row
+            self.assertEqual(len(token_cache), 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(token_cache), 0)
+
+    def test_login_keeps_cached_token(self):
+        """Test the last-login bookkeeping does not drop the cached lookup"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        response = self.client.post(reverse('login'), {
+            'email': 'token@example.com', 'password': 'testpass123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    @override_settings(AUTH_TOKEN_CACHE_SIZE=2)
+    def test_cache_is_bounded(self):
+        """Test the least recently used token is evicted"""
+        tokens = [self.token] + [
+            Token.objects.create(user=User.objects.create_user(
+                email=f'user{i}@example.com', name=f'User {i}', password='testpass123'
+            ))
+            for i in range(2)
+        ]
+        for token in tokens:
+            self.auth.authenticate_credentials(token.key)
+
+        self.assertEqual(len(token_cache), 2)
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+
+    @override_settings(AUTH_TOKEN_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_cache(self):
+        """Test every lookup queries when the cache is disabled"""
+        self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(len(token_cache), 0)
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_serves_other_workers(self):
+        """Test a lookup cached by one worker is reused from the shared cache"""
+        self.auth.authenticate_credentials(self.token.key)
+        # Another worker starts with an empty local cache
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+
+        key = self.token.key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        token_cache.clear()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
@@ -0,0 +1,117 @@
+"""
+Tests for the batch trade endpoint
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CachedTokenAuthentication
+from api.models import User, BankBalance, Coin, PortfolioValuation, TradeHistory, Wallet
+
+
+class TradeBatchAPITest(TestCase):
+    """Test cases for POST /api/trades/batch/"""
+
+    def setUp(self):
+        """Create a funded user holding 2 BTC and five coins"""
+        self.client = APIClient()
+        self.url = reverse('trade_batch')
+        self.user = User.objects.create_user(
+            email='trader@example.com', name='Trader', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        PortfolioValuation.objects.create(user=self.user)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        for i, coin_id in enumerate(['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano']):
+            Coin.objects.create(
+                id=coin_id, symbol=coin_id[:3], name=coin_id.title(),
+                current_price=10 ** (4 - i), last_updated=timezone.now()
+            )
+        Wallet.objects.create(user=self.user, coin_id='bitcoin', quantity=Decimal('2'))
+
+    def post(self, legs):
+        return self.client.post(self.url, {'legs': legs}, format='json')
+
+    def test_rebalance_in_one_request(self):
+        """Test that sells fund later buys and everything is recorded"""
+        response = self.post([
+            {'coin_id': 'bitcoin', 'side': 'SELL', 'quantity': '2'},
+            {'coin_id': 'ethereum', 'side': 'BUY', 'quantity': '10'},
+            {'coin_id': 'solana', 'side': 'BUY', 'quantity': '100'},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['trades']), 3)
+        self.assertEqual(response.data['trades'][1]['total'], '10000.00000000')
+        self.assertEqual(response.data['new_balance'], '500000.00000000')
+        self.assertEqual(TradeHistory.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            dict(Wallet.objects.filter(user=self.user).values_list('coin_id', 'quantity')),
+            {'ethereum': Decimal('10'), 'solana': Decimal('100')},
+        )
+        self.assertEqual(
+            PortfolioValuation.objects.get(user=self.user).total_value, Decimal('20000')
+        )
+
+    def test_failing_leg_rolls_back_everything(self):
+        """Test that one bad leg executes nothing and reports its index"""
+        response = self.post([
+            {'coin_id': 'ethereum', 'side': 'BUY', 'quantity': '1'},
+            {'coin_id': 'bitcoin', 'side': 'SELL', 'quantity': '3'},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': '保有数量が不足しています', 'leg': 1})
+        self.assertFalse(TradeHistory.objects.exists())
+        self.assertEqual(
+            BankBalance.objects.get(user=self.user).cash_balance, Decimal('500000')
+        )
+
+    def test_unknown_coin_and_insufficient_balance(self):
+        """Test leg-level errors against the locked rows"""
+        response = self.post([{'coin_id': 'nope', 'side': 'BUY', 'quantity': '1'}])
+        self.assertEqual(response.data['error'], '指定されたコインが見つかりません')
+
+        response = self.post([{'coin_id': 'bitcoin', 'side': 'BUY', 'quantity': '51'}])
+        self.assertEqual(response.data['error'], '残高が不足しています')
+
+    def test_invalid_payload(self):
+        """Test shape validation of the legs"""
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.post([{'coin_id': 'bitcoin', 'side': 'HOLD', 'quantity': '-1'}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('legs', response.data['errors'])
+
+    def test_statement_count_does_not_grow_with_legs(self):
+        """Test that five legs cost the same statements as one"""
+        for coin_id in ['ethereum', 'solana', 'ripple', 'cardano']:
+            Wallet.objects.create(user=self.user, coin_id=coin_id, quantity=Decimal('1'))
+
+        # Both counts reuse the cached token lookup
+        CachedTokenAuthentication().authenticate_credentials(
+            Token.objects.get(user=self.user).key
+        )
+
+        def count(legs):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(legs)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        one = count([{'coin_id': 'cardano', 'side': 'BUY', 'quantity': '1'}])
+        five = count([
+            {'coin_id': coin_id, 'side': 'BUY', 'quantity': '1'}
+            for coin_id in ['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano']
+        ])
+
+        self.assertEqual(one, five)
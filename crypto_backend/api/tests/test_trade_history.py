@@ -0,0 +1,145 @@
+"""
+Tests for the trade history API endpoint
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.models import User, Coin, TradeHistory
+from api.pagination import before_datetime_cursor, encode_cursor
+
+
+class TradeHistoryAPITest(TestCase):
+    """Test cases for offset and cursor pagination of trade history"""
+
+    def setUp(self):
+        """Create a user with 25 trades"""
+        self.client = APIClient()
+        self.url = reverse('user_trade_history')
+        self.user = User.objects.create_user(
+            email='trader@example.com', name='Trader', password='testpass123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        coin = Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin',
+            current_price=50000, last_updated=timezone.now()
+        )
+        for i in range(25):
+            TradeHistory.objects.create(
+                user=self.user,
+                coin=coin,
+                trade_type='BUY',
+                trade_quantity=Decimal('1'),
+                trade_price_per_coin=Decimal('50000'),
+                balance_before_trade=Decimal('500000'),
+                balance_after_trade=Decimal('450000'),
+            )
+
+        # Spread timestamps, keeping two pairs tied to exercise the id tie-break
+        base = timezone.now()
+        for i, trade in enumerate(TradeHistory.objects.order_by('id')):
+            TradeHistory.objects.filter(id=trade.id).update(
+                created_at=base + timedelta(seconds=i // 2)
+            )
+        self.expected_ids = list(
+            TradeHistory.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_offset_pagination(self):
+        """Test the default page-number mode"""
+        response = self.client.get(self.url, {'page_size': 10, 'page': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(response.data['total_pages'], 3)
+        self.assertEqual(
+            [trade['id'] for trade in response.data['data']], self.expected_ids[10:20]
+        )
+
+    def test_cursor_pagination_walks_all_rows(self):
+        """Test that following next cursors returns every trade once, in order"""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor, 'page_size': 10})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(trade['id'] for trade in response.data['data'])
+            cursor = response.data['next']
+
+        self.assertEqual(seen, self.expected_ids)
+
+    def test_cursor_last_page_has_no_next(self):
+        """Test that an exact final page returns next=None"""
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 25})
+
+        self.assertEqual(len(response.data['data']), 25)
+        self.assertIsNone(response.data['next'])
+
+    def test_cursor_page_skips_count_query(self):
+        """Test that a cursor page runs no COUNT query"""
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 5})
+
+        # page query only (the token lookup is cached by the first request)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'cursor': first.data['next'], 'page_size': 5})
+
+    @skipUnless(connection.vendor == 'sqlite', 'checks the SQLite plan text')
+    def test_cursor_page_seeks_on_created_at(self):
+        """Test that a deep page is a range on the index, not a walk of newer rows"""
+        page = before_datetime_cursor(
+            TradeHistory.objects.filter(user_id=self.user.id), timezone.now(), 10
+        ).order_by('-created_at', '-id')[:6]
+
+        self.assertIn('(user_id=? AND created_at<?)', page.explain())
+
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 5})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'cursor': first.data['next'], 'page_size': 5})
+        # An OR of the two key conditions only seeks on user_id
+        self.assertNotIn(' OR ', queries[-1]['sql'])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_impossible_or_naive_cursor_timestamp(self):
+        """Test that decodable cursors with a bad timestamp are a 400, not a 500"""
+        for stamp in ('2025-02-30T00:00:00+00:00', '2025-09-22T04:10:00'):
+            cursor = encode_cursor([stamp, 1])
+
+            response = self.client.get(self.url, {'cursor': cursor})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, stamp)
+
+    def test_other_users_trades_hidden(self):
+        """Test that cursor pages only include the caller's trades"""
+        other = User.objects.create_user(
+            email='other@example.com', name='Other', password='testpass123'
+        )
+        TradeHistory.objects.create(
+            user=other,
+            coin_id='bitcoin',
+            trade_type='SELL',
+            trade_quantity=Decimal('1'),
+            trade_price_per_coin=Decimal('50000'),
+            balance_before_trade=Decimal('0'),
+            balance_after_trade=Decimal('50000'),
+        )
+
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 100})
+
+        self.assertEqual(len(response.data['data']), 25)
@@ -0,0 +1,100 @@
+"""
+Query-count regression tests for trade_buy / trade_sell
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CachedTokenAuthentication
+from api.models import User, BankBalance, Coin, PortfolioValuation, Wallet, TradeHistory
+
+
+class TradeQueryCountTest(TestCase):
+    """Test that each trade reads every row once inside one transaction"""
+
+    # SAVEPOINT, bank balance FOR UPDATE, coin, bank balance UPDATE,
+    # wallet FOR UPDATE, wallet INSERT/UPDATE, valuation UPDATE,
+    # trade history INSERT, RELEASE SAVEPOINT (the token lookup is cached)
+    BUY_QUERIES = 9
+    # SAVEPOINT, bank balance FOR UPDATE, wallet + coin FOR UPDATE,
+    # wallet UPDATE/DELETE, bank balance UPDATE, valuation UPDATE,
+    # trade history INSERT, RELEASE SAVEPOINT (the token lookup is cached)
+    SELL_QUERIES = 8
+
+    def setUp(self):
+        """Create a funded user (as registration does) and a coin"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='trader@example.com', name='Trader', password='testpass123'
+        )
+        BankBalance.objects.create(user=self.user)
+        PortfolioValuation.objects.create(user=self.user)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        # Counts below are for repeat requests, which reuse the cached token
+        CachedTokenAuthentication().authenticate_credentials(token.key)
+        Coin.objects.create(
+            id='bitcoin', symbol='btc', name='Bitcoin',
+            current_price=50000, last_updated=timezone.now()
+        )
+
+    def trade(self, side, quantity, coin_id='bitcoin'):
+        return self.client.post(
+            reverse(f'trade_{side}'), {'coin_id': coin_id, 'quantity': quantity}, format='json'
+        )
+
+    def test_buy_new_wallet_query_count(self):
+        """Test the number of statements for a first purchase"""
+        with self.assertNumQueries(self.BUY_QUERIES):
+            response = self.trade('buy', '1')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Wallet.objects.get(user=self.user).quantity, Decimal('1'))
+
+    def test_buy_existing_wallet_query_count(self):
+        """Test the number of statements when topping up a wallet"""
+        self.trade('buy', '1')
+
+        with self.assertNumQueries(self.BUY_QUERIES):
+            response = self.trade('buy', '0.5')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Wallet.objects.get(user=self.user).quantity, Decimal('1.5'))
+
+    def test_sell_query_count(self):
+        """Test the number of statements for partial and full sales"""
+        self.trade('buy', '2')
+
+        for quantity in ('1', '1'):
+            with self.assertNumQueries(self.SELL_QUERIES):
+                response = self.trade('sell', quantity)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(Wallet.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            BankBalance.objects.get(user=self.user).cash_balance, Decimal('500000')
+        )
+
+    def test_rejected_trades_write_nothing(self):
+        """Test that checks against the locked rows reject bad trades"""
+        cases = [
+            ('buy', '11', '残高が不足しています'),
+            ('buy', '1', '指定されたコインが見つかりません', 'nope'),
+            ('sell', '1', 'このコインを保有していません'),
+            ('sell', '1', '指定されたコインが見つかりません', 'nope'),
+        ]
+        for side, quantity, message, *coin_id in cases:
+            response = self.trade(side, quantity, *coin_id)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['error'], message)
+
+        self.trade('buy', '1')
+        response = self.trade('sell', '2')
+        self.assertEqual(response.data['error'], '保有数量が不足しています')
+        self.assertEqual(TradeHistory.objects.count(), 1)
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from .views import authentication_views, crypto_views, bookmark_views, trade_views
+from .views import authentication_views, crypto_views, bookmark_views, trade_views, order_views, admin_views, stream_views, async_crypto_views, ingest_views
+
+# Coin read endpoints served by async views under ASGI (see crypto_backend/asgi.py)
+coin_read_views = async_crypto_views if settings.ASYNC_READ_VIEWS else crypto_views
 
 
 urlpatterns = [
@@ -9,9 +13,16 @@ urlpatterns = [
     path("auth/logout/", authentication_views.logout_view, name="logout"),
 
     # Cryptocurrency endpoints
-    path("coins/top10", crypto_views.coin_top10_list, name="coin_top10_list"),
-    path("coins/detail/<str:coin_id>/", crypto_views.coin_detail, name="coin_detail"),
-    path("coins/list", crypto_views.coin_list, name="coin_list"),
+    path("coins/top10", coin_read_views.coin_top10_list, name="coin_top10_list"),
+    path("coins/detail/<str:coin_id>/", coin_read_views.coin_detail, name="coin_detail"),
+    path(
+        "coins/detail/<str:coin_id>/history",
+        crypto_views.coin_price_history,
+        name="coin_price_history",
+    ),
+    path("coins/list", coin_read_views.coin_list, name="coin_list"),
+    path("coins/batch", crypto_views.coin_batch, name="coin_batch"),
+    path("coins/stream", stream_views.coin_price_stream, name="coin_price_stream"),
 
     # Bookmark endpoints
     path("bookmarks/", bookmark_views.bookmark_create, name="bookmark_create"),
@@ -25,6 +36,18 @@ urlpatterns = [
     # Trade endpoints
     path("trades/buy/", trade_views.trade_buy, name="trade_buy"),
     path("trades/sell/", trade_views.trade_sell, name="trade_sell"),
+    path("trades/batch/", trade_views.trade_batch, name="trade_batch"),
     path("user/portfolio/", trade_views.user_portfolio, name="user_portfolio"),
     path("user/trade-history/", trade_views.user_trade_history, name="user_trade_history"),
+
+    # Limit / stop order endpoints
+    path("orders/", order_views.order_create, name="order_create"),
+    path("orders/<int:order_id>/", order_views.order_cancel, name="order_cancel"),
+    path("user/orders/", order_views.user_orders, name="user_orders"),
+
+    # Admin endpoints
+    path("admin/stats/", admin_views.request_stats_view, name="request_stats"),
+
+    # Market data ingest (scheduled Lambda, INGEST_TOKEN)
+    path("internal/ingest/", ingest_views.ingest_markets, name="ingest_markets"),
 ]
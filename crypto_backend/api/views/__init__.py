@@ -1,5 +1,11 @@
 from . import authentication_views
 from . import crypto_views
 from . import bookmark_views
+from . import order_views
+from . import admin_views
+from . import stream_views
+from . import async_crypto_views
+from . import ingest_views
 
-__all__ = ['authentication_views', 'crypto_views', 'bookmark_views']
+__all__ = ['authentication_views', 'crypto_views', 'bookmark_views', 'order_views', 'admin_views',
+           'stream_views', 'async_crypto_views', 'ingest_views']
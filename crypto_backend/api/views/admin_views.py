@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+from ..instrumentation import LATENCY_BUCKETS_MS, request_stats
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_stats_view(request):
+    """
+    Per-URL-name request timing stats of this worker process
+
+    GET /api/admin/stats/
+    DELETE /api/admin/stats/ resets the counters
+
+    Stats are only collected when API_TIMING_ENABLED is set.
+
+    Returns:
+    - 200: Stats per URL name (count, averages, latency histogram)
+    - 204: Stats reset
+    - 401/403: Not an admin (is_staff) user
+    """
+    if request.method == 'DELETE':
+        request_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({
+        'enabled': getattr(settings, 'API_TIMING_ENABLED', False),
+        'buckets_ms': list(LATENCY_BUCKETS_MS),
+        'data': request_stats.snapshot()
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,250 @@
+"""
+Async versions of the coin read endpoints, routed instead of the DRF views
+in crypto_views when ASYNC_READ_VIEWS is set (crypto_backend/asgi.py turns
+it on). Under uvicorn workers a request waiting on the database no longer
+holds a worker: snapshot and 304 responses are served on the event loop and
+only queries leave it.
+
+Response bodies match the DRF views. These views skip DRF's content
+negotiation (always JSON) and only authenticate when they need the user
+(coin_list?with_bookmarks=1).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from ..bookmarks import annotate_bookmarks, get_bookmarked_ids
+from ..compression import aencode_snapshot
+from ..conditional import check_not_modified, make_etag, set_validators
+from ..fast_json import get_row_encoder, render_rows
+from ..models import Coin
+from ..projections import InvalidFields, parse_fields
+from ..serializers import CoinListSerializer, CoinSerializer
+from ..snapshots import (
+    acoin_list_snapshot,
+    aprojected_list_snapshot,
+    atop10_snapshot,
+    snapshot_cache,
+)
+from .crypto_views import (
+    InvalidCoinListQuery,
+    afetch_coin_list_page,
+    coin_etag,
+    coin_list_payload,
+    coin_list_query,
+    coin_list_validators,
+    coin_list_variants,
+    render_coin_rows,
+    wants_bookmark_flags,
+    wants_coin_list_page,
+)
+
+ALLOWED_METHODS = ('GET', 'HEAD')
+
+
+def _json_response(body, status=status.HTTP_200_OK):
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
+async def _snapshot_response(request, snapshot):
+    """
+    200 response for a snapshot, precompressed per Accept-Encoding
+    """
+    body, encoding = await aencode_snapshot(request, snapshot)
+    response = _json_response(body)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _error_response(message, status):
+    return _json_response(JSONRenderer().render({'error': message}), status)
+
+
+def _server_error():
+    return _error_response('サーバーエラーが発生しました', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _user_and_bookmarks(request):
+    """
+    Authenticate like the DRF views, then read the user's bookmarked ids
+    """
+    drf_request = Request(request, authenticators=[
+        auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    user = drf_request.user
+    return user, get_bookmarked_ids(user)
+
+
+async def coin_top10_list(request):
+    """
+    Get list of cryptocurrencies with market cap rank 1-10
+
+    GET /api/coins/top10
+
+    Supports If-None-Match / If-Modified-Since against the coin data version.
+
+    Returns:
+    - 200: List of cryptocurrencies with required fields
+    - 304: Not modified since the client's copy
+    - 405: Method not allowed
+    - 500: Server error
+    """
+    if request.method not in ALLOWED_METHODS:
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        version = await snapshot_cache.acurrent_version()
+        etag = make_etag("coin_top10_list", version.key)
+        not_modified = check_not_modified(
+            request, etag, version.last_modified, compressed=True
+        )
+        if not_modified is not None:
+            return not_modified
+
+        snapshot = await atop10_snapshot(version)
+        response = await _snapshot_response(request, snapshot)
+        return set_validators(response, etag, version.last_modified)
+
+    except Exception as e:
+        return _server_error()
+
+
+async def coin_list(request):
+    """
+    Get list of whole cryptocurrencies
+    GET /api/coins/list
+
+    Same query parameters as crypto_views.coin_list (limit, cursor,
+    ordering, search, with_bookmarks, fields).
+
+    returns:
+    - 200: {"data": [...], "count": n} plus "next" when paginated
+    - 304: Not modified since the client's copy
+    - 400: Invalid ordering, cursor or fields
+    - 401: Invalid credentials with with_bookmarks=1
+    - 405: Method not allowed
+    - 500: Server error
+    """
+    if request.method not in ALLOWED_METHODS:
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        projection = parse_fields(request.GET)
+        version = await snapshot_cache.acurrent_version()
+        user = bookmarked_ids = None
+        if wants_bookmark_flags(request):
+            try:
+                user, bookmarked_ids = await sync_to_async(_user_and_bookmarks)(request)
+            except exceptions.AuthenticationFailed as e:
+                return _json_response(
+                    JSONRenderer().render({'detail': e.detail}), e.status_code
+                )
+
+        paginated = wants_coin_list_page(request)
+        etag, last_modified = coin_list_validators(
+            request, version, user, bookmarked_ids, projection
+        )
+        not_modified = check_not_modified(
+            request, etag, last_modified, **coin_list_variants(paginated, bookmarked_ids)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        if paginated:
+            try:
+                phases, ordering, limit = coin_list_query(request.GET, projection)
+            except InvalidCoinListQuery as e:
+                return _error_response(str(e), status.HTTP_400_BAD_REQUEST)
+            page = await afetch_coin_list_page(phases, limit)
+            serializer_class = (
+                CoinListSerializer if projection is None else projection.serializer_class
+            )
+            response = _json_response(JSONRenderer().render(
+                coin_list_payload(page, ordering, limit, bookmarked_ids, serializer_class)
+            ))
+        else:
+            if projection is not None:
+                snapshot = await aprojected_list_snapshot(projection, version)
+            else:
+                snapshot = await acoin_list_snapshot(version)
+
+            if bookmarked_ids is None:
+                response = await _snapshot_response(request, snapshot)
+            elif projection is not None:
+                response = _json_response(
+                    render_coin_rows(projection.encoder, snapshot.rows, bookmarked_ids)
+                )
+            else:
+                body, _ = render_rows(
+                    CoinListSerializer, annotate_bookmarks(snapshot.rows, bookmarked_ids)
+                )
+                response = _json_response(body)
+
+        if bookmarked_ids is not None:
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return set_validators(response, etag, last_modified)
+
+    except InvalidFields as e:
+        return _error_response(str(e), status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return _server_error()
+
+
+async def coin_detail(request, coin_id):
+    """
+    Get cryptocurrency detail information
+
+    GET /api/coins/detail/{coin_id}/
+
+    Query Parameters:
+    - fields (optional): Comma-separated fields to return ("id" is always included)
+
+    Supports If-None-Match / If-Modified-Since against the coin's updated_at.
+
+    Returns:
+    - 200: Coin detail with all (or the requested) fields
+    - 304: Not modified since the client's copy
+    - 400: Invalid fields
+    - 404: Coin not found
+    - 405: Method not allowed
+    - 500: Server error
+    """
+    if request.method not in ALLOWED_METHODS:
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        projection = parse_fields(request.GET)
+        updated_at = await (
+            Coin.objects.filter(id=coin_id).values_list("updated_at", flat=True).afirst()
+        )
+        if updated_at is None:
+            raise Coin.DoesNotExist
+        fields = () if projection is None else projection.fields
+        etag, last_modified = coin_etag(coin_id, updated_at, "coin_detail", *fields)
+        not_modified = check_not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        encoder = get_row_encoder(CoinSerializer) if projection is None else projection.encoder
+        rows = await encoder.aencode_queryset(Coin.objects.filter(id=coin_id))
+        if not rows:
+            raise Coin.DoesNotExist
+
+        response = _json_response(JSONRenderer().render({"data": rows[0]}))
+        return set_validators(response, etag, last_modified)
+
+    except Coin.DoesNotExist:
+        return _error_response('コインが見つかりません', status.HTTP_404_NOT_FOUND)
+
+    except InvalidFields as e:
+        return _error_response(str(e), status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return _server_error()
@@ -1,14 +1,12 @@
 from django.shortcuts import render
 from django.contrib.auth import login, logout
-from django.utils import timezone
-from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from ..serializers import UserRegistrationSerializer, UserLoginSerializer
-from ..models import User, BankBalance
+from ..models import User, BankBalance, PortfolioValuation
 
 # Create your views here.
 
@@ -36,8 +34,9 @@ def register(request):
     if serializer.is_valid():
         user = serializer.save()
         
-        # Create initial bank balance for demo trading
+        # Create initial bank balance and empty portfolio for demo trading
         BankBalance.objects.create(user=user)
+        PortfolioValuation.objects.create(user=user)
         
         # Create or get token for the user
         token, created = Token.objects.get_or_create(user=user)
@@ -79,21 +78,19 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         
-        # Log the user in (creates session)
+        # Log the user in (creates session, records last_login and
+        # last_login_at in one UPDATE, see api/authentication.py)
         login(request, user)
         
-        # Ensure user has a BankBalance record (atomic operation)
-        with transaction.atomic():
-            # Update last_login_at field
-            user.last_login_at = timezone.now()
-            user.save(update_fields=['last_login_at'])
-            
-            # Check if BankBalance exists, create if missing
-            if not hasattr(user, 'bank_balance'):
-                BankBalance.objects.create(user=user)
+        # The serializer loaded the bank balance and token with the user,
+        # so these checks need no query
+        if not hasattr(user, 'bank_balance'):
+            BankBalance.objects.create(user=user)
         
-        # Create or get token for the user
-        token, created = Token.objects.get_or_create(user=user)
+        try:
+            token = user.auth_token
+        except Token.DoesNotExist:
+            token, created = Token.objects.get_or_create(user=user)
         
         return Response({
             'message': 'ログインが成功しました',
@@ -124,7 +121,8 @@ def logout_view(request):
     - 401: User not authenticated
     """
     try:
-        # Delete the user's token
+        # Delete the user's token (also drops its cached lookup, see
+        # api/authentication.py)
         request.user.auth_token.delete()
     except (AttributeError, Token.DoesNotExist):
         pass
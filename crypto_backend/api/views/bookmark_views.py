@@ -8,6 +8,8 @@ from rest_framework.authtoken.models import Token
 
 from ..serializers import BookmarkCreateSerializer, CoinListSerializer
 from ..models import Bookmark
+from ..bookmarks import invalidate_bookmarked_ids
+from ..projections import InvalidFields, parse_fields
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -33,6 +35,7 @@ def bookmark_create(request):
         
         if serializer.is_valid():
             bookmark = serializer.save()
+            invalidate_bookmarked_ids(request.user.pk)
             return Response({
                 'message': 'ブックマークが追加されました',
                 'bookmark': {
@@ -72,6 +75,7 @@ def bookmark_delete(request, coin_id):
         
         # Delete the bookmark
         bookmark.delete()
+        invalidate_bookmarked_ids(request.user.pk)
         
         return Response({
             'message': 'ブックマークが削除されました',
@@ -96,12 +100,29 @@ def user_bookmarks(request):
     
     GET /api/user/bookmarks/
     
+    Query Parameters:
+    - fields (optional): Comma-separated coin fields to return instead of
+      the list fields ("id" is always included)
+    
     Returns:
     - 200: List of bookmarked cryptocurrencies with required fields
+    - 400: Invalid fields
     - 401: User not authenticated
     - 500: Server error
     """
     try:
+        projection = parse_fields(request.GET)
+        if projection is not None:
+            # Select only the requested coin columns, newest bookmark first
+            rows = Bookmark.objects.filter(user=request.user).values_list(
+                *(f'coin__{column}' for column in projection.columns)
+            )
+            data = [projection.encoder.encode(row) for row in rows]
+            return Response({
+                'data': data,
+                'count': len(data)
+            }, status=status.HTTP_200_OK)
+
         # Get bookmarks for the authenticated user
         bookmarks = Bookmark.objects.filter(user=request.user).select_related('coin')
         
@@ -114,6 +135,11 @@ def user_bookmarks(request):
             'count': len(serializer.data)
         }, status=status.HTTP_200_OK)
         
+    except InvalidFields as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+        
     except Exception as e:
         return Response({
             'error': 'サーバーエラーが発生しました'
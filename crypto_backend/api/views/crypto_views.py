@@ -4,10 +4,47 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from ..serializers import CoinListSerializer, CoinSerializer
+from django.db.models import Q
+from django.db.models.functions import Lower
+from ..serializers import CoinListSerializer, CoinSerializer, PriceCandleSerializer
 from ..models import Coin
+from django.utils.cache import patch_vary_headers
+from ..bookmarks import annotate_bookmarks, get_bookmarked_ids
+from ..conditional import check_not_modified, make_etag, set_validators
+from ..fast_json import dumps, get_row_encoder, render_rows
+from ..pagination import InvalidCursor, decode_cursor, encode_cursor
+from ..price_history import ROLLUP_INTERVALS, get_price_history
+from ..projections import InvalidFields, parse_fields
+from ..snapshots import (
+    SnapshotResponse,
+    coin_list_snapshot,
+    projected_list_snapshot,
+    snapshot_cache,
+    top10_snapshot,
+)
 import requests
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+
+# Sortable columns for coin_list (?ordering=field or ?ordering=-field)
+COIN_ORDERING_FIELDS = (
+    "market_cap_rank",
+    "market_cap",
+    "current_price",
+    "price_change_24h",
+    "price_change_percentage_24h",
+    "total_volume",
+)
+
+COIN_LIST_DEFAULT_LIMIT = 20
+COIN_LIST_MAX_LIMIT = 250
+
+# Most ids coin_batch resolves in one request
+COIN_BATCH_MAX_IDS = 250
+
+# Any of these switches coin_list from the full snapshot to a paginated query
+COIN_LIST_QUERY_PARAMS = ("limit", "cursor", "ordering", "search")
 
 
 @api_view(["GET"])
@@ -18,24 +55,27 @@ def coin_top10_list(request):
 
     GET /api/coins/top10
 
+    Supports If-None-Match / If-Modified-Since against the coin data version.
+
     Returns:
     - 200: List of cryptocurrencies with required fields
+    - 304: Not modified since the client's copy
     - 500: Server error
     """
     try:
-        # Filter coins with market_cap_rank between 1 and 10
-        # Order by market_cap_rank ascending (1, 2, 3, ...)
-        coins = Coin.objects.filter(
-            market_cap_rank__gte=1, market_cap_rank__lte=10
-        ).order_by("market_cap_rank")
+        version = snapshot_cache.current_version()
+        etag = make_etag("coin_top10_list", version.key)
+        not_modified = check_not_modified(
+            request, etag, version.last_modified, compressed=True
+        )
+        if not_modified is not None:
+            return not_modified
 
-        # Serialize the data with required fields only
-        serializer = CoinListSerializer(coins, many=True)
+        # Coins ranked 1-10, rendered (and compressed) once per coin data version
+        snapshot = top10_snapshot(version)
 
-        return Response(
-            {"data": serializer.data, "count": len(serializer.data)},
-            status=status.HTTP_200_OK,
-        )
+        response = SnapshotResponse.for_snapshot(request, snapshot)
+        return set_validators(response, etag, version.last_modified)
 
     except Exception as e:
         return Response(
@@ -51,19 +91,74 @@ def coin_list(request):
     Get list of whole cryptocurrencies
     GET /api/coins/list
 
+    Without query parameters the whole table is returned.
+    Passing any of the following switches to a paginated response:
+    - limit (optional): Items per page (default: 20, max: 250)
+    - cursor (optional): `next` value from the previous page
+    - ordering (optional): One of COIN_ORDERING_FIELDS, prefix "-" for
+      descending (default: market_cap_rank). Nulls are always last.
+    - search (optional): Case-insensitive prefix match on name or symbol
+
+    with_bookmarks=1 adds "is_bookmarked" to every coin for the logged-in
+    user (always false when anonymous), read from the cached bookmark id set.
+
+    fields (optional): Comma-separated CoinSerializer fields to return
+    instead of the list fields ("id" is always included)
+
+    Supports If-None-Match / If-Modified-Since against the coin data version
+    (the query string is part of the ETag for paginated requests, and the
+    bookmark set when with_bookmarks=1).
+
     returns:
-    - 200:
+    - 200: {"data": [...], "count": n} plus "next" when paginated
+    - 304: Not modified since the client's copy
+    - 400: Invalid ordering, cursor or fields
     - 500:
     """
     try:
-        coins = Coin.objects.all()
-
-        serializer = CoinListSerializer(coins, many=True)
+        paginated = wants_coin_list_page(request)
+        projection = parse_fields(request.GET)
+        version = snapshot_cache.current_version()
+        bookmarked_ids = None
+        if wants_bookmark_flags(request):
+            bookmarked_ids = get_bookmarked_ids(request.user)
 
-        return Response(
-            {"data": serializer.data, "count": len(serializer.data)},
-            status=status.HTTP_200_OK,
+        etag, last_modified = coin_list_validators(
+            request, version, request.user, bookmarked_ids, projection
         )
+        not_modified = check_not_modified(
+            request, etag, last_modified, **coin_list_variants(paginated, bookmarked_ids)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        if paginated:
+            response = _coin_list_page(request, bookmarked_ids, projection)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        else:
+            if projection is not None:
+                snapshot = projected_list_snapshot(projection, version)
+            else:
+                snapshot = coin_list_snapshot(version)
+
+            if bookmarked_ids is None:
+                response = SnapshotResponse.for_snapshot(request, snapshot)
+            elif projection is not None:
+                body = render_coin_rows(projection.encoder, snapshot.rows, bookmarked_ids)
+                response = SnapshotResponse(body, status=status.HTTP_200_OK)
+            else:
+                body, _ = render_rows(
+                    CoinListSerializer, annotate_bookmarks(snapshot.rows, bookmarked_ids)
+                )
+                response = SnapshotResponse(body, status=status.HTTP_200_OK)
+
+        if bookmarked_ids is not None:
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return set_validators(response, etag, last_modified)
+
+    except InvalidFields as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     except Exception as e:
         return Response(
@@ -72,6 +167,224 @@ def coin_list(request):
         )
 
 
+class InvalidCoinListQuery(Exception):
+    """
+    A coin_list query parameter was rejected; the message is the API error
+    """
+
+
+def wants_coin_list_page(request):
+    return any(param in request.GET for param in COIN_LIST_QUERY_PARAMS)
+
+
+def coin_list_variants(paginated, bookmarked_ids):
+    """
+    check_not_modified arguments matching the headers of the coin_list 200:
+    only the shared snapshot is compressed, and bookmark flags are per user
+    """
+    if bookmarked_ids is not None:
+        return {"vary": ("Authorization", "Cookie")}
+    return {"compressed": not paginated}
+
+
+def wants_bookmark_flags(request):
+    return request.GET.get("with_bookmarks") in ("1", "true")
+
+
+def coin_list_validators(request, version, user, bookmarked_ids=None, projection=None):
+    """
+    ETag and Last-Modified for a coin_list request. The query string is part
+    of the ETag for paginated requests, the projected fields for the full
+    list, and the user's bookmark set when `bookmarked_ids` is given
+    (Last-Modified is then omitted, because bookmark changes do not move the
+    coin data version).
+    """
+    if wants_coin_list_page(request):
+        etag_parts = ["coin_list?" + request.GET.urlencode()]
+    else:
+        etag_parts = ["coin_list"]
+        if projection is not None:
+            etag_parts += ["fields", *projection.fields]
+    last_modified = version.last_modified
+    if bookmarked_ids is not None:
+        etag_parts += ["bookmarks", user.pk, *sorted(bookmarked_ids)]
+        last_modified = None
+    return make_etag(*etag_parts, version.key), last_modified
+
+
+def coin_etag(coin_id, updated_at, *parts):
+    """
+    ETag and Last-Modified for one coin from its `updated_at`
+    """
+    return make_etag(coin_id, updated_at.timestamp(), *parts), int(updated_at.timestamp())
+
+
+def _coin_validators(coin_id, *parts):
+    """
+    ETag and Last-Modified for one coin from its `updated_at`.
+    Raises Coin.DoesNotExist for unknown ids.
+    """
+    updated_at = (
+        Coin.objects.filter(id=coin_id).values_list("updated_at", flat=True).first()
+    )
+    if updated_at is None:
+        raise Coin.DoesNotExist
+    return coin_etag(coin_id, updated_at, *parts)
+
+
+def valid_cursor_key(value, last_id):
+    """
+    Whether a decoded cursor's sort value and id can be used in a filter:
+    the value is a number (decimals are encoded as strings) or None for
+    the nulls-last tail, and the id is a string
+    """
+    if not isinstance(last_id, str):
+        return False
+    if value is None:
+        return True
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return False
+    try:
+        return Decimal(value).is_finite()
+    except (InvalidOperation, ValueError):
+        return False
+
+
+def coin_list_query(params, projection=None):
+    """
+    Keyset page query of coins for the requested ordering and search.
+    Ties and cursors are broken by id, in the sort direction, so pages never
+    overlap. With a `projection` only its columns (and the sort key) are
+    selected.
+
+    Rows with a NULL sort key come last and are read as a separate phase
+    ordered by id, so every phase is a range read in the order of the
+    (field, id) index (scanned backwards for descending orderings) instead
+    of a sort of the whole table.
+
+    Returns `(phases, ordering, limit)`: the querysets to read in turn with
+    `fetch_coin_list_page`. Raises InvalidCoinListQuery.
+    """
+    ordering = params.get("ordering") or "market_cap_rank"
+    field = ordering.lstrip("-")
+    descending = ordering.startswith("-")
+    if field not in COIN_ORDERING_FIELDS:
+        raise InvalidCoinListQuery("並び替え項目が無効です")
+
+    try:
+        limit = int(params.get("limit", COIN_LIST_DEFAULT_LIMIT))
+        if limit > COIN_LIST_MAX_LIMIT:
+            limit = COIN_LIST_MAX_LIMIT
+        elif limit < 1:
+            limit = COIN_LIST_DEFAULT_LIMIT
+    except (ValueError, TypeError):
+        limit = COIN_LIST_DEFAULT_LIMIT
+
+    coins = Coin.objects.all()
+    if projection is not None:
+        coins = coins.only(*projection.fields, field)
+
+    search = params.get("search", "").strip().lower()
+    if search:
+        # Prefix match so the lower(name)/lower(symbol) indexes can be used
+        coins = coins.annotate(
+            name_lower=Lower("name"), symbol_lower=Lower("symbol")
+        ).filter(Q(name_lower__startswith=search) | Q(symbol_lower__startswith=search))
+
+    sign = "-" if descending else ""
+    ranked = coins.filter(**{f"{field}__isnull": False}).order_by(sign + field, sign + "id")
+    nulls = coins.filter(**{f"{field}__isnull": True}).order_by(sign + "id")
+
+    cursor = params.get("cursor")
+    if not cursor:
+        return (ranked, nulls), ordering, limit
+
+    try:
+        cursor_ordering, value, last_id = decode_cursor(cursor)
+    except (InvalidCursor, ValueError):
+        raise InvalidCoinListQuery("カーソルが無効です")
+    if cursor_ordering != ordering or not valid_cursor_key(value, last_id):
+        raise InvalidCoinListQuery("カーソルが無効です")
+
+    # Rows after (value, id), as a range on the index rather than an OR
+    after, seen = ("lt", "gte") if descending else ("gt", "lte")
+    if value is None:
+        return (nulls.filter(**{f"id__{after}": last_id}),), ordering, limit
+    ranked = ranked.filter(**{f"{field}__{after}e": value}).exclude(
+        **{field: value, f"id__{seen}": last_id}
+    )
+    return (ranked, nulls), ordering, limit
+
+
+def fetch_coin_list_page(phases, limit):
+    """
+    Up to `limit + 1` coins from the coin_list_query phases; the extra row
+    tells whether there is a next page
+    """
+    page = []
+    for queryset in phases:
+        page += queryset[: limit + 1 - len(page)]
+        if len(page) > limit:
+            break
+    return page
+
+
+async def afetch_coin_list_page(phases, limit):
+    page = []
+    for queryset in phases:
+        page += [coin async for coin in queryset[: limit + 1 - len(page)]]
+        if len(page) > limit:
+            break
+    return page
+
+
+def coin_list_payload(page, ordering, limit, bookmarked_ids=None,
+                      serializer_class=CoinListSerializer):
+    """
+    Response data for the coins fetched by fetch_coin_list_page.
+    Rows get "is_bookmarked" when `bookmarked_ids` is given.
+    """
+    has_next = len(page) > limit
+    page = page[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = page[-1]
+        next_cursor = encode_cursor([ordering, getattr(last, ordering.lstrip("-")), last.id])
+
+    data = serializer_class(page, many=True).data
+    if bookmarked_ids is not None:
+        data = annotate_bookmarks(data, bookmarked_ids)
+    return {"data": data, "count": len(data), "next": next_cursor}
+
+
+def _coin_list_page(request, bookmarked_ids=None, projection=None):
+    """
+    Paginated coin_list response, or a 400 for invalid parameters
+    """
+    try:
+        phases, ordering, limit = coin_list_query(request.GET, projection)
+    except InvalidCoinListQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer_class = CoinListSerializer if projection is None else projection.serializer_class
+    page = fetch_coin_list_page(phases, limit)
+    return Response(
+        coin_list_payload(page, ordering, limit, bookmarked_ids, serializer_class),
+        status=status.HTTP_200_OK,
+    )
+
+
+def render_coin_rows(encoder, rows, bookmarked_ids=None):
+    """
+    List body for rows encoded by `encoder` (a projection's encoder).
+    Rows get "is_bookmarked" when `bookmarked_ids` is given.
+    """
+    if bookmarked_ids is not None:
+        rows = annotate_bookmarks(rows, bookmarked_ids)
+    return dumps({"data": rows, "count": len(rows)}, has_floats=encoder.has_floats)
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def coin_detail(request, coin_id):
@@ -80,25 +393,191 @@ def coin_detail(request, coin_id):
 
     GET /api/coins/detail/{coin_id}/
 
+    Query Parameters:
+    - fields (optional): Comma-separated fields to return ("id" is always included)
+
+    Supports If-None-Match / If-Modified-Since against the coin's updated_at.
+
     Returns:
-    - 200: Coin detail with all fields
+    - 200: Coin detail with all (or the requested) fields
+    - 304: Not modified since the client's copy
+    - 400: Invalid fields
     - 404: Coin not found
     - 500: Server error
     """
     try:
-        # Try to get the coin by coin_id
-        coin = Coin.objects.get(id=coin_id)
+        projection = parse_fields(request.GET)
+        fields = () if projection is None else projection.fields
+        etag, last_modified = _coin_validators(coin_id, "coin_detail", *fields)
+        not_modified = check_not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
 
-        # Serialize the coin with all fields
-        serializer = CoinSerializer(coin)
+        # Fetch the row as a tuple and encode it like CoinSerializer would
+        encoder = get_row_encoder(CoinSerializer) if projection is None else projection.encoder
+        rows = encoder.encode_queryset(Coin.objects.filter(id=coin_id))
+        if not rows:
+            raise Coin.DoesNotExist
 
-        return Response({"data": serializer.data}, status=status.HTTP_200_OK)
+        response = Response({"data": rows[0]}, status=status.HTTP_200_OK)
+        return set_validators(response, etag, last_modified)
 
     except Coin.DoesNotExist:
         return Response(
             {"error": "コインが見つかりません"}, status=status.HTTP_404_NOT_FOUND
         )
 
+    except InvalidFields as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response(
+            {"error": "サーバーエラーが発生しました"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def coin_batch(request):
+    """
+    Get cryptocurrency detail information for several coins at once
+
+    GET /api/coins/batch?ids=bitcoin,ethereum
+
+    Query Parameters:
+    - ids (required): Comma-separated coin ids, at most COIN_BATCH_MAX_IDS
+      (duplicates are ignored)
+    - fields (optional): Comma-separated fields to return ("id" is always included)
+
+    All coins are read with one query. Supports If-None-Match /
+    If-Modified-Since against the coin data version.
+
+    Returns:
+    - 200: {"data": [...], "count": n, "missing": [...]}; coins in request
+      order, unknown ids listed in "missing"
+    - 304: Not modified since the client's copy
+    - 400: Missing or too many ids, or invalid fields
+    - 500: Server error
+    """
+    # Request order without duplicates
+    ids = list(dict.fromkeys(
+        coin_id.strip() for coin_id in request.GET.get("ids", "").split(",") if coin_id.strip()
+    ))
+    if not ids:
+        return Response(
+            {"error": "idsを指定してください"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(ids) > COIN_BATCH_MAX_IDS:
+        return Response(
+            {"error": f"idsは{COIN_BATCH_MAX_IDS}件まで指定できます"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        projection = parse_fields(request.GET)
+        fields = () if projection is None else projection.fields
+        version = snapshot_cache.current_version()
+        etag = make_etag("coin_batch", *ids, "fields", *fields, version.key)
+        not_modified = check_not_modified(request, etag, version.last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        encoder = get_row_encoder(CoinSerializer) if projection is None else projection.encoder
+        found = {
+            row["id"]: row for row in encoder.encode_queryset(
+                Coin.objects.order_by().filter(id__in=ids)
+            )
+        }
+        data = [found[coin_id] for coin_id in ids if coin_id in found]
+
+        response = SnapshotResponse(
+            dumps(
+                {
+                    "data": data,
+                    "count": len(data),
+                    "missing": [coin_id for coin_id in ids if coin_id not in found],
+                },
+                has_floats=encoder.has_floats,
+            ),
+            status=status.HTTP_200_OK,
+        )
+        return set_validators(response, etag, version.last_modified)
+
+    except InvalidFields as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response(
+            {"error": "サーバーエラーが発生しました"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def coin_price_history(request, coin_id):
+    """
+    Get OHLC price history for a cryptocurrency
+
+    GET /api/coins/detail/{coin_id}/history?interval=1h
+
+    Query Parameters:
+    - interval (optional): Candle size, "1h" or "1d" (default: 1h)
+    - limit (optional): Number of latest candles (default: 168, max: 1000)
+
+    Supports If-None-Match / If-Modified-Since against the coin's updated_at.
+
+    Returns:
+    - 200: Candles in ascending time order
+    - 304: Not modified since the client's copy
+    - 400: Invalid interval
+    - 404: Coin not found
+    - 500: Server error
+    """
+    interval = request.GET.get("interval", "1h")
+    if interval not in ROLLUP_INTERVALS:
+        return Response(
+            {"error": "intervalは1hまたは1dを指定してください"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Validate and set limit (default: 168, max: 1000)
+    try:
+        limit = int(request.GET.get("limit", 168))
+        if limit > 1000:
+            limit = 1000
+        elif limit < 1:
+            limit = 168
+    except (ValueError, TypeError):
+        limit = 168
+
+    try:
+        try:
+            # Rollups are written by the same ingest that bumps updated_at
+            etag, last_modified = _coin_validators(coin_id, "history", interval, limit)
+        except Coin.DoesNotExist:
+            return Response(
+                {"error": "コインが見つかりません"}, status=status.HTTP_404_NOT_FOUND
+            )
+        not_modified = check_not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        candles = get_price_history(coin_id, interval, limit)
+        serializer = PriceCandleSerializer(candles, many=True)
+
+        response = Response(
+            {
+                "coin_id": coin_id,
+                "interval": interval,
+                "data": serializer.data,
+                "count": len(serializer.data),
+            },
+            status=status.HTTP_200_OK,
+        )
+        return set_validators(response, etag, last_modified)
+
     except Exception as e:
         return Response(
             {"error": "サーバーエラーが発生しました"},
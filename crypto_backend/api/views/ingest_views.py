@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework import status
+from ..ingest import ingest_payload
+
+
+def _has_ingest_token(request):
+    token = settings.INGEST_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, credentials = header.partition(' ')
+    return bool(token) and scheme == 'Bearer' and constant_time_compare(credentials, token)
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def ingest_markets(request):
+    """
+    Ingest a CoinGecko /coins/markets payload (called by the scheduled Lambda)
+
+    POST /api/internal/ingest/
+
+    Headers:
+    - Authorization: Bearer <INGEST_TOKEN>
+
+    Body: the /coins/markets JSON array, as returned by CoinGecko
+
+    Runs the same ingest as `manage.py ingest_coins`: one transaction that
+    upserts the changed coins, records price ticks, fills crossed orders and
+    re-values the affected portfolios.
+
+    Returns:
+    - 200: Ingest counts and timings
+    - 400: Body is not a JSON array
+    - 403: Missing or wrong ingest token (or INGEST_TOKEN unset)
+    - 500: Server error
+    """
+    if not _has_ingest_token(request):
+        return Response({
+            'error': '認証に失敗しました'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    if not isinstance(request.data, list):
+        return Response({
+            'error': 'コインデータの配列を送信してください'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = ingest_payload(request.data)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'サーバーエラーが発生しました'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
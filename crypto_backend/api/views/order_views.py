@@ -0,0 +1,146 @@
+from django.db import transaction
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.utils import timezone
+from ..serializers import OrderCreateSerializer, PendingOrderSerializer
+from ..models import Coin, PendingOrder
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def order_create(request):
+    """
+    Place a limit or stop order
+
+    POST /api/orders/
+
+    Expected data:
+    {
+        "coin_id": "bitcoin",
+        "side": "BUY",
+        "order_type": "LIMIT",
+        "trigger_price": "45000",
+        "quantity": "0.5"
+    }
+
+    The order rests until an ingest moves the coin's price across
+    trigger_price, then it is filled at that price (or rejected when the
+    balance or holdings no longer cover it).
+
+    Returns:
+    - 201: Order placed
+    - 400: Validation errors or coin not found
+    - 500: Server error
+    """
+    serializer = OrderCreateSerializer(data=request.data)
+
+    if not serializer.is_valid():
+        return Response({
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        coin = Coin.objects.get(id=serializer.validated_data['coin_id'])
+
+        order = PendingOrder.objects.create(
+            user=request.user,
+            coin=coin,
+            side=serializer.validated_data['side'],
+            order_type=serializer.validated_data['order_type'],
+            trigger_price=serializer.validated_data['trigger_price'],
+            quantity=serializer.validated_data['quantity']
+        )
+
+        return Response({
+            'message': '注文を受け付けました',
+            'order': PendingOrderSerializer(order).data
+        }, status=status.HTTP_201_CREATED)
+
+    except Coin.DoesNotExist:
+        return Response({
+            'error': '指定されたコインが見つかりません'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': 'サーバーエラーが発生しました'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def order_cancel(request, order_id):
+    """
+    Cancel an open order
+
+    DELETE /api/orders/{order_id}/
+
+    Returns:
+    - 200: Order cancelled
+    - 400: Order is no longer open
+    - 404: Order not found
+    - 500: Server error
+    """
+    try:
+        with transaction.atomic():
+            # Lock the order so it cannot be filled while being cancelled
+            order = PendingOrder.objects.select_for_update().get(id=order_id, user=request.user)
+
+            if order.status != 'OPEN':
+                return Response({
+                    'error': 'この注文は取り消せません'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            order.status = 'CANCELLED'
+            order.closed_at = timezone.now()
+            order.save(update_fields=['status', 'closed_at'])
+
+        return Response({
+            'message': '注文を取り消しました',
+            'order_id': order.id
+        }, status=status.HTTP_200_OK)
+
+    except PendingOrder.DoesNotExist:
+        return Response({
+            'error': '注文が見つかりません'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({
+            'error': 'サーバーエラーが発生しました'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_orders(request):
+    """
+    List the user's limit and stop orders, newest first
+
+    GET /api/user/orders/
+
+    Query Parameters:
+    - status (optional): OPEN, FILLED, CANCELLED or REJECTED
+
+    Returns:
+    - 200: List of orders
+    - 500: Server error
+    """
+    try:
+        orders = PendingOrder.objects.filter(user=request.user).select_related('coin').order_by('-created_at', '-id')
+
+        order_status = request.GET.get('status')
+        if order_status:
+            orders = orders.filter(status=order_status.upper())
+
+        serializer = PendingOrderSerializer(orders, many=True)
+
+        return Response({
+            'data': serializer.data,
+            'count': len(serializer.data)
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'サーバーエラーが発生しました'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from ..price_stream import HEARTBEAT, price_hub
+import time
+
+
+async def _event_stream(last_event_id):
+    """
+    SSE body: reconnect delay, then hub events and keep-alive comments until
+    PRICE_STREAM_MAX_SECONDS, after which the browser reconnects with
+    Last-Event-ID
+    """
+    yield b'retry: %d\n\n' % settings.PRICE_STREAM_RETRY_MS
+    deadline = time.monotonic() + settings.PRICE_STREAM_MAX_SECONDS
+    events = price_hub.subscribe(last_event_id)
+    try:
+        async for event in events:
+            yield b': keep-alive\n\n' if event is HEARTBEAT else event.payload
+            if time.monotonic() >= deadline:
+                break
+    finally:
+        await events.aclose()
+
+
+async def coin_price_stream(request):
+    """
+    Stream coin price changes as Server-Sent Events
+
+    GET /api/coins/stream
+
+    Requires an ASGI server (see crypto_backend/asgi.py).
+
+    Headers / query parameters:
+    - Last-Event-ID (or ?last_event_id=): resume after this event
+
+    Events:
+    - prices: {"coins": [{id, current_price, ...}]} for coins whose price changed
+    - reset: missed events are gone; re-fetch /api/coins/list
+
+    Returns:
+    - 200: text/event-stream
+    - 400: Invalid Last-Event-ID
+    - 405: Method not allowed
+    - 501: Served over WSGI
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'このエンドポイントはASGIサーバーでのみ利用できます'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Last-Event-IDが不正です'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        _event_stream(last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,10 +3,15 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from ..serializers import TradeBuySerializer, TradeSellSerializer, PortfolioSerializer, WalletSerializer, TradeHistorySerializer
-from ..models import BankBalance, Wallet, TradeHistory, Coin
+from ..serializers import TradeBuySerializer, TradeSellSerializer, TradeBatchSerializer, PortfolioSerializer, WalletSerializer, TradeHistorySerializer
+from ..models import BankBalance, Wallet, TradeHistory, Coin, PortfolioValuation, quantize_money
 from decimal import Decimal
 from django.core.paginator import Paginator, EmptyPage
+from ..ledger import Ledger, TradeRejected
+from ..pagination import (
+    InvalidCursor, before_datetime_cursor, decode_datetime_cursor, encode_datetime_cursor,
+)
+from ..portfolio import get_portfolio_valuation, refresh_user_portfolio
 
 
 @api_view(['POST'])
@@ -23,9 +28,12 @@ def trade_buy(request):
         "quantity": "0.5"
     }
     
+    Runs in one transaction that reads each row once, locking the bank
+    balance and wallet, and validates against those rows.
+    
     Returns:
     - 201: Purchase completed successfully
-    - 400: Validation errors or insufficient balance
+    - 400: Validation errors, unknown coin or insufficient balance
     """
     serializer = TradeBuySerializer(data=request.data, context={'request': request})
     
@@ -40,14 +48,21 @@ def trade_buy(request):
     
     try:
         with transaction.atomic():
-            # Lock user's BankBalance record
+            # One read per row; all checks run against these locked values.
+            # The BankBalance lock is always taken first (buy and sell) and
+            # serializes this user's trades, so the Wallet insert below
+            # cannot race with another request.
             bank_balance = BankBalance.objects.select_for_update().get(user=user)
             
             # Get coin and calculate total cost
             coin = Coin.objects.get(id=coin_id)
-            total_cost = quantity * coin.current_price
+            if coin.current_price is None:
+                return Response({
+                    'error': 'コインの価格情報が利用できません'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            total_cost = quantize_money(quantity * coin.current_price)
             
-            # Verify sufficient balance (double-check)
+            # Verify sufficient balance
             if bank_balance.cash_balance < total_cost:
                 return Response({
                     'error': '残高が不足しています'
@@ -58,19 +73,19 @@ def trade_buy(request):
             
             # Deduct from bank balance
             bank_balance.cash_balance -= total_cost
-            bank_balance.save()
-            
-            # Get or create Wallet entry
-            wallet, created = Wallet.objects.select_for_update().get_or_create(
-                user=user,
-                coin=coin,
-                defaults={'quantity': 0}
-            )
+            bank_balance.save(update_fields=['cash_balance', 'last_updated_at'])
             
-            # Add purchased quantity to wallet
-            wallet.quantity += quantity
+            # Add purchased quantity to the (locked) wallet, creating it if needed
+            wallet = Wallet.objects.select_for_update().filter(user=user, coin=coin).first()
+            if wallet is None:
+                wallet = Wallet(user=user, coin=coin, quantity=quantity)
+            else:
+                wallet.quantity += quantity
             wallet.save()
             
+            # Re-derive the materialized portfolio value from the wallets
+            refresh_user_portfolio(user)
+            
             # Create TradeHistory record
             TradeHistory.objects.create(
                 user=user,
@@ -125,7 +140,7 @@ def trade_sell(request):
     
     Returns:
     - 200: Sale completed successfully
-    - 400: Validation errors, insufficient quantity, or coin not owned
+    - 400: Validation errors, unknown coin, insufficient quantity, or coin not owned
     """
     serializer = TradeSellSerializer(data=request.data, context={'request': request})
     
@@ -140,26 +155,33 @@ def trade_sell(request):
     
     try:
         with transaction.atomic():
-            # Lock user's Wallet record
-            try:
-                wallet = Wallet.objects.select_for_update().get(user=user, coin_id=coin_id)
-            except Wallet.DoesNotExist:
+            # Same lock order as trade_buy: BankBalance, then Wallet
+            bank_balance = BankBalance.objects.select_for_update().get(user=user)
+            
+            # Lock only the wallet row; the joined coin stays unlocked
+            wallet = Wallet.objects.select_for_update(of=('self',)).select_related('coin').filter(
+                user=user, coin_id=coin_id
+            ).first()
+            if wallet is None:
+                if not Coin.objects.filter(id=coin_id).exists():
+                    raise Coin.DoesNotExist
                 return Response({
                     'error': 'このコインを保有していません'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Verify sufficient quantity (double-check)
+            # Verify sufficient quantity
             if wallet.quantity < quantity:
                 return Response({
                     'error': '保有数量が不足しています'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Lock user's BankBalance record
-            bank_balance = BankBalance.objects.select_for_update().get(user=user)
-            
-            # Get coin and calculate total proceeds
-            coin = Coin.objects.get(id=coin_id)
-            total_proceeds = quantity * coin.current_price
+            # Calculate total proceeds
+            coin = wallet.coin
+            if coin.current_price is None:
+                return Response({
+                    'error': 'コインの価格情報が利用できません'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            total_proceeds = quantize_money(quantity * coin.current_price)
             
             # Store balance before trade
             balance_before = bank_balance.cash_balance
@@ -171,11 +193,14 @@ def trade_sell(request):
             if wallet.quantity == 0:
                 wallet.delete()
             else:
-                wallet.save()
+                wallet.save(update_fields=['quantity', 'last_updated_at'])
             
             # Add proceeds to bank balance
             bank_balance.cash_balance += total_proceeds
-            bank_balance.save()
+            bank_balance.save(update_fields=['cash_balance', 'last_updated_at'])
+            
+            # Re-derive the materialized portfolio value from the wallets
+            refresh_user_portfolio(user)
             
             # Create TradeHistory record
             TradeHistory.objects.create(
@@ -215,6 +240,96 @@ def trade_sell(request):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def trade_batch(request):
+    """
+    Batch trade endpoint
+    
+    POST /api/trades/batch/
+    
+    Expected data:
+    {
+        "legs": [
+            {"coin_id": "bitcoin", "side": "SELL", "quantity": "0.1"},
+            {"coin_id": "ethereum", "side": "BUY", "quantity": "2"}
+        ]
+    }
+    
+    Legs are executed in the given order at current prices inside one
+    transaction. The bank balance and all involved wallets are locked once
+    (bank balance first, wallets by id); if any leg fails nothing is executed.
+    
+    Returns:
+    - 201: All legs executed
+    - 400: Validation errors, or the first failing leg ("leg" is its index)
+    """
+    serializer = TradeBatchSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response({
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = request.user
+    legs = serializer.validated_data['legs']
+    coin_ids = sorted({leg['coin_id'] for leg in legs})
+    
+    try:
+        with transaction.atomic():
+            ledger = Ledger([user.id], coin_ids)
+            if ledger.balance_of(user.id) is None:
+                raise BankBalance.DoesNotExist
+            
+            coins = Coin.objects.in_bulk(coin_ids)
+            
+            # Apply every leg in memory; nothing is written until all pass
+            for index, leg in enumerate(legs):
+                coin = coins.get(leg['coin_id'])
+                if coin is None:
+                    error = '指定されたコインが見つかりません'
+                elif coin.current_price is None:
+                    error = 'コインの価格情報が利用できません'
+                else:
+                    try:
+                        ledger.fill(user.id, coin.id, leg['side'], leg['quantity'], coin.current_price)
+                        continue
+                    except TradeRejected as e:
+                        error = e.message
+                return Response({
+                    'error': error,
+                    'leg': index
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            trades = ledger.save()
+            
+            return Response({
+                'message': '取引が完了しました',
+                'trades': [
+                    {
+                        'coin_id': trade.coin_id,
+                        'coin_name': coins[trade.coin_id].name,
+                        'side': trade.trade_type,
+                        'quantity': str(trade.trade_quantity),
+                        'price_per_coin': str(trade.trade_price_per_coin),
+                        'total': str(quantize_money(trade.trade_quantity * trade.trade_price_per_coin))
+                    }
+                    for trade in trades
+                ],
+                'new_balance': str(ledger.balance_of(user.id))
+            }, status=status.HTTP_201_CREATED)
+            
+    except BankBalance.DoesNotExist:
+        return Response({
+            'error': '銀行残高が見つかりません'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': 'サーバーエラーが発生しました'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_portfolio(request):
@@ -223,6 +338,10 @@ def user_portfolio(request):
     
     GET /api/user/portfolio/
     
+    Query Parameters:
+    - summary (optional): "1" to return only the totals, read from the
+      materialized valuation row without loading wallets
+    
     Returns:
     - 200: Portfolio data with bank balance, wallets, and computed totals
     - 400: Missing data errors
@@ -230,29 +349,29 @@ def user_portfolio(request):
     user = request.user
     
     try:
-        # Fetch user's BankBalance
-        bank_balance = BankBalance.objects.get(user=user)
-        
-        # Fetch all Wallet entries with select_related for Coin data
-        wallets = Wallet.objects.filter(user=user).select_related('coin')
+        # Fetch user's BankBalance together with the materialized valuation
+        bank_balance = BankBalance.objects.select_related('user__portfolio_valuation').get(user=user)
+        try:
+            valuation = bank_balance.user.portfolio_valuation
+        except PortfolioValuation.DoesNotExist:
+            valuation = get_portfolio_valuation(user)
         
-        # Calculate current_value for each wallet and total_portfolio_value
-        total_portfolio_value = Decimal('0')
-        for wallet in wallets:
-            if wallet.coin.current_price is not None:
-                total_portfolio_value += wallet.quantity * wallet.coin.current_price
+        total_portfolio_value = valuation.total_value
         
         # Calculate total_assets (bank_balance + total_portfolio_value)
         total_assets = bank_balance.cash_balance + total_portfolio_value
         
-        # Serialize data using PortfolioSerializer
         portfolio_data = {
             'bank_balance': bank_balance.cash_balance,
-            'wallets': wallets,
             'total_portfolio_value': total_portfolio_value,
             'total_assets': total_assets
         }
         
+        if request.GET.get('summary') != '1':
+            # Fetch all Wallet entries with select_related for Coin data
+            portfolio_data['wallets'] = Wallet.objects.filter(user=user).select_related('coin')
+        
+        # Serialize data using PortfolioSerializer
         serializer = PortfolioSerializer(portfolio_data)
         
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -279,15 +398,19 @@ def user_trade_history(request):
     Query Parameters:
     - page (optional): Page number for pagination
     - page_size (optional): Items per page (default: 20, max: 100)
+    - cursor (optional): Switch to cursor pagination. Send it empty for the
+      first page, then pass back the returned `next` value. Cursor pages
+      skip the total count and cost the same at any depth.
     
     Returns:
     - 200: Paginated trade history data
+    - 400: Invalid cursor
     """
     user = request.user
     
     try:
         # Fetch user's TradeHistory records with select_related for Coin data
-        trade_history = TradeHistory.objects.filter(user=user).select_related('coin').order_by('-created_at')
+        trade_history = TradeHistory.objects.filter(user=user).select_related('coin').order_by('-created_at', '-id')
         
         # Get pagination parameters
         page = request.GET.get('page', 1)
@@ -303,6 +426,9 @@ def user_trade_history(request):
         except (ValueError, TypeError):
             page_size = 20
         
+        if 'cursor' in request.GET:
+            return _trade_history_cursor_page(trade_history, request.GET['cursor'], page_size)
+        
         # Validate page number
         try:
             page = int(page)
@@ -339,3 +465,38 @@ def user_trade_history(request):
         return Response({
             'error': 'サーバーエラーが発生しました'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+def _trade_history_cursor_page(trade_history, cursor, page_size):
+    """
+    Keyset page of trade history ordered by (created_at, id) descending.
+    Served by the (user_id, created_at DESC, id DESC) index without COUNT or OFFSET.
+    """
+    if cursor:
+        try:
+            created_at, last_id = decode_datetime_cursor(cursor)
+        except InvalidCursor:
+            return Response({
+                'error': 'カーソルが無効です'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        trade_history = before_datetime_cursor(trade_history, created_at, last_id)
+    
+    # Fetch one extra row to know whether another page exists
+    trades = list(trade_history[:page_size + 1])
+    has_next = len(trades) > page_size
+    trades = trades[:page_size]
+    
+    next_cursor = None
+    if has_next:
+        last = trades[-1]
+        next_cursor = encode_datetime_cursor(last.created_at, last.id)
+    
+    serializer = TradeHistorySerializer(trades, many=True)
+    
+    return Response({
+        'data': serializer.data,
+        'page_size': page_size,
+        'next': next_cursor
+    }, status=status.HTTP_200_OK)
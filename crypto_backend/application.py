@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 """
-WSGI config for crypto_backend project for Elastic Beanstalk.
+WSGI config for crypto_backend project.
+
+Elastic Beanstalk runs the ASGI application instead (see Procfile), which
+serves the async coin views and the price stream; this entry point is kept
+for running under a plain WSGI server.
 """
 
 import os
@@ -0,0 +1,43 @@
+"""
+Offline benchmarks for the crypto backend.
+
+Run from the crypto_backend directory, e.g.:
+    python -m benchmarks.numeric_policy
+    python -m benchmarks.loadtest --requests 300 --concurrency 8
+    python -m benchmarks.connections --database postgresql
+    python -m benchmarks.compression --coins 2000
+    python -m benchmarks.login --iterations 0,100000
+    python -m benchmarks.fast_json --coins 5000
+"""
+import os
+import time
+
+SAMPLE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'lambda',
+    'api-response-sample.json',
+)
+
+
+def setup_django(settings_module='crypto_backend.settings'):
+    """
+    Configure Django for a standalone benchmark script
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def timed(func, repeat=5):
+    """
+    Run `func` `repeat` times and return (best_ms, last_result)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
@@ -0,0 +1,100 @@
+"""
+Bytes on the wire and CPU per request for compressed coin payloads.
+
+Seeds a temporary SQLite database, then requests the snapshot-backed coin
+endpoints with each content coding:
+
+    identity              no Accept-Encoding
+    gzip                  precompressed once per data version (api/compression.py);
+                          "first ms" is the request that pays for compressing
+    br                    same, when the brotli package is installed
+    gzip per request      the identity response passed through Django's
+                          GZipMiddleware, i.e. compressing on every request
+
+Usage:
+    python -m benchmarks.compression
+    python -m benchmarks.compression --coins 5000 --requests 500
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import setup_django
+from .loadtest import prepare_database
+from .seed import SeedVolumes, seed
+
+
+def measure(call, requests):
+    """
+    Run `call` `requests` times after a first call; returns (last response,
+    first call ms, wall ms, CPU ms) per request
+    """
+    first_started = time.perf_counter()
+    response = call()
+    first = (time.perf_counter() - first_started) * 1000
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(requests):
+        response = call()
+    wall = (time.perf_counter() - wall_started) * 1000 / requests
+    cpu = (time.process_time() - cpu_started) * 1000 / requests
+    return response, first, wall, cpu
+
+
+def modes(client, url):
+    """
+    `(label, call)` pairs for one URL
+    """
+    from django.middleware.gzip import GZipMiddleware
+    from django.test import RequestFactory
+
+    from api.compression import available_encodings
+
+    for encoding in (None, *available_encodings()):
+        headers = {'HTTP_ACCEPT_ENCODING': encoding} if encoding else {}
+        yield encoding or 'identity', lambda headers=headers: client.get(url, **headers)
+
+    request = RequestFactory(SERVER_NAME='localhost').get(url, HTTP_ACCEPT_ENCODING='gzip')
+    middleware = GZipMiddleware(lambda request: None)
+    yield 'gzip per request', lambda: middleware.process_response(request, client.get(url))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--coins', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=300, help='requests per mode')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+    os.environ['DB_ENGINE'] = 'sqlite3'
+    # Keep the data version fixed for the whole run
+    os.environ['COIN_SNAPSHOT_VERSION_TTL'] = '3600'
+    setup_django()
+    cleanup = prepare_database('sqlite')
+
+    try:
+        from django.test import Client
+        from django.urls import reverse
+
+        seed(SeedVolumes(coins=args.coins, users=1, bookmarks=0, wallets=0, trades=0, orders=0))
+        client = Client(SERVER_NAME='localhost')
+
+        header = f"{'endpoint':<16} {'coding':<18} {'bytes':>10} {'ratio':>7} {'first ms':>9} {'ms/req':>8} {'cpu ms':>8}"
+        sys.stdout.write(header + '\n' + '-' * len(header) + '\n')
+        for name in ('coin_list', 'coin_top10_list'):
+            url = reverse(name)
+            identity_size = None
+            for label, call in modes(client, url):
+                response, first, wall, cpu = measure(call, args.requests)
+                size = len(response.content)
+                identity_size = identity_size or size
+                sys.stdout.write(
+                    f'{name:<16} {label:<18} {size:>10} {size / identity_size:>7.1%} {first:>9.1f} '
+                    f'{wall:>8.3f} {cpu:>8.3f}\n'
+                )
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
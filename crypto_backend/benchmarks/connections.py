@@ -0,0 +1,218 @@
+"""
+Measure how much request latency goes into opening database connections.
+
+Seeds a throwaway database, then serves the same request through Django's
+real WSGI handler (so connections are closed or kept exactly as under
+gunicorn) once per connection mode, each in a fresh process configured
+through the DB_* environment variables:
+
+    per-request  DB_CONN_MAX_AGE=0   a new connection for every request
+    persistent   DB_CONN_MAX_AGE=60  each thread keeps its connection
+    pool         DB_POOL=True        psycopg 3 pool (PostgreSQL only)
+
+For each mode it reports latency percentiles, how many connections were
+obtained and the share of request time spent obtaining them. On SQLite a
+connection is a file open, so run it against PostgreSQL (ideally the RDS
+endpoint over TLS) to see the real cost.
+
+Usage:
+    python -m benchmarks.connections
+    python -m benchmarks.connections --database postgresql --requests 500 --threads 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import setup_django
+from .loadtest import percentile, prepare_database
+from .seed import SeedVolumes, seed
+
+MODES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def instrument_connects(samples):
+    """
+    Record the milliseconds every new connection (or pool checkout) takes
+    """
+    from django.db import connections
+
+    wrapper_class = type(connections['default'])
+    get_new_connection = wrapper_class.get_new_connection
+    lock = threading.Lock()
+
+    def timed_get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            return get_new_connection(self, conn_params)
+        finally:
+            with lock:
+                samples.append((time.perf_counter() - started) * 1000)
+
+    wrapper_class.get_new_connection = timed_get_new_connection
+
+
+def run_mode(path, requests, threads):
+    """
+    Serve `requests` GETs of `path` from `threads` threads through the WSGI
+    handler and return the timings. Runs inside the per-mode child process.
+    """
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+    from django.test import RequestFactory
+
+    application = get_wsgi_application()
+    factory = RequestFactory(SERVER_NAME='localhost')
+    connects = []
+    instrument_connects(connects)
+
+    def start_response(status, headers):
+        statuses.append(int(status.split()[0]))
+
+    def call(_):
+        started = time.perf_counter()
+        response = application(factory.get(path).environ, start_response)
+        for _ in response:
+            pass
+        # Fires request_finished, which closes or keeps the connection
+        response.close()
+        return (time.perf_counter() - started) * 1000
+
+    statuses = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    connection = connections['default']
+    if hasattr(connection, 'close_pool'):
+        connection.close_pool()
+
+    return {
+        'requests': requests,
+        'errors': sum(1 for status in statuses if status != 200),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': sum(latencies) / requests,
+        'throughput_rps': requests / elapsed,
+        'connects': len(connects),
+        'connect_mean_ms': sum(connects) / len(connects) if connects else 0.0,
+        'connect_share': sum(connects) / sum(latencies) if latencies else 0.0,
+    }
+
+
+def spawn_mode(mode, database, db_name, path, requests, threads):
+    """
+    Run one mode in a child process so settings.DATABASES is rebuilt from
+    the mode's environment variables
+    """
+    env = {**os.environ, **MODES[mode], 'DEBUG': 'False', 'DB_NAME': db_name}
+    if database == 'sqlite':
+        env['DB_ENGINE'] = 'sqlite3'
+    if 'RDS_HOSTNAME' in env:
+        env['RDS_DB_NAME'] = db_name
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.connections', '--child', mode,
+         '--path', path, '--requests', str(requests), '--threads', str(threads)],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f'{mode} run failed:\n{completed.stderr}')
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def print_report(results, out=sys.stdout):
+    header = (f"{'mode':<12} {'req':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'req/s':>8} {'conns':>6} {'conn ms':>8} {'in conn':>8}")
+    out.write(header + '\n' + '-' * len(header) + '\n')
+    for mode, row in results['modes'].items():
+        out.write(
+            f"{mode:<12} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['throughput_rps']:>8.1f} "
+            f"{row['connects']:>6} {row['connect_mean_ms']:>8.2f} "
+            f"{row['connect_share']:>7.1%}\n"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', choices=['sqlite', 'postgresql'], default='sqlite',
+                        help='sqlite: temporary file; postgresql: test database on the '
+                             'server configured by DB_* settings')
+    parser.add_argument('--modes', help=f"comma-separated subset of {', '.join(MODES)} "
+                                        '(default: all that apply)')
+    parser.add_argument('--requests', type=int, default=300, help='requests per mode')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='request threads per worker (gthread workers)')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--child', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+
+    if args.child:
+        setup_django()
+        print(json.dumps(run_mode(args.path, args.requests, args.threads)))
+        return
+
+    modes = args.modes.split(',') if args.modes else [
+        mode for mode in MODES if mode != 'pool' or args.database == 'postgresql'
+    ]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode: {', '.join(sorted(unknown))}")
+    if 'pool' in modes and args.database != 'postgresql':
+        parser.error('the pool mode needs --database postgresql')
+
+    if args.database == 'sqlite':
+        os.environ['DB_ENGINE'] = 'sqlite3'
+    setup_django()
+    cleanup = prepare_database(args.database)
+
+    try:
+        from django.db import connection
+        from django.urls import reverse
+
+        data = seed(SeedVolumes(coins=50, users=1, bookmarks=0, wallets=0, trades=0, orders=0))
+        path = reverse('coin_detail', args=[data.coin_ids[0]])
+        db_name = connection.settings_dict['NAME']
+        # Children open their own connections; keep this one out of the way
+        connection.close()
+
+        results = {
+            'meta': {
+                'database': connection.vendor,
+                'path': path,
+                'requests': args.requests,
+                'threads': args.threads,
+            },
+            'modes': {
+                mode: spawn_mode(mode, args.database, db_name, path, args.requests, args.threads)
+                for mode in modes
+            },
+        }
+    finally:
+        cleanup()
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare DRF serialization with the fast row encoder (api/fast_json.py).
+
+Seeds a temporary SQLite database with --coins coins, then renders the whole
+table as the `{"data": [...], "count": n}` list body with:
+
+    drf     serializer(queryset, many=True).data passed to JSONRenderer
+    fast    render_list(), the path behind the coin snapshots
+
+for CoinListSerializer and CoinSerializer, and checks the bodies are
+byte-identical. Both paths include the query.
+
+Usage:
+    python -m benchmarks.fast_json
+    python -m benchmarks.fast_json --coins 5000 --repeat 5
+"""
+import argparse
+import os
+import sys
+
+from . import setup_django, timed
+from .loadtest import prepare_database
+from .seed import SeedVolumes, seed
+
+
+def drf_render(serializer_class, queryset):
+    from rest_framework.renderers import JSONRenderer
+
+    data = serializer_class(queryset, many=True).data
+    return JSONRenderer().render({'data': data, 'count': len(data)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per path; the best is reported')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+    os.environ['DB_ENGINE'] = 'sqlite3'
+    setup_django()
+    cleanup = prepare_database('sqlite')
+
+    try:
+        from api import fast_json
+        from api.fast_json import render_list
+        from api.models import Coin
+        from api.serializers import CoinListSerializer, CoinSerializer
+
+        seed(SeedVolumes(coins=args.coins, users=1, bookmarks=0, wallets=0, trades=0, orders=0))
+        queryset = Coin.objects.all()
+
+        sys.stdout.write(
+            f'{queryset.count()} coins, orjson '
+            f"{'installed' if fast_json.orjson is not None else 'not installed'}\n"
+        )
+        header = f"{'serializer':<20} {'drf ms':>9} {'fast ms':>9} {'speedup':>8} {'KiB':>9} {'identical':>10}"
+        sys.stdout.write(header + '\n' + '-' * len(header) + '\n')
+        for serializer_class in (CoinListSerializer, CoinSerializer):
+            drf_ms, drf_body = timed(lambda: drf_render(serializer_class, queryset), args.repeat)
+            fast_ms, (fast_body, _) = timed(
+                lambda: render_list(serializer_class, queryset), args.repeat
+            )
+            sys.stdout.write(
+                f'{serializer_class.__name__:<20} {drf_ms:>9.1f} {fast_ms:>9.1f} '
+                f'{drf_ms / fast_ms:>7.1f}x {len(fast_body) / 1024:>9.1f} '
+                f"{'yes' if fast_body == drf_body else 'NO':>10}\n"
+            )
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+"""
+Load test every API endpoint against a freshly seeded database.
+
+Seeds a throwaway database (a temporary SQLite file by default, or a test
+database on the configured PostgreSQL server), then drives each endpoint in
+api/urls.py with a pool of in-process API clients and reports, per
+scenario: p50/p95/p99 latency, throughput and SQL statements per request.
+
+Results can be saved as JSON and compared with a stored baseline; the run
+exits with status 1 when a scenario regresses beyond the tolerances.
+
+Usage:
+    python -m benchmarks.loadtest --coins 2000 --users 100 --requests 300 --concurrency 8
+    python -m benchmarks.loadtest --output baseline.json
+    python -m benchmarks.loadtest --baseline baseline.json --tolerance 0.25
+    python -m benchmarks.loadtest --database postgresql --only coin_list,user_portfolio
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import setup_django
+from .seed import BENCH_PASSWORD, SeedVolumes, seed
+
+
+class Scenario:
+    """
+    One endpoint call pattern. `build(ctx, i)` returns
+    `(method, path, data, token)` for iteration `i`; any untimed setup it
+    needs happens inside build. `after(ctx, i, response)` may record state.
+    """
+
+    def __init__(self, label, url_name, build, expect=(200,), after=None, writes=False):
+        self.label = label
+        self.url_name = url_name
+        self.build = build
+        self.expect = expect
+        self.after = after
+        self.writes = writes
+
+
+class Context:
+    """
+    Seeded data shared by the scenarios
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.order_ids = {}
+        self._serial = itertools.count()
+        self._lock = threading.Lock()
+
+    def user(self, i):
+        return self.data.users[i % len(self.data.users)]
+
+    def coin(self, i):
+        return self.data.coin_ids[i % len(self.data.coin_ids)]
+
+    def head_coin(self, i):
+        """
+        Coin i // users from the unbookmarked head of the list, so (user, coin)
+        pairs do not repeat across iterations
+        """
+        return self.data.coin_ids[(i // len(self.data.users)) % (len(self.data.coin_ids) // 2)]
+
+    def serial(self):
+        with self._lock:
+            return next(self._serial)
+
+
+def _path(url_name, *args):
+    from django.urls import reverse
+
+    return reverse(url_name, args=args)
+
+
+def _throwaway_token(ctx, i):
+    """
+    A token for a user of its own: logging out deletes it, and seeded users'
+    tokens are still needed by later scenarios
+    """
+    from rest_framework.authtoken.models import Token
+    from api.models import User
+
+    email = f'logout{ctx.serial()}@example.com'
+    user = User.objects.create(email=email, username=email, name='logout')
+    return Token.objects.create(user=user).key
+
+
+def _remember_order(ctx, i, response):
+    if response.status_code == 201:
+        ctx.order_ids[i] = response.data['order']['id']
+
+
+def scenarios():
+    """
+    All scenarios, in run order (writes that later scenarios depend on first)
+    """
+    return [
+        Scenario('coin_top10_list', 'coin_top10_list',
+                 lambda ctx, i: ('get', _path('coin_top10_list'), None, None)),
+        Scenario('coin_list', 'coin_list',
+                 lambda ctx, i: ('get', _path('coin_list'), None, None)),
+        Scenario('coin_list?limit=50&ordering=-market_cap', 'coin_list',
+                 lambda ctx, i: ('get', _path('coin_list') + '?limit=50&ordering=-market_cap',
+                                 None, None)),
+        Scenario('coin_list?with_bookmarks=1', 'coin_list',
+                 lambda ctx, i: ('get', _path('coin_list') + '?with_bookmarks=1', None,
+                                 ctx.user(i)[2])),
+        Scenario('coin_list?fields', 'coin_list',
+                 lambda ctx, i: ('get', _path('coin_list')
+                                 + '?fields=current_price,price_change_percentage_24h',
+                                 None, None)),
+        Scenario('coin_list?search', 'coin_list',
+                 lambda ctx, i: ('get', _path('coin_list') + '?search=' + ctx.coin(i)[:3],
+                                 None, None)),
+        Scenario('coin_detail', 'coin_detail',
+                 lambda ctx, i: ('get', _path('coin_detail', ctx.coin(i)), None, None)),
+        Scenario('coin_detail?fields', 'coin_detail',
+                 lambda ctx, i: ('get', _path('coin_detail', ctx.coin(i))
+                                 + '?fields=current_price,price_change_percentage_24h',
+                                 None, None)),
+        Scenario('coin_batch', 'coin_batch',
+                 lambda ctx, i: ('get', _path('coin_batch') + '?ids='
+                                 + ','.join(ctx.coin(i + n) for n in range(20)), None, None)),
+        Scenario('coin_price_history', 'coin_price_history',
+                 lambda ctx, i: ('get', _path('coin_price_history', ctx.coin(i)), None, None)),
+        Scenario('register', 'register',
+                 lambda ctx, i: ('post', _path('register'), {
+                     'email': f'new{ctx.serial()}@example.com', 'name': 'new',
+                     'password': BENCH_PASSWORD}, None),
+                 expect=(201,), writes=True),
+        Scenario('login', 'login',
+                 lambda ctx, i: ('post', _path('login'), {
+                     'email': ctx.user(i)[1], 'password': BENCH_PASSWORD}, None),
+                 writes=True),
+        Scenario('logout', 'logout',
+                 lambda ctx, i: ('post', _path('logout'), None, _throwaway_token(ctx, i)),
+                 writes=True),
+        Scenario('bookmark_create', 'bookmark_create',
+                 lambda ctx, i: ('post', _path('bookmark_create'),
+                                 {'coin_id': ctx.head_coin(i)}, ctx.user(i)[2]),
+                 expect=(201,), writes=True),
+        Scenario('user_bookmarks', 'user_bookmarks',
+                 lambda ctx, i: ('get', _path('user_bookmarks'), None, ctx.user(i)[2])),
+        Scenario('bookmark_delete', 'bookmark_delete',
+                 lambda ctx, i: ('delete', _path('bookmark_delete', ctx.head_coin(i)), None,
+                                 ctx.user(i)[2]),
+                 writes=True),
+        Scenario('trade_buy', 'trade_buy',
+                 lambda ctx, i: ('post', _path('trade_buy'),
+                                 {'coin_id': ctx.coin(i % 10), 'quantity': '0.001'},
+                                 ctx.user(i)[2]),
+                 expect=(201,), writes=True),
+        Scenario('trade_sell', 'trade_sell',
+                 lambda ctx, i: ('post', _path('trade_sell'),
+                                 {'coin_id': ctx.coin(i % 10), 'quantity': '0.001'},
+                                 ctx.user(i)[2]),
+                 writes=True),
+        Scenario('trade_batch', 'trade_batch',
+                 lambda ctx, i: ('post', _path('trade_batch'), {'legs': [
+                     {'coin_id': ctx.coin(i % 10), 'side': 'BUY', 'quantity': '0.001'},
+                     {'coin_id': ctx.coin(i % 10), 'side': 'SELL', 'quantity': '0.001'},
+                 ]}, ctx.user(i)[2]),
+                 expect=(201,), writes=True),
+        Scenario('user_portfolio', 'user_portfolio',
+                 lambda ctx, i: ('get', _path('user_portfolio'), None, ctx.user(i)[2])),
+        Scenario('user_trade_history', 'user_trade_history',
+                 lambda ctx, i: ('get', _path('user_trade_history'), None, ctx.user(i)[2])),
+        Scenario('user_trade_history?cursor', 'user_trade_history',
+                 lambda ctx, i: ('get', _path('user_trade_history') + '?cursor=', None,
+                                 ctx.user(i)[2])),
+        Scenario('order_create', 'order_create',
+                 lambda ctx, i: ('post', _path('order_create'), {
+                     'coin_id': ctx.coin(i % 10), 'side': 'BUY', 'order_type': 'LIMIT',
+                     'trigger_price': '0.01', 'quantity': '1'}, ctx.user(i)[2]),
+                 expect=(201,), after=_remember_order, writes=True),
+        Scenario('user_orders', 'user_orders',
+                 lambda ctx, i: ('get', _path('user_orders') + '?status=OPEN', None,
+                                 ctx.user(i)[2])),
+        Scenario('order_cancel', 'order_cancel',
+                 lambda ctx, i: ('delete', _path('order_cancel', ctx.order_ids.get(i, 0)), None,
+                                 ctx.user(i)[2]),
+                 writes=True),
+        Scenario('request_stats', 'request_stats',
+                 lambda ctx, i: ('get', _path('request_stats'), None, ctx.data.admin_token)),
+    ]
+
+
+# Long-lived SSE stream, and the Lambda's ingest hook (benchmarked by
+# `manage.py ingest_coins`, which runs the same ingest)
+UNBENCHMARKED_URL_NAMES = {'coin_price_stream', 'ingest_markets'}
+
+
+def uncovered_url_names(scenario_list):
+    """
+    Named routes in api/urls.py that no scenario exercises
+    """
+    from api.urls import urlpatterns
+
+    covered = {scenario.url_name for scenario in scenario_list} | UNBENCHMARKED_URL_NAMES
+    return sorted(
+        pattern.name for pattern in urlpatterns if pattern.name and pattern.name not in covered
+    )
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def run_scenario(scenario, ctx, requests, concurrency):
+    """
+    Issue `requests` calls split across `concurrency` threads
+    """
+    from django.db import connection, connections
+    from rest_framework.test import APIClient
+
+    latencies = []
+    queries = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(iterations):
+        client = APIClient(SERVER_NAME='localhost')
+        local_latencies, local_queries, local_errors = [], [], []
+
+        for i in iterations:
+            method, path, data, token = scenario.build(ctx, i)
+            if token:
+                client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            else:
+                client.credentials()
+
+            counter = [0]
+
+            def count(execute, sql, params, many, context):
+                counter[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                response = getattr(client, method)(path, data, format='json')
+                elapsed = (time.perf_counter() - started) * 1000
+
+            local_latencies.append(elapsed)
+            local_queries.append(counter[0])
+            if response.status_code not in scenario.expect:
+                local_errors.append(response.status_code)
+            elif scenario.after:
+                scenario.after(ctx, i, response)
+
+        connections.close_all()
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            errors.extend(local_errors)
+
+    chunks = [range(start, requests, concurrency) for start in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, chunks))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance, query_tolerance):
+    """
+    Regressions of `results` against `baseline`: p95 latency more than
+    `tolerance` (fraction) slower, more than `query_tolerance` extra queries
+    per request, or new errors
+    """
+    regressions = []
+    for label, base in baseline.get('scenarios', {}).items():
+        current = results['scenarios'].get(label)
+        if current is None:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms"
+            )
+        if current['queries_per_request'] > base['queries_per_request'] + query_tolerance:
+            regressions.append(
+                f"{label}: queries/request {base['queries_per_request']} -> "
+                f"{current['queries_per_request']}"
+            )
+        if current['errors'] > base['errors']:
+            regressions.append(f"{label}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def print_report(results, out=sys.stdout):
+    header = (f"{'scenario':<42} {'req':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'req/s':>8} {'q/req':>6}")
+    out.write(header + '\n' + '-' * len(header) + '\n')
+    for label, row in results['scenarios'].items():
+        out.write(
+            f"{label:<42} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['throughput_rps']:>8.1f} "
+            f"{row['queries_per_request']:>6.2f}\n"
+        )
+
+
+def prepare_database(engine):
+    """
+    Point Django at a throwaway database and create the schema.
+    Returns a cleanup callable.
+    """
+    from django.conf import settings
+    from django.db import connection
+
+    # Keep per-connection query logs from growing during the run
+    settings.DEBUG = False
+
+    if engine == 'sqlite':
+        handle, path = tempfile.mkstemp(prefix='bench-', suffix='.sqlite3')
+        os.close(handle)
+        connection.settings_dict['TEST']['NAME'] = path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    def cleanup():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    return cleanup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', choices=['sqlite', 'postgresql'], default='sqlite',
+                        help='sqlite: temporary file; postgresql: test database on the '
+                             'server configured by DB_* settings')
+    parser.add_argument('--coins', type=int, default=500)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--bookmarks', type=int, default=10, help='per user')
+    parser.add_argument('--wallets', type=int, default=5, help='per user')
+    parser.add_argument('--trades', type=int, default=200, help='trade history rows per user')
+    parser.add_argument('--orders', type=int, default=20, help='open orders per user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--only', help='comma-separated scenario labels or URL names')
+    parser.add_argument('--output', help='write results JSON here (usable as a baseline)')
+    parser.add_argument('--baseline', help='compare against this results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed p95 slowdown as a fraction (default: 0.25)')
+    parser.add_argument('--query-tolerance', type=float, default=0.0,
+                        help='allowed extra queries per request (default: 0)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+    if args.database == 'sqlite':
+        os.environ['DB_ENGINE'] = 'sqlite3'
+    setup_django()
+    cleanup = prepare_database(args.database)
+
+    try:
+        from django.db import connection
+
+        volumes = SeedVolumes(
+            coins=args.coins, users=args.users, bookmarks=args.bookmarks,
+            wallets=args.wallets, trades=args.trades, orders=args.orders,
+        )
+        started = time.perf_counter()
+        ctx = Context(seed(volumes))
+        print(f'Seeded {connection.vendor} database in {time.perf_counter() - started:.1f}s '
+              f'({volumes.as_dict()})')
+
+        selected = scenarios()
+        missing = uncovered_url_names(selected)
+        if missing:
+            print(f"Warning: no scenario for {', '.join(missing)}")
+        if args.only:
+            wanted = {name.strip() for name in args.only.split(',')}
+            selected = [s for s in selected if s.label in wanted or s.url_name in wanted]
+
+        results = {
+            'meta': {
+                'database': connection.vendor,
+                'volumes': volumes.as_dict(),
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+            },
+            'scenarios': {},
+        }
+        for scenario in selected:
+            concurrency = args.concurrency
+            if scenario.writes and connection.vendor == 'sqlite':
+                # SQLite allows one writer at a time and fails lock upgrades
+                # immediately instead of waiting, so writes run serially
+                concurrency = 1
+            row = run_scenario(scenario, ctx, args.requests, concurrency)
+            row['concurrency'] = concurrency
+            results['scenarios'][scenario.label] = row
+        connection.close()
+    finally:
+        cleanup()
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+        print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.tolerance, args.query_tolerance)
+        if regressions:
+            print('Regressions against baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print('No regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Logins per second for one worker at different password hashing costs.
+
+Seeds a temporary SQLite database, then for each PBKDF2 iteration count
+(PASSWORD_HASH_ITERATIONS, 0 = Django's default) logs every seeded user in
+once, which re-hashes their password at that cost, and then times
+sequential POST /api/auth/login/ requests in this single process.
+
+For each cost it reports logins/second, latency percentiles, queries per
+login and how much of a login is spent hashing the password.
+
+Usage:
+    python -m benchmarks.login
+    python -m benchmarks.login --iterations 0,260000,100000 --requests 50
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import setup_django
+from .loadtest import percentile, prepare_database
+from .seed import BENCH_PASSWORD, SeedVolumes, seed
+
+
+def run_cost(emails, requests):
+    """
+    Time `requests` logins round-robin over `emails`; returns a result dict
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    url = reverse('login')
+
+    def login(email):
+        # A fresh client per login, like a new browser session
+        response = Client(SERVER_NAME='localhost').post(
+            url, {'email': email, 'password': BENCH_PASSWORD}, content_type='application/json'
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f'login failed with {response.status_code}')
+
+    # First logins re-hash every user's password at the current cost
+    for email in emails:
+        login(email)
+
+    samples = []
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for i in range(requests):
+            request_started = time.perf_counter()
+            login(emails[i % len(emails)])
+            samples.append((time.perf_counter() - request_started) * 1000)
+        elapsed = time.perf_counter() - started
+    samples.sort()
+
+    hash_started = time.perf_counter()
+    make_password(BENCH_PASSWORD)
+    hash_ms = (time.perf_counter() - hash_started) * 1000
+
+    return {
+        'logins_per_second': requests / elapsed,
+        'p50': percentile(samples, 0.5),
+        'p95': percentile(samples, 0.95),
+        'queries': len(queries) / requests,
+        'hash_ms': hash_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', default='0,260000,100000',
+                        help='comma-separated PBKDF2 iteration counts (0 = Django default)')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=30, help='timed logins per cost')
+    args = parser.parse_args()
+    costs = [int(value) for value in args.iterations.split(',') if value.strip()]
+
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+    os.environ['DB_ENGINE'] = 'sqlite3'
+    setup_django()
+    cleanup = prepare_database('sqlite')
+
+    try:
+        from django.contrib.auth.hashers import get_hasher
+        from django.test import override_settings
+
+        seed(SeedVolumes(coins=10, users=args.users, bookmarks=0, wallets=0, trades=0, orders=0))
+        emails = [f'bench{i}@example.com' for i in range(args.users)]
+
+        header = (f"{'iterations':>10} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+                  f"{'q/login':>8} {'hash ms':>8} {'hash %':>7}")
+        sys.stdout.write(header + '\n' + '-' * len(header) + '\n')
+        for cost in costs:
+            with override_settings(PASSWORD_HASH_ITERATIONS=cost):
+                iterations = get_hasher().iterations
+                result = run_cost(emails, args.requests)
+            sys.stdout.write(
+                f"{iterations:>10} {result['logins_per_second']:>9.1f} {result['p50']:>8.1f} "
+                f"{result['p95']:>8.1f} {result['queries']:>8.1f} {result['hash_ms']:>8.1f} "
+                f"{result['hash_ms'] / result['p50']:>7.0%}\n"
+            )
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
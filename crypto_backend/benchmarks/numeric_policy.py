@@ -0,0 +1,128 @@
+"""
+Compare the legacy numeric(1000, 50) columns with the bounded numeric policy.
+
+Reports, for the CoinGecko sample replicated to --rows coins:
+- serialization time and JSON size of CoinSerializer with both precisions
+- average stored size of each numeric value (PostgreSQL only, pg_column_size)
+
+Usage:
+    python -m benchmarks.numeric_policy --rows 5000
+"""
+import argparse
+
+from . import SAMPLE_FILE, setup_django, timed
+
+LEGACY_DIGITS = (1000, 50)
+
+
+def build_coins(rows):
+    from api.ingest import load_payload_from_file, parse_markets_payload
+
+    base, _ = parse_markets_payload(load_payload_from_file(SAMPLE_FILE))
+    coins = []
+    for i in range(rows):
+        template = base[i % len(base)]
+        coin = type(template)(**{
+            field.attname: getattr(template, field.attname)
+            for field in template._meta.concrete_fields
+        })
+        coin.id = f'{template.id}-{i}'
+        coins.append(coin)
+    return coins
+
+
+def legacy_serializer_class():
+    """
+    CoinSerializer with every DecimalField widened back to numeric(1000, 50)
+    """
+    from rest_framework import serializers
+    from api.serializers import CoinSerializer
+
+    decimal_fields = {
+        name: serializers.DecimalField(
+            max_digits=LEGACY_DIGITS[0],
+            decimal_places=LEGACY_DIGITS[1],
+            allow_null=True,
+            required=False,
+        )
+        for name, field in CoinSerializer().fields.items()
+        if isinstance(field, serializers.DecimalField)
+    }
+    return type('LegacyCoinSerializer', (CoinSerializer,), decimal_fields)
+
+
+def serialization_report(coins):
+    from rest_framework.renderers import JSONRenderer
+    from api.serializers import CoinSerializer
+
+    renderer = JSONRenderer()
+    report = {}
+    for label, serializer_class in (
+        ('numeric(1000,50)', legacy_serializer_class()),
+        ('policy', CoinSerializer),
+    ):
+        ms, body = timed(
+            lambda: renderer.render(serializer_class(coins, many=True).data), repeat=3
+        )
+        report[label] = (ms, len(body))
+    return report
+
+
+def storage_report(coins):
+    """
+    Average pg_column_size per value under both precisions, or None when the
+    default database is not PostgreSQL
+    """
+    from django.db import connection
+    from api.models import Coin
+
+    if connection.vendor != 'postgresql':
+        return None
+
+    report = {}
+    with connection.cursor() as cursor:
+        for field in Coin._meta.concrete_fields:
+            if field.get_internal_type() != 'DecimalField':
+                continue
+            values = [
+                str(getattr(coin, field.attname))
+                for coin in coins[:1000]
+                if getattr(coin, field.attname) is not None
+            ]
+            if not values:
+                continue
+            cursor.execute(
+                f"""
+                SELECT avg(pg_column_size(v::numeric({LEGACY_DIGITS[0]}, {LEGACY_DIGITS[1]}))),
+                       avg(pg_column_size(v::numeric({field.max_digits}, {field.decimal_places})))
+                FROM unnest(%s::text[]) AS v
+                """,
+                [values],
+            )
+            report[field.name] = cursor.fetchone()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    coins = build_coins(args.rows)
+
+    print(f'Serializing {len(coins)} coins with CoinSerializer')
+    for label, (ms, size) in serialization_report(coins).items():
+        print(f'  {label:<18} {ms:8.1f} ms  {size / 1024:10.1f} KiB')
+
+    storage = storage_report(coins)
+    if storage is None:
+        print('Stored value size: skipped (requires PostgreSQL as the default database)')
+        return
+    print('Average stored bytes per value (legacy -> policy)')
+    for name, (legacy, policy) in storage.items():
+        print(f'  {name:<34} {float(legacy):6.1f} -> {float(policy):6.1f}')
+
+
+if __name__ == '__main__':
+    main()
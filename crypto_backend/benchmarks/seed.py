@@ -0,0 +1,135 @@
+"""
+Seed a benchmark database with realistic volumes.
+
+Coins are the CoinGecko sample replicated to the requested count and loaded
+through the real ingest path; users, bookmarks, wallets and trade history
+are bulk inserted so seeding stays fast at large volumes.
+"""
+import copy
+import random
+from decimal import Decimal
+
+from . import SAMPLE_FILE
+
+BENCH_PASSWORD = 'benchpass123'
+
+
+class SeedVolumes:
+    """
+    Row counts for one seeded database
+    """
+
+    def __init__(self, coins=500, users=50, bookmarks=10, wallets=5, trades=200, orders=20):
+        self.coins = coins
+        self.users = users
+        self.bookmarks = bookmarks  # per user
+        self.wallets = wallets  # per user
+        self.trades = trades  # per user
+        self.orders = orders  # open orders per user
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class SeedData:
+    """
+    What the load test needs to know about the seeded rows
+    """
+
+    def __init__(self):
+        self.coin_ids = []
+        self.users = []  # (user_id, email, token)
+        self.admin_token = None
+
+
+def markets_payload(count):
+    """
+    The sample payload replicated to `count` coins with unique ids and ranks
+    """
+    from api.ingest import load_payload_from_file
+
+    base = load_payload_from_file(SAMPLE_FILE)
+    payload = []
+    for i in range(count):
+        entry = copy.deepcopy(base[i % len(base)])
+        if i >= len(base):
+            entry['id'] = f"{entry['id']}-{i // len(base)}"
+            entry['symbol'] = f"{entry['symbol']}{i // len(base)}"
+        entry['market_cap_rank'] = i + 1
+        payload.append(entry)
+    return payload
+
+
+def seed(volumes, rng=None):
+    """
+    Fill the current default database and return SeedData
+    """
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+    from api.ingest import ingest_payload
+    from api.models import (
+        BankBalance, Bookmark, Coin, PendingOrder, PortfolioValuation, TradeHistory, User,
+        Wallet,
+    )
+    from api.portfolio import refresh_portfolio_values
+
+    rng = rng or random.Random(42)
+    data = SeedData()
+
+    ingest_payload(markets_payload(volumes.coins))
+    prices = dict(Coin.objects.values_list('id', 'current_price'))
+    data.coin_ids = list(Coin.objects.order_by('market_cap_rank').values_list('id', flat=True))
+    priced = [coin_id for coin_id in data.coin_ids if prices[coin_id]]
+
+    # One hash for everyone: hashing per user would dominate seeding time
+    password = make_password(BENCH_PASSWORD)
+    users = User.objects.bulk_create([
+        User(email=f'bench{i}@example.com', username=f'bench{i}@example.com',
+             name=f'bench{i}', password=password)
+        for i in range(volumes.users)
+    ])
+    admin = User.objects.create(
+        email='bench-admin@example.com', username='bench-admin@example.com',
+        name='admin', password=password, is_staff=True,
+    )
+    tokens = Token.objects.bulk_create([
+        Token(user=user, key=Token.generate_key()) for user in users + [admin]
+    ])
+    data.users = [(user.id, user.email, token.key) for user, token in zip(users, tokens)]
+    data.admin_token = tokens[-1].key
+
+    BankBalance.objects.bulk_create([BankBalance(user=user) for user in users])
+    PortfolioValuation.objects.bulk_create([PortfolioValuation(user=user) for user in users])
+
+    bookmarks, wallets, trades, orders = [], [], [], []
+    for user in users:
+        # Bookmarks use the tail of the coin list; the load test adds and
+        # removes bookmarks from the head
+        tail = data.coin_ids[len(data.coin_ids) // 2:]
+        for coin_id in rng.sample(tail, min(volumes.bookmarks, len(tail))):
+            bookmarks.append(Bookmark(user=user, coin_id=coin_id))
+        for coin_id in rng.sample(priced, min(volumes.wallets, len(priced))):
+            wallets.append(Wallet(user=user, coin_id=coin_id, quantity=Decimal('1')))
+        balance = Decimal('500000')
+        for _ in range(volumes.trades):
+            coin_id = rng.choice(priced)
+            price = prices[coin_id]
+            trades.append(TradeHistory(
+                user=user, coin_id=coin_id, trade_type=rng.choice(['BUY', 'SELL']),
+                trade_quantity=Decimal('0.01'), trade_price_per_coin=price,
+                balance_before_trade=balance, balance_after_trade=balance,
+            ))
+        for _ in range(volumes.orders):
+            coin_id = rng.choice(priced)
+            orders.append(PendingOrder(
+                user=user, coin_id=coin_id, side='BUY', order_type='LIMIT',
+                trigger_price=prices[coin_id] / 2, quantity=Decimal('0.01'),
+            ))
+
+    Bookmark.objects.bulk_create(bookmarks, batch_size=1000)
+    Wallet.objects.bulk_create(wallets, batch_size=1000)
+    TradeHistory.objects.bulk_create(trades, batch_size=1000)
+    PendingOrder.objects.bulk_create(orders, batch_size=1000)
+    refresh_portfolio_values(user_ids=[user.id for user in users])
+
+    return data
@@ -3,6 +3,19 @@ ASGI config for crypto_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live price stream (GET /api/coins/stream) is only served over ASGI, e.g.:
+    gunicorn crypto_backend.asgi:application -k uvicorn.workers.UvicornWorker
+
+Each worker process keeps one price hub shared by all of its SSE clients.
+
+ASGI also routes the coin read endpoints (list, top10, detail) to the async
+views in api/views/async_crypto_views.py (ASYNC_READ_VIEWS), so one worker
+holds many in-flight reads; set ASYNC_READ_VIEWS=False to keep the DRF views.
+
+Sync code runs in a new thread per request under ASGI, so persistent
+per-thread database connections are off by default (SERVED_OVER_ASGI);
+set DB_POOL=True to reuse connections through a pool.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +25,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crypto_backend.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+os.environ['SERVED_OVER_ASGI'] = 'True'
 
 application = get_asgi_application()
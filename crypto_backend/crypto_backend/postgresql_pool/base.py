@@ -0,0 +1,114 @@
+"""
+PostgreSQL backend that takes its connections from a psycopg 3 pool.
+
+Django 4.2 keeps at most one connection per thread (CONN_MAX_AGE) and has no
+pool of its own; Django 5.1 adds `OPTIONS["pool"]` to the stock backend and
+this module accepts the same setting. With it set, a connection is borrowed
+from a per-process `psycopg_pool.ConnectionPool` the first time a request
+touches the database and handed back when Django closes it at the end of
+the request, so every thread of a worker shares a few warm connections.
+
+    "ENGINE": "crypto_backend.postgresql_pool",
+    "CONN_MAX_AGE": 0,
+    "OPTIONS": {"pool": {"min_size": 1, "max_size": 4, "timeout": 10}},
+
+The pool is created lazily, so with gunicorn each worker opens its own pool
+after the fork. Requires the psycopg[pool] extra.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Shared by the wrappers of every thread, keyed by database alias
+    _connection_pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """
+        The psycopg pool for this alias, or None when pooling is not enabled
+        """
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        with self._pools_lock:
+            if self.alias not in self._connection_pools:
+                self._connection_pools[self.alias] = self._create_pool(
+                    {} if pool_options is True else pool_options
+                )
+        return self._connection_pools[self.alias]
+
+    def _create_pool(self, pool_options):
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "Pooling doesn't support persistent connections; set CONN_MAX_AGE to 0."
+            )
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                "Error loading psycopg_pool module. Did you install psycopg[pool]?"
+            ) from exc
+
+        pool = ConnectionPool(
+            kwargs=self.get_connection_params(),
+            open=False,
+            check=ConnectionPool.check_connection
+            if self.settings_dict["CONN_HEALTH_CHECKS"] else None,
+            name=self.alias,
+            **pool_options,
+        )
+        pool.open()
+        return pool
+
+    def close_pool(self):
+        """
+        Close the pool for this alias and its idle connections
+        """
+        with self._pools_lock:
+            pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = IsolationLevel(
+                options.get("isolation_level", IsolationLevel.READ_COMMITTED)
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {options['isolation_level']} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        connection = pool.getconn()
+        # Pooled connections keep the level set by a previous borrower
+        connection.isolation_level = (
+            self.isolation_level if "isolation_level" in options else None
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # putconn rolls back a connection returned mid-transaction
+            self.pool.putconn(self.connection)
+        # The connection belongs to the pool again even if Django closed it
+        # inside an atomic block
+        self.connection = None
@@ -55,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # No-op unless API_TIMING_ENABLED is set
+    "api.instrumentation.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -115,6 +117,39 @@ else:
         }
     }
 
+# Connection reuse. By default each worker thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (checked before reuse when DB_CONN_HEALTH_CHECKS is
+# on) instead of reconnecting, and paying the TLS handshake, per request.
+# DB_POOL=True switches PostgreSQL to a psycopg 3 pool shared by the threads
+# of each worker (see crypto_backend/postgresql_pool); 0 for DB_CONN_MAX_AGE
+# restores a connection per request.
+#
+# Under ASGI (crypto_backend/asgi.py sets SERVED_OVER_ASGI) every request runs
+# its sync code in a fresh thread, so per-thread persistent connections would
+# never be reused and pile up until max_connections; there DB_CONN_MAX_AGE
+# defaults to 0. Use DB_POOL=True to reuse connections under ASGI.
+SERVED_OVER_ASGI = config("SERVED_OVER_ASGI", default=False, cast=bool)
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = config(
+        "DB_CONN_MAX_AGE", default=0 if SERVED_OVER_ASGI else 60, cast=int
+    )
+    database["CONN_HEALTH_CHECKS"] = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
+    if database["ENGINE"] != "django.db.backends.postgresql":
+        continue
+    database["OPTIONS"] = {
+        "connect_timeout": config("DB_CONNECT_TIMEOUT", default=10, cast=int),
+    }
+    if DB_POOL:
+        database["ENGINE"] = "crypto_backend.postgresql_pool"
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"]["pool"] = {
+            "min_size": config("DB_POOL_MIN_SIZE", default=1, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=4, cast=int),
+            "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+        }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -134,6 +169,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher encodes new passwords; the others only verify old hashes.
+# PASSWORD_HASH_ITERATIONS tunes the PBKDF2 cost (0 keeps Django's default,
+# the OWASP recommendation); users are re-hashed on their next login.
+PASSWORD_HASHERS = [
+    "api.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=0, cast=int)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -161,7 +208,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -188,7 +235,63 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Cache (per-process local memory by default; point every worker at a shared
+# backend such as django.core.cache.backends.redis.RedisCache in production)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Seconds a user's bookmarked coin-id set may be served from the cache
+BOOKMARK_IDS_CACHE_TIMEOUT = config("BOOKMARK_IDS_CACHE_TIMEOUT", default=300, cast=int)
+
+# Auth token lookups (api/authentication.py)
+# Alias in CACHES shared by all workers (e.g. "default" on Redis); empty for per-process only
+AUTH_TOKEN_CACHE_ALIAS = config("AUTH_TOKEN_CACHE_ALIAS", default="")
+# Seconds a token -> user lookup is reused without a query; 0 disables.
+# Per-process only, a logout on one worker is not seen by the others until
+# their copy expires, so the default stays short without a shared cache
+AUTH_TOKEN_CACHE_TIMEOUT = config(
+    "AUTH_TOKEN_CACHE_TIMEOUT", default=60 if AUTH_TOKEN_CACHE_ALIAS else 5, cast=int
+)
+# Tokens kept per process
+AUTH_TOKEN_CACHE_SIZE = config("AUTH_TOKEN_CACHE_SIZE", default=10000, cast=int)
+
 # Session settings
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "Lax"
+
+# Shared secret the scheduled Lambda sends to POST /api/internal/ingest/;
+# the endpoint is disabled while it is empty
+INGEST_TOKEN = config("INGEST_TOKEN", default="")
+
+# Coin snapshot cache
+# Seconds a worker trusts its last coin data version before re-checking the DB
+COIN_SNAPSHOT_VERSION_TTL = config("COIN_SNAPSHOT_VERSION_TTL", default=5.0, cast=float)
+
+# Serve coin_list / coin_top10_list / coin_detail with async views.
+# Set by crypto_backend/asgi.py; leave off under WSGI, where async views
+# would run in a throwaway event loop per request. ASGI also drops the
+# DB_CONN_MAX_AGE default to 0 (see DATABASES); prefer DB_POOL=True there.
+ASYNC_READ_VIEWS = config("ASYNC_READ_VIEWS", default=False, cast=bool)
+
+# Request instrumentation
+# Adds Server-Timing headers and per-URL stats at /api/admin/stats/
+API_TIMING_ENABLED = config("API_TIMING_ENABLED", default=False, cast=bool)
+
+# Live price stream (GET /api/coins/stream, ASGI only)
+# Fallback poll interval when no NOTIFY arrives (the only trigger off PostgreSQL)
+PRICE_STREAM_POLL_SECONDS = config("PRICE_STREAM_POLL_SECONDS", default=5.0, cast=float)
+# Events kept per worker for clients resuming with Last-Event-ID
+PRICE_STREAM_REPLAY_SIZE = config("PRICE_STREAM_REPLAY_SIZE", default=100, cast=int)
+# Undelivered events per client before it is sent a reset
+PRICE_STREAM_QUEUE_SIZE = config("PRICE_STREAM_QUEUE_SIZE", default=20, cast=int)
+PRICE_STREAM_HEARTBEAT_SECONDS = config("PRICE_STREAM_HEARTBEAT_SECONDS", default=15.0, cast=float)
+# Connections are closed after this long; browsers reconnect and resume
+PRICE_STREAM_MAX_SECONDS = config("PRICE_STREAM_MAX_SECONDS", default=300.0, cast=float)
+PRICE_STREAM_RETRY_MS = config("PRICE_STREAM_RETRY_MS", default=1000, cast=int)
@@ -37,6 +37,9 @@ CACHES = {
     }
 }
 
+# Always re-check the coin data version so tests see their own writes
+COIN_SNAPSHOT_VERSION_TTL = 0
+
 # Disable CORS checks in tests
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -50,6 +53,7 @@ USE_TZ = True
 
 # Disable middleware that might cause issues in tests
 MIDDLEWARE = [
+    'api.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',